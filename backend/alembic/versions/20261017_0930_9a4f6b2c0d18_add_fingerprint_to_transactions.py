@@ -0,0 +1,79 @@
+"""add fingerprint to transactions
+
+Revision ID: 9a4f6b2c0d18
+Revises: 5d2c8e1f7a31
+Create Date: 2026-10-17 09:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.duplicates import transaction_fingerprint
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f6b2c0d18'
+down_revision: Union[str, None] = '5d2c8e1f7a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.add_column('transactions', sa.Column('fingerprint', sa.String(length=64), nullable=True))
+
+    # Backfill fingerprints for existing transactions
+    transactions = sa.table(
+        'transactions',
+        sa.column('id', sa.Integer),
+        sa.column('date', sa.Date),
+        sa.column('amount', sa.Float),
+        sa.column('transaction_type', sa.String),
+        sa.column('account_id', sa.Integer),
+        sa.column('description', sa.String),
+        sa.column('fingerprint', sa.String),
+    )
+    bind = op.get_bind()
+    update = (
+        transactions.update()
+        .where(transactions.c.id == sa.bindparam('row_id'))
+        .values(fingerprint=sa.bindparam('fingerprint'))
+    )
+    # Page through the table by id so that only one batch is held in memory
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(
+                transactions.c.id,
+                transactions.c.date,
+                transactions.c.amount,
+                transactions.c.transaction_type,
+                transactions.c.account_id,
+                transactions.c.description,
+            )
+            .where(transactions.c.id > last_id)
+            .order_by(transactions.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        bind.execute(update, [
+            {
+                'row_id': row.id,
+                'fingerprint': transaction_fingerprint(
+                    row.date, row.amount, row.transaction_type, row.account_id, row.description
+                ),
+            }
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+    op.create_index(op.f('ix_transactions_fingerprint'), 'transactions', ['fingerprint'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_transactions_fingerprint'), table_name='transactions')
+    op.drop_column('transactions', 'fingerprint')
@@ -0,0 +1,26 @@
+"""add (date, amount) index to transactions
+
+Revision ID: c7e19d5a3b42
+Revises: 9a4f6b2c0d18
+Create Date: 2026-10-17 10:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e19d5a3b42'
+down_revision: Union[str, None] = '9a4f6b2c0d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_transactions_date_amount', 'transactions', ['date', 'amount'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_date_amount', table_name='transactions')
@@ -0,0 +1,42 @@
+"""add composite indexes for aggregate queries
+
+Revision ID: e2b84f6d9c07
+Revises: c7e19d5a3b42
+Create Date: 2026-10-17 11:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b84f6d9c07'
+down_revision: Union[str, None] = 'c7e19d5a3b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_transactions_type_date',
+        'transactions',
+        ['transaction_type', 'date'],
+        unique=False,
+        postgresql_include=['amount', 'category'],
+    )
+    op.create_index(
+        'ix_transactions_type_category_date',
+        'transactions',
+        ['transaction_type', 'category', 'date'],
+        unique=False,
+        postgresql_include=['amount'],
+    )
+    op.create_index('ix_transactions_account_date', 'transactions', ['account_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transactions_account_date', table_name='transactions')
+    op.drop_index('ix_transactions_type_category_date', table_name='transactions')
+    op.drop_index('ix_transactions_type_date', table_name='transactions')
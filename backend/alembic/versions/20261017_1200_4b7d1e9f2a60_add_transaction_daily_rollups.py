@@ -0,0 +1,70 @@
+"""add transaction daily rollups
+
+Revision ID: 4b7d1e9f2a60
+Revises: e2b84f6d9c07
+Create Date: 2026-10-17 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7d1e9f2a60'
+down_revision: Union[str, None] = 'e2b84f6d9c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('transaction_daily_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('account_id', sa.Integer(), nullable=True),
+        sa.Column('category', sa.String(length=100), nullable=True),
+        sa.Column('transaction_type', sa.String(length=20), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_transaction_daily_rollups_id'), 'transaction_daily_rollups', ['id'], unique=False)
+    op.create_index(op.f('ix_transaction_daily_rollups_date'), 'transaction_daily_rollups', ['date'], unique=False)
+    op.create_index(
+        'ix_transaction_daily_rollups_type_date',
+        'transaction_daily_rollups',
+        ['transaction_type', 'date'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_transaction_daily_rollups_type_category_date',
+        'transaction_daily_rollups',
+        ['transaction_type', 'category', 'date'],
+        unique=False,
+    )
+    # One row per (date, account, category, type); NULLs are folded so that
+    # INSERT ... ON CONFLICT can target the key
+    op.create_index(
+        'ux_transaction_daily_rollups_key',
+        'transaction_daily_rollups',
+        ['date', sa.text('COALESCE(account_id, 0)'), sa.text("COALESCE(category, '')"), 'transaction_type'],
+        unique=True,
+    )
+
+    # Backfill from existing transactions
+    op.execute("""
+        INSERT INTO transaction_daily_rollups (date, account_id, category, transaction_type, total, count)
+        SELECT date, account_id, NULLIF(category, ''), COALESCE(transaction_type, 'expense'), SUM(amount), COUNT(id)
+        FROM transactions
+        GROUP BY date, account_id, NULLIF(category, ''), COALESCE(transaction_type, 'expense')
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ux_transaction_daily_rollups_key', table_name='transaction_daily_rollups')
+    op.drop_index('ix_transaction_daily_rollups_type_category_date', table_name='transaction_daily_rollups')
+    op.drop_index('ix_transaction_daily_rollups_type_date', table_name='transaction_daily_rollups')
+    op.drop_index(op.f('ix_transaction_daily_rollups_date'), table_name='transaction_daily_rollups')
+    op.drop_index(op.f('ix_transaction_daily_rollups_id'), table_name='transaction_daily_rollups')
+    op.drop_table('transaction_daily_rollups')
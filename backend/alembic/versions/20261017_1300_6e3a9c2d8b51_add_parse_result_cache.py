@@ -0,0 +1,46 @@
+"""add parse result cache
+
+Revision ID: 6e3a9c2d8b51
+Revises: 4b7d1e9f2a60
+Create Date: 2026-10-17 13:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e3a9c2d8b51'
+down_revision: Union[str, None] = '4b7d1e9f2a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('parse_result_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(length=200), nullable=False),
+        sa.Column('prompt_version', sa.String(length=50), nullable=False),
+        sa.Column('result', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_parse_result_cache_id'), 'parse_result_cache', ['id'], unique=False)
+    op.create_index(op.f('ix_parse_result_cache_last_used_at'), 'parse_result_cache', ['last_used_at'], unique=False)
+    op.create_index(
+        'ix_parse_result_cache_key',
+        'parse_result_cache',
+        ['content_hash', 'model', 'prompt_version'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_parse_result_cache_key', table_name='parse_result_cache')
+    op.drop_index(op.f('ix_parse_result_cache_last_used_at'), table_name='parse_result_cache')
+    op.drop_index(op.f('ix_parse_result_cache_id'), table_name='parse_result_cache')
+    op.drop_table('parse_result_cache')
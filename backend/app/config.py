@@ -7,6 +7,47 @@ class Settings(BaseSettings):
     openrouter_api_key: str = ""
     openrouter_model: str = "anthropic/claude-sonnet-4"
     upload_dir: str = "uploads"
+    # How many files of a batch upload are parsed at the same time
+    upload_concurrency: int = 4
+    # Uploads are streamed to disk in chunks; larger files/batches are rejected
+    upload_chunk_bytes: int = 1024 * 1024
+    upload_max_file_bytes: int = 20 * 1024 * 1024
+    upload_max_batch_bytes: int = 100 * 1024 * 1024
+    # Thread pool for file I/O and PDF text extraction; processes > 0 moves
+    # PDF extraction into a process pool of that size
+    blocking_io_workers: int = 4
+    pdf_extraction_processes: int = 0
+    # Screenshots are downscaled and recompressed (JPEG or WEBP) before upload
+    image_preprocessing: bool = True
+    image_max_edge: int = 1568
+    image_format: str = "JPEG"
+    image_quality: int = 85
+    # Long PDF statements are sent to the model in overlapping windows
+    pdf_chunk_chars: int = 4000
+    pdf_chunk_overlap_lines: int = 3
+    pdf_chunk_concurrency: int = 4
+    # Cached parse results of uploaded files (keyed by content hash)
+    parse_cache_max_age_days: int = 30
+    parse_cache_max_entries: int = 1000
+
+    # Shared HTTP client for OpenRouter
+    openrouter_url: str = "https://openrouter.ai/api/v1/chat/completions"
+    llm_max_connections: int = 10
+    llm_max_keepalive_connections: int = 5
+    llm_keepalive_expiry: float = 30.0
+    llm_timeout_seconds: float = 60.0
+    llm_connect_timeout_seconds: float = 10.0
+    llm_http2: bool = True
+
+    # Response cache for read-heavy endpoints: "memory" or "redis"
+    cache_backend: str = "memory"
+    cache_ttl_seconds: int = 30
+    cache_max_entries: int = 512
+    redis_url: str = "redis://localhost:6379/0"
+
+    # Background export jobs (files go to upload_dir/exports)
+    export_workers: int = 2
+    export_job_ttl_seconds: int = 3600
 
     class Config:
         env_file = ".env"
@@ -1,10 +1,15 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from app.database import engine, Base, SessionLocal
 from app.routers import transactions, upload, reports, export, recurring, budgets, settings, savings, dashboard, accounts
 from app.logging_config import setup_logging, get_logger
-from app.middleware import RequestLoggingMiddleware
+from app.middleware import RequestLoggingMiddleware, UploadSizeLimitMiddleware
+from app.services.rollups import rebuild_rollups_if_missing
+from app.services.export_jobs import export_jobs
+from app.services.llm_client import llm_client
+from app.services import offload
 
 # Setup structured logging
 log_level = os.getenv("LOG_LEVEL", "INFO")
@@ -13,12 +18,30 @@ logger = get_logger(__name__)
 
 Base.metadata.create_all(bind=engine)
 
+# Databases created before the daily rollups existed get them filled once
+with SessionLocal() as db:
+    rebuild_rollups_if_missing(db)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await llm_client.start()
+    yield
+    await llm_client.aclose()
+    # Дожидаемся начатых выгрузок, чтобы не оставлять недописанные файлы
+    export_jobs.shutdown()
+    offload.shutdown()
+
+
 app = FastAPI(
     title="Домашняя Бухгалтерия",
     description="API для учёта личных финансов",
     version="2.0.0",
+    lifespan=lifespan,
 )
 
+# Oversized uploads are rejected before their body is read
+app.add_middleware(UploadSizeLimitMiddleware)
 # Add request logging middleware
 app.add_middleware(RequestLoggingMiddleware)
 
@@ -28,6 +51,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-Parse-Failed-Chunks", "X-Parse-Total-Chunks"],
 )
 
 app.include_router(transactions.router)
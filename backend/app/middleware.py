@@ -2,8 +2,12 @@ import time
 import uuid
 import logging
 from fastapi import Request, Response
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 
+from app.config import get_settings
+from app.services.uploads import format_limit
+
 logger = logging.getLogger(__name__)
 
 
@@ -63,3 +67,38 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 exc_info=True,
             )
             raise
+
+
+# Запас на границы и заголовки частей multipart-тела
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware(BaseHTTPMiddleware):
+    """Rejects uploads by Content-Length before the multipart body is read"""
+
+    async def dispatch(
+        self, request: Request, call_next: RequestResponseEndpoint
+    ) -> Response:
+        settings = get_settings()
+        limits = {
+            "/api/upload": settings.upload_max_file_bytes,
+            "/api/upload/batch": settings.upload_max_batch_bytes,
+        }
+        max_bytes = limits.get(request.url.path)
+        content_length = request.headers.get("content-length", "")
+
+        if (
+            request.method == "POST"
+            and max_bytes is not None
+            and content_length.isdigit()
+            and int(content_length) > max_bytes + MULTIPART_OVERHEAD_BYTES
+        ):
+            logger.warning(
+                "Upload rejected by Content-Length",
+                extra={"path": request.url.path, "content_length": int(content_length)},
+            )
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Размер загрузки больше {format_limit(max_bytes)}"},
+            )
+        return await call_next(request)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, Boolean, ForeignKey, Index, DDL, event, literal_column
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -10,17 +10,112 @@ class Transaction(Base):
     id = Column(Integer, primary_key=True, index=True)
     amount = Column(Float, nullable=False)
     description = Column(String(500), nullable=False)
-    category = Column(String(100), nullable=True)
+    category = Column(String(100), nullable=True, index=True)
     transaction_type = Column(String(20), nullable=False, server_default="expense")  # "income" or "expense"
-    date = Column(Date, nullable=False)
+    date = Column(Date, nullable=False, index=True)
     image_path = Column(String(500), nullable=True)
     raw_text = Column(Text, nullable=True)
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=True)
+    # SHA-256 от даты, суммы в копейках, типа, счёта и нормализованного описания
+    fingerprint = Column(String(64), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     account = relationship("Account", back_populates="transactions")
 
+    __table_args__ = (
+        # Окно (дата, сумма) при поиске дубликатов
+        Index("ix_transactions_date_amount", "date", "amount"),
+        # Агрегаты дашборда, бюджетов, отчётов и накоплений: тип + период,
+        # на PostgreSQL — index-only scan за счёт INCLUDE
+        Index(
+            "ix_transactions_type_date",
+            "transaction_type",
+            "date",
+            postgresql_include=["amount", "category"],
+        ),
+        # Расходы по категории за период (бюджеты)
+        Index(
+            "ix_transactions_type_category_date",
+            "transaction_type",
+            "category",
+            "date",
+            postgresql_include=["amount"],
+        ),
+        # Выписка по счёту, отсортированная по дате
+        Index("ix_transactions_account_date", "account_id", "date"),
+        # Триграммный индекс для поиска по описанию (ILIKE '%...%' и pg_trgm), только PostgreSQL
+        Index(
+            "ix_transactions_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+class TransactionDailyRollup(Base):
+    """Суммы и количество транзакций за день в разрезе счёта, категории и типа.
+
+    Поддерживается инкрементально при изменении транзакций
+    (app/services/rollups.py); отчёты и дашборд читают агрегаты отсюда.
+    Ключ (date, account_id, category, transaction_type) уникален с учётом
+    NULL: индекс построен по COALESCE от account_id и category, и на нём
+    работает INSERT ... ON CONFLICT DO UPDATE при применении дельт.
+    """
+    __tablename__ = "transaction_daily_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    date = Column(Date, nullable=False, index=True)
+    account_id = Column(Integer, nullable=True)
+    category = Column(String(100), nullable=True)
+    transaction_type = Column(String(20), nullable=False)
+    total = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_transaction_daily_rollups_type_date", "transaction_type", "date"),
+        Index("ix_transaction_daily_rollups_type_category_date", "transaction_type", "category", "date"),
+        Index(
+            "ux_transaction_daily_rollups_key",
+            date,
+            func.coalesce(account_id, literal_column("0")),
+            func.coalesce(category, literal_column("''")),
+            transaction_type,
+            unique=True,
+        ),
+    )
+
+
+class ParseResultCache(Base):
+    """Результаты распознавания загруженных файлов.
+
+    Ключ — SHA-256 содержимого файла, модель и версия промпта: повторная
+    загрузка того же скриншота или выписки не вызывает модель заново.
+    """
+    __tablename__ = "parse_result_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False)
+    model = Column(String(200), nullable=False)
+    prompt_version = Column(String(50), nullable=False)
+    # JSON-массив ParsedTransaction
+    result = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    __table_args__ = (
+        Index("ix_parse_result_cache_key", "content_hash", "model", "prompt_version", unique=True),
+    )
+
+
+# Расширение pg_trgm нужно до создания триграммного индекса
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 
 class RecurringPayment(Base):
     __tablename__ = "recurring_payments"
@@ -8,11 +8,12 @@ from app.schemas import (
     AccountUpdate,
     AccountResponse,
 )
+from app.services.cache import cached_response, conditional_get, invalidate_cache_on_write
 
 router = APIRouter(prefix="/api/accounts", tags=["accounts"])
 
 
-@router.post("/", response_model=AccountResponse)
+@router.post("/", response_model=AccountResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def create_account(account: AccountCreate, db: Session = Depends(get_db)):
     db_account = Account(**account.model_dump())
     db.add(db_account)
@@ -21,7 +22,7 @@ def create_account(account: AccountCreate, db: Session = Depends(get_db)):
     return db_account
 
 
-@router.get("/", response_model=list[AccountResponse])
+@router.get("/", response_model=list[AccountResponse], dependencies=[Depends(conditional_get)])
 def get_accounts(
     active_only: bool = True,
     db: Session = Depends(get_db),
@@ -33,6 +34,7 @@ def get_accounts(
 
 
 @router.get("/total-balance")
+@cached_response("accounts.total_balance")
 def get_total_balance(db: Session = Depends(get_db)):
     """Get total balance across all active accounts, separating debit and credit"""
     # Debit accounts (cash, card, savings) - positive balance is money you have
@@ -89,7 +91,7 @@ def get_account(account_id: int, db: Session = Depends(get_db)):
     return account
 
 
-@router.put("/{account_id}", response_model=AccountResponse)
+@router.put("/{account_id}", response_model=AccountResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def update_account(
     account_id: int,
     account: AccountUpdate,
@@ -108,7 +110,7 @@ def update_account(
     return db_account
 
 
-@router.delete("/{account_id}")
+@router.delete("/{account_id}", dependencies=[Depends(invalidate_cache_on_write)])
 def delete_account(account_id: int, db: Session = Depends(get_db)):
     db_account = db.query(Account).filter(Account.id == account_id).first()
     if not db_account:
@@ -130,7 +132,7 @@ def delete_account(account_id: int, db: Session = Depends(get_db)):
         return {"message": "Счёт удалён"}
 
 
-@router.post("/{account_id}/adjust-balance", response_model=AccountResponse)
+@router.post("/{account_id}/adjust-balance", response_model=AccountResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def adjust_balance(
     account_id: int,
     amount: float = Query(..., description="Сумма корректировки (+ добавить, - убавить)"),
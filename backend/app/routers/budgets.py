@@ -1,20 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
 from datetime import date
 from app.database import get_db
-from app.models import Budget, Transaction
+from app.models import Budget
 from app.schemas import (
     BudgetCreate,
     BudgetUpdate,
     BudgetResponse,
     BudgetStatus,
 )
+from app.services.budget_status import get_budget_statuses
+from app.services.periods import MAX_YEAR, MIN_YEAR
+from app.services.cache import cached_response, conditional_get, invalidate_cache_on_write
 
 router = APIRouter(prefix="/api/budgets", tags=["budgets"])
 
 
-@router.post("/", response_model=BudgetResponse)
+@router.post("/", response_model=BudgetResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def create_budget(budget: BudgetCreate, db: Session = Depends(get_db)):
     # Check if budget for this category already exists
     existing = db.query(Budget).filter(Budget.category == budget.category).first()
@@ -28,15 +30,16 @@ def create_budget(budget: BudgetCreate, db: Session = Depends(get_db)):
     return db_budget
 
 
-@router.get("/", response_model=list[BudgetResponse])
+@router.get("/", response_model=list[BudgetResponse], dependencies=[Depends(conditional_get)])
 def get_budgets(db: Session = Depends(get_db)):
     return db.query(Budget).order_by(Budget.category).all()
 
 
-@router.get("/status", response_model=list[BudgetStatus])
+@router.get("/status", response_model=list[BudgetStatus], dependencies=[Depends(conditional_get)])
+@cached_response("budgets.status")
 def get_budgets_status(
-    year: int = None,
-    month: int = None,
+    year: int = Query(None, ge=MIN_YEAR, le=MAX_YEAR),
+    month: int = Query(None, ge=1, le=12),
     db: Session = Depends(get_db),
 ):
     """Get all budgets with current spending status"""
@@ -44,32 +47,7 @@ def get_budgets_status(
     year = year or today.year
     month = month or today.month
 
-    budgets = db.query(Budget).all()
-    result = []
-
-    for budget in budgets:
-        # Calculate spent amount for this category in the given month
-        spent = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.category == budget.category,
-            extract('year', Transaction.date) == year,
-            extract('month', Transaction.date) == month,
-        ).scalar() or 0
-
-        remaining = budget.monthly_limit - spent
-        percentage = (spent / budget.monthly_limit * 100) if budget.monthly_limit > 0 else 0
-
-        result.append(BudgetStatus(
-            id=budget.id,
-            category=budget.category,
-            monthly_limit=budget.monthly_limit,
-            spent=spent,
-            remaining=remaining,
-            percentage=round(percentage, 1),
-            is_over_threshold=percentage >= budget.alert_threshold * 100,
-            alert_threshold=budget.alert_threshold,
-        ))
-
-    return result
+    return get_budget_statuses(db, year, month)
 
 
 @router.get("/{budget_id}", response_model=BudgetResponse)
@@ -80,7 +58,7 @@ def get_budget(budget_id: int, db: Session = Depends(get_db)):
     return budget
 
 
-@router.put("/{budget_id}", response_model=BudgetResponse)
+@router.put("/{budget_id}", response_model=BudgetResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def update_budget(
     budget_id: int,
     budget: BudgetUpdate,
@@ -99,7 +77,7 @@ def update_budget(
     return db_budget
 
 
-@router.delete("/{budget_id}")
+@router.delete("/{budget_id}", dependencies=[Depends(invalidate_cache_on_write)])
 def delete_budget(budget_id: int, db: Session = Depends(get_db)):
     db_budget = db.query(Budget).filter(Budget.id == budget_id).first()
     if not db_budget:
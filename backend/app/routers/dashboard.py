@@ -1,15 +1,19 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import func, case
 from datetime import date, timedelta
 from app.database import get_db
-from app.models import Transaction, Budget, SavingsGoal, UserSettings
-from app.schemas import DashboardSummary, DashboardWidgets, BudgetStatus, MonthlySavingsStatus
+from app.models import TransactionDailyRollup as Rollup, SavingsGoal, UserSettings
+from app.schemas import DashboardSummary, DashboardWidgets, MonthlySavingsStatus
+from app.services.budget_status import get_budget_statuses
+from app.services.periods import in_period, month_range
+from app.services.cache import cached_response
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
 
 @router.get("/summary", response_model=DashboardSummary)
+@cached_response("dashboard.summary")
 def get_dashboard_summary(db: Session = Depends(get_db)):
     today = date.today()
     week_ago = today - timedelta(days=7)
@@ -22,32 +26,28 @@ def get_dashboard_summary(db: Session = Depends(get_db)):
         last_month_start = month_start.replace(month=month_start.month - 1)
     last_month_end = month_start - timedelta(days=1)
 
-    # Today's spending (only expenses)
-    today_total = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.date == today,
-        Transaction.transaction_type == 'expense'
-    ).scalar() or 0
-
-    # Week's spending (only expenses)
-    week_total = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.date >= week_ago,
-        Transaction.date <= today,
-        Transaction.transaction_type == 'expense'
-    ).scalar() or 0
-
-    # Month's spending (only expenses)
-    month_total = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.date >= month_start,
-        Transaction.date <= today,
-        Transaction.transaction_type == 'expense'
-    ).scalar() or 0
-
-    # Last month's spending (only expenses)
-    last_month_total = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.date >= last_month_start,
-        Transaction.date <= last_month_end,
-        Transaction.transaction_type == 'expense'
-    ).scalar() or 0
+    # One scan of the daily rollups over last_month_start..today: per-category
+    # sums for every period (only expenses). Totals are summed in Python.
+    def period_sum(condition, column=Rollup.total):
+        return func.sum(case((condition, column), else_=0))
+
+    rows = db.query(
+        Rollup.category,
+        period_sum(Rollup.date == today).label('today'),
+        period_sum(Rollup.date >= week_ago).label('week'),
+        period_sum(Rollup.date >= month_start).label('month'),
+        period_sum(Rollup.date >= month_start, Rollup.count).label('month_count'),
+        period_sum(Rollup.date <= last_month_end).label('last_month'),
+    ).filter(
+        Rollup.date >= last_month_start,
+        Rollup.date <= today,
+        Rollup.transaction_type == 'expense'
+    ).group_by(Rollup.category).all()
+
+    today_total = sum(row.today for row in rows)
+    week_total = sum(row.week for row in rows)
+    month_total = sum(row.month for row in rows)
+    last_month_total = sum(row.last_month for row in rows)
 
     # Month change percentage
     if last_month_total > 0:
@@ -60,19 +60,15 @@ def get_dashboard_summary(db: Session = Depends(get_db)):
         change_percent = 0
 
     # Top categories for this month (only expenses)
-    top_categories_query = db.query(
-        Transaction.category,
-        func.sum(Transaction.amount).label('total')
-    ).filter(
-        Transaction.date >= month_start,
-        Transaction.date <= today,
-        Transaction.category.isnot(None),
-        Transaction.transaction_type == 'expense'
-    ).group_by(Transaction.category).order_by(func.sum(Transaction.amount).desc()).limit(5).all()
+    top_rows = sorted(
+        (row for row in rows if row.category is not None and row.month_count),
+        key=lambda row: row.month,
+        reverse=True,
+    )[:5]
 
     top_categories = [
-        {"category": cat or "Без категории", "amount": total}
-        for cat, total in top_categories_query
+        {"category": row.category or "Без категории", "amount": row.month}
+        for row in top_rows
     ]
 
     return DashboardSummary(
@@ -86,36 +82,15 @@ def get_dashboard_summary(db: Session = Depends(get_db)):
 
 
 @router.get("/widgets", response_model=DashboardWidgets)
+@cached_response("dashboard.widgets")
 def get_dashboard_widgets(db: Session = Depends(get_db)):
     today = date.today()
     year = today.year
     month = today.month
+    current_month = month_range(year, month)
 
     # Budget statuses
-    budgets = db.query(Budget).all()
-    budget_statuses = []
-
-    for budget in budgets:
-        spent = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.category == budget.category,
-            Transaction.transaction_type == 'expense',
-            extract('year', Transaction.date) == year,
-            extract('month', Transaction.date) == month,
-        ).scalar() or 0
-
-        remaining = budget.monthly_limit - spent
-        percentage = (spent / budget.monthly_limit * 100) if budget.monthly_limit > 0 else 0
-
-        budget_statuses.append(BudgetStatus(
-            id=budget.id,
-            category=budget.category,
-            monthly_limit=budget.monthly_limit,
-            spent=spent,
-            remaining=remaining,
-            percentage=round(percentage, 1),
-            is_over_threshold=percentage >= budget.alert_threshold * 100,
-            alert_threshold=budget.alert_threshold,
-        ))
+    budget_statuses = get_budget_statuses(db, year, month)
 
     # Active savings goals
     goals = db.query(SavingsGoal).filter(
@@ -127,21 +102,17 @@ def get_dashboard_widgets(db: Session = Depends(get_db)):
     savings_status = None
 
     if settings:
-        # Calculate actual income from transactions
-        income_from_transactions = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.transaction_type == 'income',
-            extract('year', Transaction.date) == year,
-            extract('month', Transaction.date) == month,
-        ).scalar() or 0
+        # Calculate actual income and expenses from the daily rollups
+        totals = dict(db.query(
+            Rollup.transaction_type,
+            func.sum(Rollup.total),
+        ).filter(
+            in_period(Rollup.date, current_month),
+        ).group_by(Rollup.transaction_type).all())
 
         # Use actual income or settings income
-        actual_income = income_from_transactions or (settings.monthly_income or 0)
-
-        expenses = db.query(func.sum(Transaction.amount)).filter(
-            Transaction.transaction_type == 'expense',
-            extract('year', Transaction.date) == year,
-            extract('month', Transaction.date) == month,
-        ).scalar() or 0
+        actual_income = totals.get('income') or (settings.monthly_income or 0)
+        expenses = totals.get('expense') or 0
 
         savings = actual_income - expenses
         savings_goal = settings.monthly_savings_goal or 0
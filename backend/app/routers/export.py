@@ -1,17 +1,34 @@
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import StreamingResponse
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 from datetime import date
 from typing import Optional
-from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
 
 from app.database import get_db
-from app.models import Transaction
+from app.schemas import ExportJobCreate, ExportJobResponse
+from app.services.export import (
+    CSV_MEDIA_TYPE,
+    EXCEL_MEDIA_TYPE,
+    EXPORT_FORMATS,
+    PARQUET_MEDIA_TYPE,
+    create_temp_file,
+    export_filename,
+    iter_csv,
+    iter_export_rows,
+    parquet_available,
+    query_export_rows,
+    write_excel,
+    write_parquet,
+)
+from app.services.export_jobs import ExportJob, export_jobs
 
 router = APIRouter(prefix="/api/export", tags=["export"])
 
+TRANSACTION_TYPE_QUERY = Query(None, pattern="^(income|expense)$", description="Тип: income или expense")
+
 
 @router.get("/excel")
 def export_to_excel(
@@ -20,73 +37,146 @@ def export_to_excel(
     category: Optional[str] = Query(None),
     db: Session = Depends(get_db),
 ):
-    """Экспорт транзакций в Excel файл."""
-
-    query = db.query(Transaction)
-
-    if date_from:
-        query = query.filter(Transaction.date >= date_from)
-    if date_to:
-        query = query.filter(Transaction.date <= date_to)
-    if category:
-        query = query.filter(Transaction.category == category)
-
-    transactions = query.order_by(Transaction.date.desc()).all()
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Транзакции"
-
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_alignment = Alignment(horizontal="center", vertical="center")
-    thin_border = Border(
-        left=Side(style="thin"),
-        right=Side(style="thin"),
-        top=Side(style="thin"),
-        bottom=Side(style="thin"),
+    """Экспорт транзакций в Excel файл.
+
+    Книга пишется в режиме write-only во временный файл, который отдаётся
+    частями и удаляется после отправки.
+    """
+    query = query_export_rows(db, date_from=date_from, date_to=date_to, category=category)
+
+    path = create_temp_file(".xlsx")
+    try:
+        write_excel(iter_export_rows(query), path)
+    except Exception:
+        os.unlink(path)
+        raise
+
+    return FileResponse(
+        path,
+        media_type=EXCEL_MEDIA_TYPE,
+        filename=export_filename("xlsx", date_from, date_to),
+        background=BackgroundTask(os.unlink, path),
     )
 
-    headers = ["Дата", "Описание", "Категория", "Сумма (₽)"]
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = thin_border
-
-    for row, t in enumerate(transactions, 2):
-        ws.cell(row=row, column=1, value=t.date.strftime("%d.%m.%Y")).border = thin_border
-        ws.cell(row=row, column=2, value=t.description).border = thin_border
-        ws.cell(row=row, column=3, value=t.category or "—").border = thin_border
-        amount_cell = ws.cell(row=row, column=4, value=t.amount)
-        amount_cell.border = thin_border
-        amount_cell.number_format = '#,##0.00'
-
-    total_row = len(transactions) + 2
-    ws.cell(row=total_row, column=3, value="Итого:").font = Font(bold=True)
-    total_cell = ws.cell(row=total_row, column=4, value=sum(t.amount for t in transactions))
-    total_cell.font = Font(bold=True)
-    total_cell.number_format = '#,##0.00'
-
-    ws.column_dimensions["A"].width = 12
-    ws.column_dimensions["B"].width = 30
-    ws.column_dimensions["C"].width = 18
-    ws.column_dimensions["D"].width = 15
-
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    filename = "transactions"
-    if date_from:
-        filename += f"_from_{date_from}"
-    if date_to:
-        filename += f"_to_{date_to}"
-    filename += ".xlsx"
+
+@router.get("/csv")
+def export_to_csv(
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    category: Optional[str] = Query(None),
+    account_id: Optional[int] = Query(None),
+    transaction_type: Optional[str] = TRANSACTION_TYPE_QUERY,
+    db: Session = Depends(get_db),
+):
+    """Экспорт транзакций в CSV, строки отправляются по мере чтения из базы."""
+    query = query_export_rows(
+        db,
+        date_from=date_from,
+        date_to=date_to,
+        category=category,
+        account_id=account_id,
+        transaction_type=transaction_type,
+    )
+
+    def content():
+        # Ответ читается уже после выхода из эндпоинта, поэтому сессию
+        # закрывает сам генератор
+        try:
+            yield from iter_csv(iter_export_rows(query))
+        finally:
+            db.close()
 
     return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        content(),
+        media_type=CSV_MEDIA_TYPE,
+        headers={"Content-Disposition": f"attachment; filename={export_filename('csv', date_from, date_to)}"},
     )
+
+
+@router.get("/parquet")
+def export_to_parquet(
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    category: Optional[str] = Query(None),
+    account_id: Optional[int] = Query(None),
+    transaction_type: Optional[str] = TRANSACTION_TYPE_QUERY,
+    db: Session = Depends(get_db),
+):
+    """Экспорт транзакций в Parquet (группами строк, через pyarrow)."""
+    if not parquet_available():
+        raise HTTPException(status_code=501, detail="Экспорт в Parquet недоступен: не установлен pyarrow")
+
+    query = query_export_rows(
+        db,
+        date_from=date_from,
+        date_to=date_to,
+        category=category,
+        account_id=account_id,
+        transaction_type=transaction_type,
+    )
+
+    path = create_temp_file(".parquet")
+    try:
+        write_parquet(iter_export_rows(query), path)
+    except Exception:
+        os.unlink(path)
+        raise
+
+    return FileResponse(
+        path,
+        media_type=PARQUET_MEDIA_TYPE,
+        filename=export_filename("parquet", date_from, date_to),
+        background=BackgroundTask(os.unlink, path),
+    )
+
+
+def job_response(job: ExportJob) -> ExportJobResponse:
+    return ExportJobResponse(
+        id=job.id,
+        format=job.format,
+        status=job.status,
+        rows_total=job.rows_total,
+        rows_done=job.rows_done,
+        progress=round(job.progress, 3),
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        download_url=f"/api/export/jobs/{job.id}/download" if job.status == "done" else None,
+    )
+
+
+def get_job_or_404(job_id: str) -> ExportJob:
+    job = export_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Задача выгрузки не найдена")
+    return job
+
+
+@router.post("/jobs", response_model=ExportJobResponse, status_code=202)
+def create_export_job(job: ExportJobCreate, db: Session = Depends(get_db)):
+    """Запускает выгрузку в фоне. Прогресс — GET /jobs/{id}, файл — GET /jobs/{id}/download."""
+    if job.format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Экспорт в Parquet недоступен: не установлен pyarrow")
+
+    filters = job.model_dump(exclude={"format"})
+    if job.transaction_type:
+        filters["transaction_type"] = job.transaction_type.value
+    created = export_jobs.submit(db.get_bind(), job.format.value, filters)
+    return job_response(created)
+
+
+@router.get("/jobs/{job_id}", response_model=ExportJobResponse)
+def get_export_job(job_id: str):
+    return job_response(get_job_or_404(job_id))
+
+
+@router.get("/jobs/{job_id}/download")
+def download_export_job(job_id: str):
+    job = get_job_or_404(job_id)
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Выгрузка завершилась с ошибкой: {job.error}")
+    if job.status != "done" or not job.path or not job.path.exists():
+        raise HTTPException(status_code=409, detail="Выгрузка ещё не готова")
+
+    _, media_type, _ = EXPORT_FORMATS[job.format]
+    return FileResponse(job.path, media_type=media_type, filename=job.filename)
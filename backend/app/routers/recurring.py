@@ -4,12 +4,15 @@ from datetime import date, timedelta
 from dateutil.relativedelta import relativedelta
 from app.database import get_db
 from app.models import RecurringPayment, Transaction
+from app.services.duplicates import fingerprint_of
+from app.services.rollups import add_to_rollups
 from app.schemas import (
     RecurringPaymentCreate,
     RecurringPaymentUpdate,
     RecurringPaymentResponse,
     TransactionResponse,
 )
+from app.services.cache import invalidate_cache_on_write
 
 router = APIRouter(prefix="/api/recurring", tags=["recurring"])
 
@@ -33,7 +36,7 @@ def calculate_next_date(current_date: date, frequency: str, day_of_month: int =
     return current_date + timedelta(days=30)
 
 
-@router.post("/", response_model=RecurringPaymentResponse)
+@router.post("/", response_model=RecurringPaymentResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def create_recurring_payment(payment: RecurringPaymentCreate, db: Session = Depends(get_db)):
     db_payment = RecurringPayment(**payment.model_dump())
     db.add(db_payment)
@@ -61,7 +64,7 @@ def get_recurring_payment(payment_id: int, db: Session = Depends(get_db)):
     return payment
 
 
-@router.put("/{payment_id}", response_model=RecurringPaymentResponse)
+@router.put("/{payment_id}", response_model=RecurringPaymentResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def update_recurring_payment(
     payment_id: int,
     payment: RecurringPaymentUpdate,
@@ -80,7 +83,7 @@ def update_recurring_payment(
     return db_payment
 
 
-@router.delete("/{payment_id}")
+@router.delete("/{payment_id}", dependencies=[Depends(invalidate_cache_on_write)])
 def delete_recurring_payment(payment_id: int, db: Session = Depends(get_db)):
     db_payment = db.query(RecurringPayment).filter(RecurringPayment.id == payment_id).first()
     if not db_payment:
@@ -91,7 +94,7 @@ def delete_recurring_payment(payment_id: int, db: Session = Depends(get_db)):
     return {"message": "Повторяющийся платёж удалён"}
 
 
-@router.post("/{payment_id}/execute")
+@router.post("/{payment_id}/execute", dependencies=[Depends(invalidate_cache_on_write)])
 def execute_recurring_payment(payment_id: int, db: Session = Depends(get_db)):
     """Execute a recurring payment - create a transaction and update next_date"""
     db_payment = db.query(RecurringPayment).filter(RecurringPayment.id == payment_id).first()
@@ -108,7 +111,9 @@ def execute_recurring_payment(payment_id: int, db: Session = Depends(get_db)):
         category=db_payment.category,
         date=date.today(),
     )
+    transaction.fingerprint = fingerprint_of(transaction)
     db.add(transaction)
+    add_to_rollups(db, [transaction])
 
     # Update next date
     db_payment.next_date = calculate_next_date(
@@ -128,7 +133,7 @@ def execute_recurring_payment(payment_id: int, db: Session = Depends(get_db)):
     }
 
 
-@router.post("/from-transaction/{transaction_id}", response_model=RecurringPaymentResponse)
+@router.post("/from-transaction/{transaction_id}", response_model=RecurringPaymentResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def create_from_transaction(
     transaction_id: int,
     frequency: str = "monthly",
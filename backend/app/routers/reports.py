@@ -1,31 +1,66 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, extract
 from datetime import date
 from typing import Optional
 from collections import defaultdict
 from app.database import get_db
-from app.models import Transaction
+from app.models import TransactionDailyRollup
 from app.schemas import MonthlyReport
+from app.services.periods import MAX_YEAR, MIN_YEAR, in_period, years_range
+from app.services.cache import cached_response, conditional_get
 
 router = APIRouter(prefix="/api/reports", tags=["reports"])
 
 
-@router.get("/monthly", response_model=list[MonthlyReport])
+MAX_REPORT_YEARS = 50
+
+
+@router.get("/monthly", response_model=list[MonthlyReport], dependencies=[Depends(conditional_get)])
+@cached_response("reports.monthly")
 def get_monthly_report(
-    year: Optional[int] = Query(None, description="Год для отчёта"),
+    year: Optional[int] = Query(None, ge=MIN_YEAR, le=MAX_YEAR, description="Год для отчёта"),
+    year_from: Optional[int] = Query(None, ge=MIN_YEAR, le=MAX_YEAR, description="Первый год многолетнего отчёта"),
+    year_to: Optional[int] = Query(None, ge=MIN_YEAR, le=MAX_YEAR, description="Последний год многолетнего отчёта (включительно)"),
     db: Session = Depends(get_db),
 ):
-    if year is None:
-        year = date.today().year
+    """Помесячный отчёт за год или за диапазон лет year_from..year_to.
+
+    Суммы считаются в базе (GROUP BY год, месяц, тип, категория), в память
+    попадают только итоги — O(месяцев × категорий), а не O(транзакций).
+    """
+    if year_from is not None or year_to is not None:
+        year_from = year_from if year_from is not None else year_to
+        year_to = year_to if year_to is not None else year_from
+        if year_from > year_to:
+            raise HTTPException(status_code=400, detail="year_from не может быть больше year_to")
+        if year_to - year_from >= MAX_REPORT_YEARS:
+            raise HTTPException(status_code=400, detail=f"Диапазон не может превышать {MAX_REPORT_YEARS} лет")
+    else:
+        year_from = year_to = year if year is not None else date.today().year
 
-    transactions = (
-        db.query(Transaction)
-        .filter(extract("year", Transaction.date) == year)
+    year_column = extract("year", TransactionDailyRollup.date)
+    month_column = extract("month", TransactionDailyRollup.date)
+    rows = (
+        db.query(
+            year_column.label("year"),
+            month_column.label("month"),
+            TransactionDailyRollup.transaction_type,
+            TransactionDailyRollup.category,
+            func.sum(TransactionDailyRollup.total).label("total"),
+            func.sum(TransactionDailyRollup.count).label("count"),
+        )
+        .filter(in_period(TransactionDailyRollup.date, years_range(year_from, year_to)))
+        .group_by(
+            year_column,
+            month_column,
+            TransactionDailyRollup.transaction_type,
+            TransactionDailyRollup.category,
+        )
         .all()
     )
 
-    monthly_data: dict[int, dict] = defaultdict(lambda: {
+    monthly_data: dict[tuple[int, int], dict] = defaultdict(lambda: {
         "total": 0,
         "count": 0,
         "by_category": defaultdict(float),
@@ -34,18 +69,18 @@ def get_monthly_report(
         "income_by_category": defaultdict(float)
     })
 
-    for t in transactions:
-        month = t.date.month
-        category = t.category or "Без категории"
+    for row in rows:
+        data = monthly_data[(int(row.year), int(row.month))]
+        category = row.category or "Без категории"
 
-        if t.transaction_type == 'income':
-            monthly_data[month]["income"] += t.amount
-            monthly_data[month]["income_count"] += 1
-            monthly_data[month]["income_by_category"][category] += t.amount
+        if row.transaction_type == 'income':
+            data["income"] += row.total
+            data["income_count"] += row.count
+            data["income_by_category"][category] += row.total
         else:  # expense
-            monthly_data[month]["total"] += t.amount
-            monthly_data[month]["count"] += 1
-            monthly_data[month]["by_category"][category] += t.amount
+            data["total"] += row.total
+            data["count"] += row.count
+            data["by_category"][category] += row.total
 
     month_names = [
         "", "Январь", "Февраль", "Март", "Апрель", "Май", "Июнь",
@@ -53,16 +88,17 @@ def get_monthly_report(
     ]
 
     result = []
-    for month in range(1, 13):
-        data = monthly_data[month]
-        result.append(MonthlyReport(
-            month=f"{month_names[month]} {year}",
-            total=round(data["total"], 2),
-            count=data["count"],
-            by_category=dict(data["by_category"]),
-            income=round(data["income"], 2),
-            income_count=data["income_count"],
-            income_by_category=dict(data["income_by_category"]),
-        ))
+    for report_year in range(year_from, year_to + 1):
+        for month in range(1, 13):
+            data = monthly_data[(report_year, month)]
+            result.append(MonthlyReport(
+                month=f"{month_names[month]} {report_year}",
+                total=round(data["total"], 2),
+                count=data["count"],
+                by_category=dict(data["by_category"]),
+                income=round(data["income"], 2),
+                income_count=data["income_count"],
+                income_by_category=dict(data["income_by_category"]),
+            ))
 
     return result
@@ -1,20 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import func
 from datetime import date
 from app.database import get_db
-from app.models import SavingsGoal, UserSettings, Transaction
+from app.models import SavingsGoal, UserSettings, TransactionDailyRollup
 from app.schemas import (
     SavingsGoalCreate,
     SavingsGoalUpdate,
     SavingsGoalResponse,
     MonthlySavingsStatus,
 )
+from app.services.periods import MAX_YEAR, MIN_YEAR, in_period, month_range
+from app.services.cache import invalidate_cache_on_write
 
 router = APIRouter(prefix="/api/savings", tags=["savings"])
 
 
-@router.post("/goals", response_model=SavingsGoalResponse)
+@router.post("/goals", response_model=SavingsGoalResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def create_goal(goal: SavingsGoalCreate, db: Session = Depends(get_db)):
     db_goal = SavingsGoal(**goal.model_dump())
 
@@ -47,7 +49,7 @@ def get_goal(goal_id: int, db: Session = Depends(get_db)):
     return goal
 
 
-@router.put("/goals/{goal_id}", response_model=SavingsGoalResponse)
+@router.put("/goals/{goal_id}", response_model=SavingsGoalResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def update_goal(
     goal_id: int,
     goal: SavingsGoalUpdate,
@@ -70,7 +72,7 @@ def update_goal(
     return db_goal
 
 
-@router.post("/goals/{goal_id}/add", response_model=SavingsGoalResponse)
+@router.post("/goals/{goal_id}/add", response_model=SavingsGoalResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def add_to_goal(
     goal_id: int,
     amount: float = Query(..., gt=0),
@@ -92,7 +94,7 @@ def add_to_goal(
     return db_goal
 
 
-@router.post("/goals/{goal_id}/subtract", response_model=SavingsGoalResponse)
+@router.post("/goals/{goal_id}/subtract", response_model=SavingsGoalResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def subtract_from_goal(
     goal_id: int,
     amount: float = Query(..., gt=0),
@@ -120,7 +122,7 @@ def subtract_from_goal(
     return db_goal
 
 
-@router.delete("/goals/{goal_id}")
+@router.delete("/goals/{goal_id}", dependencies=[Depends(invalidate_cache_on_write)])
 def delete_goal(goal_id: int, db: Session = Depends(get_db)):
     db_goal = db.query(SavingsGoal).filter(SavingsGoal.id == goal_id).first()
     if not db_goal:
@@ -133,8 +135,8 @@ def delete_goal(goal_id: int, db: Session = Depends(get_db)):
 
 @router.get("/monthly-status", response_model=MonthlySavingsStatus)
 def get_monthly_status(
-    year: int = None,
-    month: int = None,
+    year: int = Query(None, ge=MIN_YEAR, le=MAX_YEAR),
+    month: int = Query(None, ge=1, le=12),
     db: Session = Depends(get_db),
 ):
     """Get savings status for the current or specified month"""
@@ -148,9 +150,8 @@ def get_monthly_status(
     savings_goal = settings.monthly_savings_goal if settings else 0
 
     # Calculate expenses for the month
-    expenses = db.query(func.sum(Transaction.amount)).filter(
-        extract('year', Transaction.date) == year,
-        extract('month', Transaction.date) == month,
+    expenses = db.query(func.sum(TransactionDailyRollup.total)).filter(
+        in_period(TransactionDailyRollup.date, month_range(year, month)),
     ).scalar() or 0
 
     # Calculate savings
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models import UserSettings
 from app.schemas import UserSettingsUpdate, UserSettingsResponse
+from app.services.cache import invalidate_cache, invalidate_cache_on_write
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
@@ -15,6 +16,8 @@ def get_or_create_settings(db: Session) -> UserSettings:
         db.add(settings)
         db.commit()
         db.refresh(settings)
+        # Виджеты дашборда зависят от наличия настроек
+        invalidate_cache()
     return settings
 
 
@@ -23,7 +26,7 @@ def get_settings(db: Session = Depends(get_db)):
     return get_or_create_settings(db)
 
 
-@router.put("/", response_model=UserSettingsResponse)
+@router.put("/", response_model=UserSettingsResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def update_settings(settings: UserSettingsUpdate, db: Session = Depends(get_db)):
     db_settings = get_or_create_settings(db)
 
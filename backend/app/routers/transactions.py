@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import func, extract, insert
 from datetime import date
 from typing import Optional
 from app.database import get_db
@@ -9,20 +9,44 @@ from app.schemas import (
     TransactionCreate,
     TransactionUpdate,
     TransactionResponse,
+    TransactionBulkCreateResponse,
     MonthlyReport,
     CategoryEnum,
     BulkDeleteRequest,
 )
+from app.services.duplicates import (
+    find_exact_duplicates,
+    find_similar_transactions,
+    fingerprint_of,
+    transaction_fingerprint,
+)
+from app.services.rollups import (
+    add_to_rollups,
+    apply_rollup_deltas,
+    remove_from_rollups,
+    transaction_deltas,
+)
+from app.services.search import description_filter, search_transactions
+from app.services.pagination import CURSOR_SORT_COLUMNS, InvalidCursorError, apply_keyset, encode_cursor
 from app.logging_config import get_logger
+from app.services.cache import conditional_get, invalidate_cache_on_write
 
 router = APIRouter(prefix="/api/transactions", tags=["transactions"])
 logger = get_logger(__name__)
 
 
-@router.post("/", response_model=TransactionResponse)
+ON_CONFLICT_QUERY = Query(
+    None,
+    pattern="^skip$",
+    description="skip — не создавать транзакции, точно совпадающие с уже сохранёнными",
+)
+
+
+@router.post("/", response_model=TransactionResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def create_transaction(
     transaction: TransactionCreate,
     account_id: Optional[int] = Query(None, description="ID счёта"),
+    on_conflict: Optional[str] = ON_CONFLICT_QUERY,
     db: Session = Depends(get_db),
 ):
     logger.info(f"Creating transaction", extra={
@@ -32,6 +56,15 @@ def create_transaction(
         "account_id": account_id,
     })
     data = transaction.model_dump()
+    data['fingerprint'] = transaction_fingerprint(
+        transaction.date, transaction.amount, transaction.transaction_type, account_id, transaction.description
+    )
+    if on_conflict == "skip":
+        existing = db.query(Transaction).filter(Transaction.fingerprint == data['fingerprint']).first()
+        if existing:
+            logger.info(f"Transaction already exists, skipped", extra={"transaction_id": existing.id})
+            return existing
+
     if account_id:
         data['account_id'] = account_id
         # Update account balance
@@ -45,14 +78,85 @@ def create_transaction(
 
     db_transaction = Transaction(**data)
     db.add(db_transaction)
+    add_to_rollups(db, [db_transaction])
     db.commit()
     db.refresh(db_transaction)
     logger.info(f"Transaction created successfully", extra={"transaction_id": db_transaction.id})
     return db_transaction
 
 
-@router.get("/", response_model=list[TransactionResponse])
+@router.post("/bulk", response_model=TransactionBulkCreateResponse, dependencies=[Depends(invalidate_cache_on_write)])
+def create_transactions_bulk(
+    transactions: list[TransactionCreate],
+    account_id: Optional[int] = Query(None, description="ID счёта для всех транзакций"),
+    on_conflict: Optional[str] = ON_CONFLICT_QUERY,
+    db: Session = Depends(get_db),
+):
+    """Массовое создание транзакций (например, после распознавания выписки).
+
+    Все строки вставляются одним пакетным INSERT, баланс счёта меняется
+    одной суммарной корректировкой, фиксация — одним коммитом.
+    С on_conflict=skip транзакции, уже сохранённые ранее (совпадает отпечаток),
+    пропускаются — повторный импорт той же выписки ничего не дублирует.
+    Одинаковые строки внутри одного запроса сохраняются: две одинаковые
+    покупки за день — обычное дело.
+    """
+    logger.info(f"Bulk creating {len(transactions)} transactions", extra={"account_id": account_id})
+    fingerprints = [
+        transaction_fingerprint(t.date, t.amount, t.transaction_type, account_id, t.description)
+        for t in transactions
+    ]
+    existing = find_exact_duplicates(db, fingerprints) if on_conflict == "skip" else {}
+
+    rows = []
+    balance_deltas: dict[int, float] = {}
+    for transaction, fingerprint in zip(transactions, fingerprints):
+        if fingerprint in existing:
+            continue
+        data = transaction.model_dump()
+        data['fingerprint'] = fingerprint
+        if account_id:
+            data['account_id'] = account_id
+            balance_deltas[account_id] = balance_deltas.get(account_id, 0) + _balance_delta(
+                transaction.transaction_type, transaction.amount
+            )
+        rows.append(data)
+
+    skipped_count = len(transactions) - len(rows)
+    if not rows:
+        return TransactionBulkCreateResponse(created_count=0, skipped_count=skipped_count, transactions=[])
+
+    created = db.scalars(insert(Transaction).returning(Transaction, sort_by_parameter_order=True), rows).all()
+    _apply_balance_deltas(db, balance_deltas)
+    add_to_rollups(db, created)
+    db.commit()
+
+    logger.info(f"Bulk created {len(created)} transactions", extra={
+        "account_id": account_id,
+        "skipped_count": skipped_count,
+    })
+    return TransactionBulkCreateResponse(
+        created_count=len(created), skipped_count=skipped_count, transactions=created
+    )
+
+
+def _balance_delta(transaction_type: str, amount: float) -> float:
+    """Income increases balance, expense decreases it"""
+    return amount if transaction_type == 'income' else -amount
+
+
+def _apply_balance_deltas(db: Session, balance_deltas: dict[int, float]) -> None:
+    """Применяет суммарные изменения балансов одним UPDATE на счёт"""
+    for account_id, delta in balance_deltas.items():
+        if delta:
+            db.query(Account).filter(Account.id == account_id).update(
+                {Account.balance: Account.balance + delta}, synchronize_session=False
+            )
+
+
+@router.get("/", response_model=list[TransactionResponse], dependencies=[Depends(conditional_get)])
 def get_transactions(
+    response: Response,
     date_from: Optional[date] = Query(None, description="Начальная дата фильтра"),
     date_to: Optional[date] = Query(None, description="Конечная дата фильтра"),
     category: Optional[str] = Query(None, description="Фильтр по категории"),
@@ -60,10 +164,17 @@ def get_transactions(
     account_id: Optional[int] = Query(None, description="Фильтр по счёту"),
     sort_by: Optional[str] = Query("date", description="Поле для сортировки: date, amount, description"),
     sort_order: Optional[str] = Query("desc", description="Порядок сортировки: asc, desc"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы (из заголовка X-Next-Cursor)"),
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1),
     db: Session = Depends(get_db),
 ):
+    """Список транзакций с фильтрами.
+
+    Если передан cursor, страница выбирается по ключу (поле сортировки, id)
+    и skip игнорируется. Курсор следующей страницы возвращается в заголовке
+    X-Next-Cursor, пока есть ещё строки.
+    """
     query = db.query(Transaction)
 
     if date_from:
@@ -73,18 +184,30 @@ def get_transactions(
     if category:
         query = query.filter(Transaction.category == category)
     if search:
-        query = query.filter(Transaction.description.ilike(f"%{search}%"))
+        query = query.filter(description_filter(search))
     if account_id:
         query = query.filter(Transaction.account_id == account_id)
 
     # Sorting
-    sort_column = getattr(Transaction, sort_by, Transaction.date)
-    if sort_order == "asc":
-        query = query.order_by(sort_column.asc())
-    else:
-        query = query.order_by(sort_column.desc())
+    if sort_by not in CURSOR_SORT_COLUMNS:
+        sort_by = "date"
+    if sort_order != "asc":
+        sort_order = "desc"
+    try:
+        query = apply_keyset(query, sort_by, sort_order, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not cursor:
+        query = query.offset(skip)
+
+    # Берём на одну строку больше, чтобы понять, есть ли следующая страница
+    transactions = query.limit(limit + 1).all()
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(sort_by, sort_order, transactions[-1])
 
-    return query.offset(skip).limit(limit).all()
+    return transactions
 
 
 @router.get("/categories")
@@ -92,6 +215,19 @@ def get_categories():
     return [{"value": e.name, "label": e.value} for e in CategoryEnum]
 
 
+@router.get("/search", response_model=list[TransactionResponse])
+def search_by_description(
+    q: str = Query(..., min_length=1, description="Строка поиска по описанию"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Поиск транзакций по описанию с ранжированием по похожести.
+
+    На PostgreSQL использует триграммный индекс, поэтому подходит для автодополнения.
+    """
+    return search_transactions(db, q, limit)
+
+
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 def get_transaction(transaction_id: int, db: Session = Depends(get_db)):
     transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
@@ -100,7 +236,7 @@ def get_transaction(transaction_id: int, db: Session = Depends(get_db)):
     return transaction
 
 
-@router.put("/{transaction_id}", response_model=TransactionResponse)
+@router.put("/{transaction_id}", response_model=TransactionResponse, dependencies=[Depends(invalidate_cache_on_write)])
 def update_transaction(
     transaction_id: int, transaction: TransactionUpdate, db: Session = Depends(get_db)
 ):
@@ -114,8 +250,11 @@ def update_transaction(
 
     update_data = transaction.model_dump(exclude_unset=True)
     logger.info(f"Update data parsed", extra={"fields": list(update_data.keys()), "date": str(update_data.get('date'))})
+    removed = transaction_deltas([db_transaction], sign=-1)
     for field, value in update_data.items():
         setattr(db_transaction, field, value)
+    db_transaction.fingerprint = fingerprint_of(db_transaction)
+    apply_rollup_deltas(db, removed, transaction_deltas([db_transaction]))
 
     db.commit()
     db.refresh(db_transaction)
@@ -123,13 +262,14 @@ def update_transaction(
     return db_transaction
 
 
-@router.delete("/{transaction_id}")
+@router.delete("/{transaction_id}", dependencies=[Depends(invalidate_cache_on_write)])
 def delete_transaction(transaction_id: int, db: Session = Depends(get_db)):
     db_transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Транзакция не найдена")
 
     db.delete(db_transaction)
+    remove_from_rollups(db, [db_transaction])
     db.commit()
     return {"message": "Транзакция удалена"}
 
@@ -137,32 +277,40 @@ def delete_transaction(transaction_id: int, db: Session = Depends(get_db)):
 @router.post("/check-duplicates")
 def check_duplicates(
     transactions: list[TransactionCreate],
+    account_id: Optional[int] = Query(None, description="ID счёта, на который будут сохранены транзакции"),
     db: Session = Depends(get_db),
 ):
     """Проверяет список транзакций на наличие дубликатов в базе данных.
 
     Возвращает список с индексами дубликатов и информацией о похожих транзакциях.
-    Дубликаты определяются по: дате, сумме и описанию (с допуском ±1 день и ±0.01 ₽)
+    Сначала ищутся точные повторы по отпечатку (exact_match=true), остальные
+    транзакции проверяются нечётко: по дате, сумме и описанию
+    (с допуском ±1 день и ±0.01 ₽)
     """
     logger.info(f"Checking {len(transactions)} transactions for duplicates")
 
-    duplicates = []
+    fingerprints = [
+        transaction_fingerprint(t.date, t.amount, t.transaction_type, account_id, t.description)
+        for t in transactions
+    ]
+    exact = find_exact_duplicates(db, fingerprints)
 
-    for idx, transaction in enumerate(transactions):
-        # Проверяем транзакции с такой же датой (±1 день), суммой (±0.01) и похожим описанием
-        similar_transactions = db.query(Transaction).filter(
-            Transaction.date >= transaction.date.replace(day=max(1, transaction.date.day - 1)),
-            Transaction.date <= transaction.date.replace(day=min(31, transaction.date.day + 1)),
-            Transaction.amount >= transaction.amount - 0.01,
-            Transaction.amount <= transaction.amount + 0.01,
-            Transaction.description.ilike(f"%{transaction.description}%"),
-            Transaction.transaction_type == transaction.transaction_type,
-        ).all()
+    # Нечёткая проверка только для транзакций без точного совпадения
+    fuzzy_indexes = [idx for idx, fingerprint in enumerate(fingerprints) if fingerprint not in exact]
+    similar_by_index = dict(zip(
+        fuzzy_indexes,
+        find_similar_transactions(db, [transactions[idx] for idx in fuzzy_indexes]),
+    ))
 
+    duplicates = []
+    for idx, (transaction, fingerprint) in enumerate(zip(transactions, fingerprints)):
+        exact_match = fingerprint in exact
+        similar_transactions = exact[fingerprint] if exact_match else similar_by_index[idx]
         if similar_transactions:
             duplicates.append({
                 "index": idx,
                 "transaction": transaction.model_dump(),
+                "exact_match": exact_match,
                 "similar_count": len(similar_transactions),
                 "similar_transactions": [
                     {
@@ -184,7 +332,7 @@ def check_duplicates(
     }
 
 
-@router.post("/bulk-delete")
+@router.post("/bulk-delete", dependencies=[Depends(invalidate_cache_on_write)])
 def bulk_delete_transactions(
     request: BulkDeleteRequest,
     db: Session = Depends(get_db),
@@ -248,6 +396,7 @@ def bulk_delete_transactions(
 
     # Удаляем транзакции
     deleted_count = query.delete(synchronize_session=False)
+    remove_from_rollups(db, transactions_to_delete)
 
     # Пересчитываем балансы счетов
     for account_id, amounts in accounts_affected.items():
@@ -1,10 +1,16 @@
+import asyncio
 import os
 import uuid
 from typing import List
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query, Response
 from pathlib import Path
+from sqlalchemy.orm import Session
 from app.config import get_settings
-from app.services.ocr_service import parse_screenshot, parse_pdf
+from app.database import get_db
+from app.services.ocr_service import PdfChunksFailedError, parse_screenshot, parse_pdf, parse_cache_namespace
+from app.services.parse_cache import load_cached_result, save_result
+from app.services.offload import run_blocking
+from app.services.uploads import UploadTooLargeError, check_batch_size, save_upload
 from app.schemas import ParsedTransaction
 from app.logging_config import get_logger
 
@@ -12,8 +18,44 @@ router = APIRouter(prefix="/api", tags=["upload"])
 settings = get_settings()
 logger = get_logger(__name__)
 
+NO_CACHE_QUERY = Query(False, description="Распознать заново, не используя кэш результатов")
 
-async def process_uploaded_file(file: UploadFile) -> tuple[str, List[ParsedTransaction] | None, str | None]:
+# Номера нераспознанных частей длинной PDF-выписки и их общее число
+FAILED_CHUNKS_HEADER = "X-Parse-Failed-Chunks"
+TOTAL_CHUNKS_HEADER = "X-Parse-Total-Chunks"
+
+
+async def parse_file(
+    bind, hash_: str, file_path: Path, is_pdf: bool, use_cache: bool = True
+) -> List[ParsedTransaction]:
+    """Распознаёт сохранённый файл; повторная загрузка того же содержимого
+    берётся из кэша по SHA-256 без вызова модели.
+
+    Кэш читается и пишется в пуле потоков, каждый раз в своей сессии к bind.
+    """
+    namespace = parse_cache_namespace(is_pdf)
+
+    if namespace and use_cache:
+        cached = await run_blocking(load_cached_result, bind, hash_, *namespace)
+        if cached is not None:
+            logger.info(f"Parse cache hit", extra={"content_hash": hash_, "transaction_count": len(cached)})
+            # Копия уже распознанного файла не нужна
+            file_path.unlink(missing_ok=True)
+            return cached
+
+    if is_pdf:
+        parsed_transactions = await parse_pdf(str(file_path))
+    else:
+        parsed_transactions = await parse_screenshot(str(file_path))
+
+    if namespace:
+        await run_blocking(save_result, bind, hash_, *namespace, parsed_transactions)
+    return parsed_transactions
+
+
+async def process_uploaded_file(
+    file: UploadFile, bind, use_cache: bool = True
+) -> tuple[str, List[ParsedTransaction] | None, str | None]:
     """Process a single uploaded file and return (filename, parsed_results, error)"""
     is_image = file.content_type and file.content_type.startswith("image/")
     is_pdf = file.content_type == "application/pdf"
@@ -29,33 +71,52 @@ async def process_uploaded_file(file: UploadFile) -> tuple[str, List[ParsedTrans
     filename = f"{uuid.uuid4()}{extension}"
     file_path = upload_dir / filename
 
-    content = await file.read()
-    file_path.write_bytes(content)
+    try:
+        hash_ = await save_upload(file, file_path)
+    except UploadTooLargeError as e:
+        logger.warning(f"Upload rejected: {str(e)}", extra={"original_name": file.filename})
+        return (file.filename or filename, None, str(e))
 
     try:
         if is_pdf:
             logger.info(f"Processing PDF: {file.filename}", extra={"saved_as": filename})
-            parsed_transactions = await parse_pdf(str(file_path))
+            parsed_transactions = await parse_file(bind, hash_, file_path, is_pdf, use_cache)
             logger.info(f"PDF parsed successfully", extra={
                 "original_name": file.filename,
                 "transaction_count": len(parsed_transactions),
             })
         else:
             logger.info(f"Processing screenshot: {file.filename}", extra={"saved_as": filename})
-            parsed_transactions = await parse_screenshot(str(file_path))
+            parsed_transactions = await parse_file(bind, hash_, file_path, is_pdf, use_cache)
             logger.info(f"Screenshot parsed successfully", extra={
                 "original_name": file.filename,
                 "transaction_count": len(parsed_transactions),
             })
         return (file.filename or filename, parsed_transactions, None)
+    except PdfChunksFailedError as e:
+        # Распознанные операции отдаются, ошибка сообщает о пропущенных частях
+        logger.warning(f"PDF parsed partially: {str(e)}", extra={
+            "original_name": file.filename,
+            "failed_chunks": e.failed_chunks,
+        })
+        return (file.filename or filename, e.transactions, str(e))
     except Exception as e:
         logger.error(f"Failed to parse file: {str(e)}", extra={"original_name": file.filename}, exc_info=True)
         return (file.filename or filename, None, f"Ошибка распознавания: {str(e)}")
 
 
 @router.post("/upload", response_model=List[ParsedTransaction])
-async def upload_screenshot(file: UploadFile = File(...)):
-    """Upload a single screenshot or PDF and extract all transactions from it"""
+async def upload_screenshot(
+    response: Response,
+    file: UploadFile = File(...),
+    no_cache: bool = NO_CACHE_QUERY,
+    db: Session = Depends(get_db),
+):
+    """Upload a single screenshot or PDF and extract all transactions from it.
+
+    If some parts of a long PDF could not be parsed, the parsed transactions are
+    returned together with the X-Parse-Failed-Chunks / X-Parse-Total-Chunks headers.
+    """
     is_image = file.content_type and file.content_type.startswith("image/")
     is_pdf = file.content_type == "application/pdf"
 
@@ -70,38 +131,75 @@ async def upload_screenshot(file: UploadFile = File(...)):
     filename = f"{uuid.uuid4()}{extension}"
     file_path = upload_dir / filename
 
-    content = await file.read()
-    file_path.write_bytes(content)
+    try:
+        hash_ = await save_upload(file, file_path)
+    except UploadTooLargeError as e:
+        logger.warning(f"Upload rejected: {str(e)}", extra={"original_name": file.filename})
+        raise HTTPException(status_code=413, detail=str(e))
 
     try:
         if is_pdf:
             logger.info(f"Processing single PDF", extra={"original_name": file.filename, "saved_as": filename})
-            parsed_transactions = await parse_pdf(str(file_path))
+            parsed_transactions = await parse_file(db.get_bind(), hash_, file_path, is_pdf, not no_cache)
             logger.info(f"PDF parsed successfully", extra={
                 "transaction_count": len(parsed_transactions),
             })
         else:
             logger.info(f"Processing single screenshot", extra={"original_name": file.filename, "saved_as": filename})
-            parsed_transactions = await parse_screenshot(str(file_path))
+            parsed_transactions = await parse_file(db.get_bind(), hash_, file_path, is_pdf, not no_cache)
             logger.info(f"Screenshot parsed successfully", extra={
                 "transaction_count": len(parsed_transactions),
             })
         return parsed_transactions
+    except PdfChunksFailedError as e:
+        logger.warning(f"PDF parsed partially: {str(e)}", extra={
+            "saved_as": filename,
+            "failed_chunks": e.failed_chunks,
+        })
+        response.headers[FAILED_CHUNKS_HEADER] = ",".join(str(number) for number in e.failed_chunks)
+        response.headers[TOTAL_CHUNKS_HEADER] = str(e.total)
+        return e.transactions
     except Exception as e:
         logger.error(f"Failed to parse file: {str(e)}", extra={"saved_as": filename}, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Ошибка распознавания: {str(e)}")
 
 
 @router.post("/upload/batch")
-async def upload_batch(files: List[UploadFile] = File(...)):
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    no_cache: bool = NO_CACHE_QUERY,
+    db: Session = Depends(get_db),
+):
     """Upload multiple screenshots or PDFs and parse them all. Each file can contain multiple transactions."""
+    try:
+        check_batch_size(files)
+    except UploadTooLargeError as e:
+        logger.warning(f"Batch upload rejected: {str(e)}", extra={"file_count": len(files)})
+        raise HTTPException(status_code=413, detail=str(e))
+
     logger.info(f"Batch upload started", extra={"file_count": len(files)})
     results = []
     success_count = 0
     total_transactions = 0
 
-    for file in files:
-        filename, parsed_transactions, error = await process_uploaded_file(file)
+    # Сессия запроса не делится между файлами: кэш открывает свою сессию к bind
+    bind = db.get_bind()
+
+    # Файлы распознаются параллельно, но не больше upload_concurrency за раз
+    semaphore = asyncio.Semaphore(max(settings.upload_concurrency, 1))
+
+    async def process_with_limit(file: UploadFile):
+        async with semaphore:
+            return await process_uploaded_file(file, bind, not no_cache)
+
+    # gather сохраняет порядок файлов; ошибка одного файла не прерывает остальные
+    outcomes = await asyncio.gather(*(process_with_limit(file) for file in files), return_exceptions=True)
+
+    for file, outcome in zip(files, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Failed to process file: {str(outcome)}", extra={"original_name": file.filename}, exc_info=outcome)
+            outcome = (file.filename or "unknown", None, f"Ошибка обработки файла: {str(outcome)}")
+        filename, parsed_transactions, error = outcome
         if parsed_transactions:
             success_count += 1
             total_transactions += len(parsed_transactions)
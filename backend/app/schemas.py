@@ -69,6 +69,12 @@ class TransactionResponse(TransactionBase):
         from_attributes = True
 
 
+class TransactionBulkCreateResponse(BaseModel):
+    created_count: int
+    skipped_count: int = 0
+    transactions: list[TransactionResponse]
+
+
 class ParsedTransaction(BaseModel):
     amount: float
     description: str
@@ -305,3 +311,32 @@ class BulkDeleteRequest(BaseModel):
     category: Optional[str] = None
     account_id: Optional[int] = None
     transaction_type: Optional[str] = None
+
+
+# Export jobs
+class ExportFormatEnum(str, Enum):
+    excel = "excel"
+    csv = "csv"
+    parquet = "parquet"
+
+
+class ExportJobCreate(BaseModel):
+    format: ExportFormatEnum = ExportFormatEnum.excel
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    category: Optional[str] = None
+    account_id: Optional[int] = None
+    transaction_type: Optional[TransactionTypeEnum] = None
+
+
+class ExportJobResponse(BaseModel):
+    id: str
+    format: ExportFormatEnum
+    status: str  # "pending", "running", "done", "failed"
+    rows_total: Optional[int] = None
+    rows_done: int = 0
+    progress: float = 0
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    download_url: Optional[str] = None
@@ -0,0 +1,92 @@
+"""Профили табличных PDF-выписок банков для локального разбора.
+
+Профиль описывает, как узнать выписку банка (маркеры в тексте первой
+страницы) и как называются колонки таблицы операций. Новый банк
+добавляется через register_profile без изменения парсера
+(app/services/table_parser.py).
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class BankProfile:
+    name: str
+    # Хотя бы один маркер должен встречаться на первой странице (без учёта регистра)
+    markers: tuple[str, ...]
+    # Начала заголовков колонок
+    date_column: str
+    description_column: str
+    # Либо одна колонка суммы со знаком, либо раздельные колонки прихода и расхода
+    amount_column: str | None = None
+    income_column: str | None = None
+    expense_column: str | None = None
+    date_formats: tuple[str, ...] = ("%d.%m.%Y", "%d.%m.%y")
+    # Тип операции для суммы без знака в колонке amount_column
+    unsigned_type: str = "expense"
+
+    @property
+    def columns(self) -> dict[str, str]:
+        """Роль колонки -> заголовок (только заданные)."""
+        columns = {
+            "date": self.date_column,
+            "description": self.description_column,
+            "amount": self.amount_column,
+            "income": self.income_column,
+            "expense": self.expense_column,
+        }
+        return {role: header for role, header in columns.items() if header}
+
+
+BANK_PROFILES: list[BankProfile] = [
+    BankProfile(
+        name="tbank",
+        markers=("т-банк", "тинькофф", "tinkoff"),
+        date_column="Дата операции",
+        description_column="Описание",
+        amount_column="Сумма операции",
+    ),
+    BankProfile(
+        name="sber",
+        markers=("сбербанк", "сбер банк", "пао сбербанк"),
+        date_column="Дата операции",
+        description_column="Описание операции",
+        amount_column="Сумма в валюте счёта",
+    ),
+    BankProfile(
+        name="alfa",
+        markers=("альфа-банк", "альфа банк", "alfa-bank"),
+        date_column="Дата",
+        description_column="Описание",
+        income_column="Приход",
+        expense_column="Расход",
+    ),
+]
+
+
+def register_profile(profile: BankProfile) -> None:
+    """Добавляет профиль; профили с тем же именем заменяются."""
+    BANK_PROFILES[:] = [p for p in BANK_PROFILES if p.name != profile.name]
+    BANK_PROFILES.append(profile)
+
+
+def unregister_profile(name: str) -> None:
+    BANK_PROFILES[:] = [p for p in BANK_PROFILES if p.name != name]
+
+
+def detect_profiles(first_page_text: str) -> list[BankProfile]:
+    """Все профили, маркеры которых есть на первой странице, в порядке регистрации.
+
+    Маркеры разных банков могут встретиться в одной выписке (например,
+    перевод в другой банк), поэтому парсер пробует профили по очереди.
+    """
+    text = first_page_text.lower().replace("ё", "е")
+    return [
+        profile for profile in BANK_PROFILES
+        if any(marker.lower().replace("ё", "е") in text for marker in profile.markers)
+    ]
+
+
+def detect_profile(first_page_text: str) -> BankProfile | None:
+    profiles = detect_profiles(first_page_text)
+    return profiles[0] if profiles else None
@@ -0,0 +1,46 @@
+"""Статус бюджетов: сколько потрачено по каждой категории за месяц."""
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.models import Budget, TransactionDailyRollup
+from app.schemas import BudgetStatus
+from app.services.periods import in_period, month_range
+
+
+def get_budget_statuses(db: Session, year: int, month: int) -> list[BudgetStatus]:
+    """Статусы всех бюджетов за месяц одним запросом.
+
+    Расходы берутся из дневных агрегатов LEFT JOIN'ом к бюджетам с GROUP BY,
+    поэтому число запросов не зависит от количества бюджетов.
+    """
+    spent_column = func.coalesce(func.sum(TransactionDailyRollup.total), 0).label("spent")
+    rows = (
+        db.query(Budget, spent_column)
+        .outerjoin(TransactionDailyRollup, and_(
+            TransactionDailyRollup.category == Budget.category,
+            TransactionDailyRollup.transaction_type == 'expense',
+            in_period(TransactionDailyRollup.date, month_range(year, month)),
+        ))
+        .group_by(Budget.id)
+        .order_by(Budget.id)
+        .all()
+    )
+
+    result = []
+    for budget, spent in rows:
+        remaining = budget.monthly_limit - spent
+        percentage = (spent / budget.monthly_limit * 100) if budget.monthly_limit > 0 else 0
+
+        result.append(BudgetStatus(
+            id=budget.id,
+            category=budget.category,
+            monthly_limit=budget.monthly_limit,
+            spent=spent,
+            remaining=remaining,
+            percentage=round(percentage, 1),
+            is_over_threshold=percentage >= budget.alert_threshold * 100,
+            alert_threshold=budget.alert_threshold,
+        ))
+
+    return result
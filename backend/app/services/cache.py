@@ -0,0 +1,217 @@
+"""Кэш ответов для часто опрашиваемых эндпоинтов (дашборд, отчёты, бюджеты).
+
+Ключ кэша — эндпоинт, его параметры, текущая дата и версия данных.
+Каждый изменяющий данные эндпоинт увеличивает версию
+(зависимость invalidate_cache_on_write), поэтому записи, посчитанные до
+изменения, больше не находятся и сразу вытесняются.
+
+Бэкенд задаётся настройкой cache_backend: "memory" — TTL+LRU в памяти
+процесса, "redis" — любой клиент с интерфейсом redis-py (get/set/incr/delete).
+
+Та же версия данных служит слабым ETag для списков и отчётов
+(conditional_get): если данные не менялись, клиент получает 304 без
+запроса к базе и сериализации ответа.
+"""
+
+import functools
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+VERSION_KEY = "data-version"
+
+
+class MemoryCacheBackend:
+    """TTL+LRU кэш в памяти процесса."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ex: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ex, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            # Все записи посчитаны для старой версии данных — вытесняем сразу
+            self._entries.clear()
+            return self._counters[key]
+
+    def get_counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCacheBackend:
+    """Обёртка над клиентом с интерфейсом redis-py.
+
+    Версия данных хранится в самом Redis, поэтому инвалидация видна всем
+    процессам; устаревшие записи истекают по TTL.
+    """
+
+    def __init__(self, client, prefix: str = "home-finance:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return value
+
+    def set(self, key: str, value: str, ex: int) -> None:
+        self.client.set(self.prefix + key, value, ex=ex)
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(self.prefix + key))
+
+    def get_counter(self, key: str) -> int:
+        return int(self.get(key) or 0)
+
+    def clear(self) -> None:
+        self.client.delete(self.prefix + VERSION_KEY)
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl_seconds: int = 30):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        # Счётчик версий начинается заново после перезапуска, поэтому
+        # ETag'и разных запусков различаются по случайной эпохе
+        self.epoch = secrets.token_hex(4)
+
+    def data_version(self) -> int:
+        return self.backend.get_counter(VERSION_KEY)
+
+    def bump_data_version(self) -> int:
+        return self.backend.incr(VERSION_KEY)
+
+    def version_tag(self) -> Optional[str]:
+        """Слабый ETag текущей версии данных (None, если кэш недоступен)."""
+        try:
+            version = self.data_version()
+        except Exception:
+            logger.warning("Response cache unavailable", exc_info=True)
+            return None
+        return f'W/"{self.epoch}-{version}-{date.today():%Y%m%d}"'
+
+    def make_key(self, endpoint: str, params: dict[str, Any], version: int) -> str:
+        encoded = json.dumps(jsonable_encoder(params), sort_keys=True, ensure_ascii=False)
+        return f"{endpoint}:v{version}:{date.today().isoformat()}:{encoded}"
+
+    def get_or_compute(self, endpoint: str, params: dict[str, Any], compute: Callable[[], Any]) -> Any:
+        # Версию читаем до вычисления: если данные изменятся во время расчёта,
+        # результат ляжет под старую версию и не будет прочитан
+        try:
+            key = self.make_key(endpoint, params, self.data_version())
+            cached = self.backend.get(key)
+        except Exception:
+            logger.warning("Response cache unavailable", exc_info=True)
+            return compute()
+
+        if cached is not None:
+            return json.loads(cached)
+
+        result = jsonable_encoder(compute())
+        try:
+            self.backend.set(key, json.dumps(result, ensure_ascii=False), ex=self.ttl_seconds)
+        except Exception:
+            logger.warning("Response cache unavailable", exc_info=True)
+        return result
+
+
+def build_backend(settings):
+    if settings.cache_backend == "redis":
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("Для cache_backend=redis нужен пакет redis (pip install redis)") from e
+
+        return RedisCacheBackend(redis.Redis.from_url(settings.redis_url))
+    return MemoryCacheBackend(max_entries=settings.cache_max_entries)
+
+
+_settings = get_settings()
+response_cache = ResponseCache(build_backend(_settings), ttl_seconds=_settings.cache_ttl_seconds)
+
+
+def cached_response(endpoint: str):
+    """Кэширует ответ эндпоинта по его параметрам (кроме сессии БД)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            params = {k: v for k, v in kwargs.items() if not isinstance(v, Session)}
+            return response_cache.get_or_compute(endpoint, params, lambda: func(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def invalidate_cache() -> None:
+    response_cache.bump_data_version()
+
+
+def invalidate_cache_on_write():
+    """Зависимость изменяющего эндпоинта: после его выполнения сбрасывает кэш ответов.
+
+    Подключается к каждому такому эндпоинту отдельно: POST-запросы только
+    на чтение (например, /api/transactions/check-duplicates) кэш не трогают.
+    """
+    yield
+    invalidate_cache()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Слабое сравнение: префикс W/ не учитывается
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def conditional_get(request: Request, response: Response):
+    """Зависимость эндпоинта: ETag по версии данных и 304 при совпадении If-None-Match."""
+    etag = response_cache.version_tag()
+    if etag is None:
+        return
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
@@ -0,0 +1,184 @@
+"""Поиск дубликатов среди уже сохранённых транзакций.
+
+Точные повторы находятся по отпечатку (fingerprint) — хешу даты, суммы
+в копейках, типа, счёта и нормализованного описания, который хранится
+в индексированной колонке transactions.fingerprint.
+
+Нечёткий поиск проверяет всю партию одним запросом: из базы загружаются
+кандидаты из общего окна дат и сумм партии, а сопоставление выполняется
+в памяти по индексу (дата, сумма в копейках, тип транзакции).
+"""
+
+import hashlib
+import re
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import Row, and_, or_
+from sqlalchemy.orm import Session, load_only
+
+from app.models import Transaction
+from app.schemas import TransactionCreate
+
+# Допуск по дате (±1 день) и по сумме (±1 копейка)
+DATE_TOLERANCE = timedelta(days=1)
+AMOUNT_TOLERANCE_KOPECKS = 1
+# Не больше стольких диапазонов дат в одном запросе
+MAX_DATE_RANGES = 50
+
+
+def to_kopecks(amount: float) -> int:
+    return int(round(amount * 100))
+
+
+def normalize_description(description: str) -> str:
+    """Приводит описание к виду для сравнения: регистр, «ё», пробелы."""
+    return re.sub(r"\s+", " ", description.lower().replace("ё", "е")).strip()
+
+
+def transaction_fingerprint(
+    date_: date,
+    amount: float,
+    transaction_type: str | None,
+    account_id: int | None,
+    description: str,
+) -> str:
+    """SHA-256 от нормализованных полей транзакции (64 hex-символа)."""
+    key = "|".join([
+        date_.isoformat(),
+        str(to_kopecks(amount)),
+        transaction_type or "expense",
+        str(account_id or ""),
+        normalize_description(description),
+    ])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def fingerprint_of(transaction: Transaction) -> str:
+    return transaction_fingerprint(
+        transaction.date,
+        transaction.amount,
+        transaction.transaction_type,
+        transaction.account_id,
+        transaction.description,
+    )
+
+
+def find_exact_duplicates(db: Session, fingerprints: list[str]) -> dict[str, list[Transaction]]:
+    """Сохранённые транзакции с такими же отпечатками (один запрос по индексу)."""
+    if not fingerprints:
+        return {}
+
+    existing = (
+        db.query(Transaction)
+        .options(load_only(
+            Transaction.id,
+            Transaction.date,
+            Transaction.amount,
+            Transaction.description,
+            Transaction.category,
+            Transaction.fingerprint,
+        ))
+        .filter(Transaction.fingerprint.in_(set(fingerprints)))
+        .order_by(Transaction.id)
+        .all()
+    )
+
+    result: dict[str, list[Transaction]] = defaultdict(list)
+    for transaction in existing:
+        result[transaction.fingerprint].append(transaction)
+    return result
+
+
+def merge_date_windows(dates, max_ranges: int = MAX_DATE_RANGES) -> list[tuple[date, date]]:
+    """Объединяет окна [дата - 1 день, дата + 1 день] в непересекающиеся диапазоны.
+
+    Выписка за год превращается в несколько коротких диапазонов, каждый из
+    которых читается по индексу (date, amount), вместо скана всего года.
+    Если диапазонов больше max_ranges, сливаются разделённые самыми
+    короткими промежутками.
+    """
+    ranges: list[tuple[date, date]] = []
+    for day in sorted(set(dates)):
+        date_from, date_to = day - DATE_TOLERANCE, day + DATE_TOLERANCE
+        if ranges and date_from <= ranges[-1][1] + timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], date_to)
+        else:
+            ranges.append((date_from, date_to))
+
+    if len(ranges) > max_ranges:
+        gaps = sorted(range(1, len(ranges)), key=lambda i: ranges[i][0] - ranges[i - 1][1], reverse=True)
+        splits = sorted(gaps[:max_ranges - 1])
+        bounds = [0, *splits, len(ranges)]
+        ranges = [(ranges[a][0], ranges[b - 1][1]) for a, b in zip(bounds, bounds[1:])]
+    return ranges
+
+
+def find_similar_transactions(
+    db: Session, transactions: list[TransactionCreate]
+) -> list[list[Row]]:
+    """Для каждой входящей транзакции возвращает список похожих из базы.
+
+    Похожей считается транзакция того же типа с датой ±1 день, суммой
+    ±0.01 ₽ и описанием, содержащим описание входящей (без учёта регистра).
+    Строки результата содержат id, date, amount, description и category.
+    """
+    if not transactions:
+        return []
+
+    # Для каждого диапазона дат — свои границы сумм, чтобы чтение по индексу
+    # (date, amount) было как можно уже
+    date_ranges = merge_date_windows(t.date for t in transactions)
+    range_starts = [date_from for date_from, _ in date_ranges]
+    amount_bounds: dict[int, tuple[float, float]] = {}
+    for transaction in transactions:
+        i = bisect_right(range_starts, transaction.date) - 1
+        low, high = amount_bounds.get(i, (transaction.amount, transaction.amount))
+        amount_bounds[i] = (min(low, transaction.amount), max(high, transaction.amount))
+
+    tolerance = AMOUNT_TOLERANCE_KOPECKS / 100
+    windows = [
+        and_(
+            Transaction.date.between(date_from, date_to),
+            Transaction.amount.between(amount_bounds[i][0] - tolerance, amount_bounds[i][1] + tolerance),
+        )
+        for i, (date_from, date_to) in enumerate(date_ranges)
+    ]
+
+    candidates = (
+        db.query(
+            Transaction.id,
+            Transaction.date,
+            Transaction.amount,
+            Transaction.description,
+            Transaction.category,
+            Transaction.transaction_type,
+        )
+        .filter(
+            or_(*windows),
+            Transaction.transaction_type.in_({t.transaction_type for t in transactions}),
+        )
+        .order_by(Transaction.id)
+        .all()
+    )
+
+    index: dict[tuple[date, int, str], list[Row]] = defaultdict(list)
+    for candidate in candidates:
+        key = (candidate.date, to_kopecks(candidate.amount), candidate.transaction_type)
+        index[key].append(candidate)
+
+    results = []
+    for transaction in transactions:
+        kopecks = to_kopecks(transaction.amount)
+        needle = transaction.description.lower()
+        matches = []
+        for day_offset in range(-DATE_TOLERANCE.days, DATE_TOLERANCE.days + 1):
+            day = transaction.date + timedelta(days=day_offset)
+            for kopeck_offset in range(-AMOUNT_TOLERANCE_KOPECKS, AMOUNT_TOLERANCE_KOPECKS + 1):
+                key = (day, kopecks + kopeck_offset, transaction.transaction_type)
+                matches.extend(c for c in index.get(key, ()) if needle in c.description.lower())
+        matches.sort(key=lambda c: c.id)
+        results.append(matches)
+
+    return results
@@ -0,0 +1,218 @@
+"""Выгрузка транзакций в файлы (Excel, CSV, Parquet).
+
+Строки читаются из базы пачками (yield_per, на PostgreSQL — серверный
+курсор), а файл пишется потоково, поэтому расход памяти не зависит от
+размера выгрузки.
+"""
+
+import csv
+import io
+import os
+import tempfile
+from datetime import date
+from itertools import islice
+from typing import Iterator, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - Parquet-экспорт необязателен
+    pa = None
+    pq = None
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from sqlalchemy.orm import Session
+
+from app.models import Transaction
+
+EXPORT_BATCH_SIZE = 1000
+
+EXCEL_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+EXCEL_HEADERS = ["Дата", "Описание", "Категория", "Сумма (₽)"]
+EXCEL_COLUMN_WIDTHS = {"A": 12, "B": 30, "C": 18, "D": 15}
+AMOUNT_FORMAT = "#,##0.00"
+
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# Колонки CSV и Parquet
+EXPORT_COLUMNS = ["id", "date", "amount", "description", "category", "transaction_type", "account_id"]
+PARQUET_ROW_GROUP_SIZE = 50_000
+
+
+def query_export_rows(
+    db: Session,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    category: Optional[str] = None,
+    account_id: Optional[int] = None,
+    transaction_type: Optional[str] = None,
+):
+    """Запрос строк выгрузки (только нужные колонки, новые сначала)."""
+    query = db.query(*(getattr(Transaction, column) for column in EXPORT_COLUMNS))
+
+    if date_from:
+        query = query.filter(Transaction.date >= date_from)
+    if date_to:
+        query = query.filter(Transaction.date <= date_to)
+    if category:
+        query = query.filter(Transaction.category == category)
+    if account_id:
+        query = query.filter(Transaction.account_id == account_id)
+    if transaction_type:
+        query = query.filter(Transaction.transaction_type == transaction_type)
+
+    return query.order_by(Transaction.date.desc(), Transaction.id.desc())
+
+
+def iter_export_rows(query) -> Iterator:
+    """Строки запроса пачками по EXPORT_BATCH_SIZE без загрузки всего результата."""
+    return iter(query.yield_per(EXPORT_BATCH_SIZE))
+
+
+def export_filename(extension: str, date_from: Optional[date] = None, date_to: Optional[date] = None) -> str:
+    filename = "transactions"
+    if date_from:
+        filename += f"_from_{date_from}"
+    if date_to:
+        filename += f"_to_{date_to}"
+    return f"{filename}.{extension}"
+
+
+def _register_styles(wb: Workbook) -> None:
+    """Именованные стили: один объект стиля на все ячейки вместо Border на каждую."""
+    thin = Side(style="thin")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+    wb.add_named_style(NamedStyle(
+        name="export_header",
+        font=Font(bold=True, color="FFFFFF"),
+        fill=PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid"),
+        alignment=Alignment(horizontal="center", vertical="center"),
+        border=border,
+    ))
+    wb.add_named_style(NamedStyle(name="export_cell", border=border))
+    wb.add_named_style(NamedStyle(name="export_amount", border=border, number_format=AMOUNT_FORMAT))
+    wb.add_named_style(NamedStyle(name="export_total", font=Font(bold=True)))
+    wb.add_named_style(NamedStyle(name="export_total_amount", font=Font(bold=True), number_format=AMOUNT_FORMAT))
+
+
+def write_excel(rows, path: str) -> int:
+    """Пишет строки в .xlsx в режиме write-only. Возвращает число строк."""
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
+    ws = wb.create_sheet("Транзакции")
+    for column, width in EXCEL_COLUMN_WIDTHS.items():
+        ws.column_dimensions[column].width = width
+
+    def styled(value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    ws.append([styled(header, "export_header") for header in EXCEL_HEADERS])
+
+    count = 0
+    total = 0.0
+    for row in rows:
+        ws.append([
+            styled(row.date.strftime("%d.%m.%Y"), "export_cell"),
+            styled(row.description, "export_cell"),
+            styled(row.category or "—", "export_cell"),
+            styled(row.amount, "export_amount"),
+        ])
+        count += 1
+        total += row.amount
+
+    ws.append([None, None, styled("Итого:", "export_total"), styled(total, "export_total_amount")])
+    wb.save(path)
+    return count
+
+
+def iter_csv(rows) -> Iterator[bytes]:
+    """CSV по частям: заголовок, затем по одному куску на пачку строк."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+
+    rows = iter(rows)
+    while True:
+        for row in islice(rows, EXPORT_BATCH_SIZE):
+            writer.writerow(row)
+        chunk = buffer.getvalue()
+        if not chunk:
+            return
+        yield chunk.encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def write_csv(rows, path: str) -> int:
+    """Пишет строки в CSV-файл. Возвращает число строк."""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    with open(path, "wb") as f:
+        for chunk in iter_csv(counted()):
+            f.write(chunk)
+    return count
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+def _parquet_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.date32()),
+        ("amount", pa.float64()),
+        ("description", pa.string()),
+        ("category", pa.string()),
+        ("transaction_type", pa.string()),
+        ("account_id", pa.int64()),
+    ])
+
+
+def write_parquet(rows, path: str) -> int:
+    """Пишет строки в Parquet группами по PARQUET_ROW_GROUP_SIZE. Возвращает число строк."""
+    schema = _parquet_schema()
+    count = 0
+    rows = iter(rows)
+    with pq.ParquetWriter(path, schema) as writer:
+        while True:
+            batch = list(islice(rows, PARQUET_ROW_GROUP_SIZE))
+            if not batch:
+                break
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            count += len(batch)
+        if count == 0:
+            writer.write_table(schema.empty_table())
+    return count
+
+
+# Формат -> (расширение, MIME-тип, функция записи в файл)
+EXPORT_FORMATS = {
+    "excel": ("xlsx", EXCEL_MEDIA_TYPE, write_excel),
+    "csv": ("csv", CSV_MEDIA_TYPE, write_csv),
+    "parquet": ("parquet", PARQUET_MEDIA_TYPE, write_parquet),
+}
+
+
+def create_temp_file(suffix: str) -> str:
+    """Путь к новому временному файлу; удалять его должен вызывающий."""
+    fd, path = tempfile.mkstemp(prefix="export_", suffix=suffix)
+    os.close(fd)
+    return path
@@ -0,0 +1,161 @@
+"""Фоновые задачи выгрузки.
+
+Большая выгрузка не занимает поток запроса: POST /api/export/jobs ставит
+задачу в пул потоков и сразу возвращает её id, файл рендерится в
+upload_dir/exports, клиент опрашивает прогресс и скачивает готовый файл.
+Задачи живут в памяти процесса (один воркер uvicorn); готовые файлы
+удаляются через export_job_ttl_seconds после завершения.
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.logging_config import get_logger
+from app.services.export import (
+    EXPORT_BATCH_SIZE,
+    EXPORT_FORMATS,
+    export_filename,
+    iter_export_rows,
+    query_export_rows,
+)
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ExportJob:
+    id: str
+    format: str
+    filters: dict[str, Any]
+    status: str = "pending"
+    rows_total: Optional[int] = None
+    rows_done: int = 0
+    error: Optional[str] = None
+    path: Optional[Path] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+
+    @property
+    def progress(self) -> float:
+        if self.status == "done":
+            return 1.0
+        if not self.rows_total:
+            return 0.0
+        return min(self.rows_done / self.rows_total, 1.0)
+
+    @property
+    def filename(self) -> str:
+        extension = EXPORT_FORMATS[self.format][0]
+        return export_filename(extension, self.filters.get("date_from"), self.filters.get("date_to"))
+
+
+class ExportJobManager:
+    def __init__(self, export_dir: Path, workers: int = 2, ttl_seconds: int = 3600):
+        self.export_dir = Path(export_dir)
+        self.workers = workers
+        self.ttl_seconds = ttl_seconds
+        self._jobs: dict[str, ExportJob] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, bind, format: str, filters: dict[str, Any]) -> ExportJob:
+        """Ставит выгрузку в очередь; bind — engine/connection для сессии воркера."""
+        self.cleanup_expired()
+        job = ExportJob(id=uuid.uuid4().hex, format=format, filters=filters)
+        with self._lock:
+            self._jobs[job.id] = job
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="export")
+            self._executor.submit(self._run, job, bind)
+        logger.info(f"Export job queued: {job.id}", extra={"job_id": job.id, "format": format})
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        self.cleanup_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: ExportJob, bind) -> None:
+        job.status = "running"
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        extension, _, write = EXPORT_FORMATS[job.format]
+        path = self.export_dir / f"{job.id}.{extension}"
+        # Пока файл не дописан, он лежит под временным именем и не отдаётся
+        partial_path = path.with_name(path.name + ".part")
+        started = time.time()
+
+        try:
+            with Session(bind=bind) as db:
+                query = query_export_rows(db, **job.filters)
+                job.rows_total = query.order_by(None).count()
+                write(self._track(job, iter_export_rows(query)), str(partial_path))
+            os.replace(partial_path, path)
+        except Exception as e:
+            logger.error(f"Export job failed: {job.id}: {e}", extra={"job_id": job.id}, exc_info=True)
+            partial_path.unlink(missing_ok=True)
+            job.status = "failed"
+            job.error = str(e)
+        else:
+            job.path = path
+            job.status = "done"
+            logger.info(
+                f"Export job done: {job.id}, {job.rows_done} rows",
+                extra={"job_id": job.id, "rows": job.rows_done, "duration": round(time.time() - started, 2)},
+            )
+        job.finished_at = datetime.now(timezone.utc)
+
+    @staticmethod
+    def _track(job: ExportJob, rows):
+        for row in rows:
+            yield row
+            job.rows_done += 1
+            if job.rows_done % EXPORT_BATCH_SIZE == 0:
+                logger.debug(f"Export job progress: {job.id}, {job.rows_done}/{job.rows_total}")
+
+    def cleanup_expired(self) -> int:
+        """Удаляет завершённые задачи старше TTL и их файлы, а также
+        файлы, оставшиеся от прошлых запусков. Возвращает число удалённых задач."""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            expired = [
+                job for job in self._jobs.values()
+                if job.finished_at and (now - job.finished_at).total_seconds() > self.ttl_seconds
+            ]
+            for job in expired:
+                del self._jobs[job.id]
+            known = {job.path for job in self._jobs.values()}
+
+        for job in expired:
+            if job.path:
+                job.path.unlink(missing_ok=True)
+
+        if self.export_dir.is_dir():
+            cutoff = time.time() - self.ttl_seconds
+            for path in self.export_dir.iterdir():
+                if path not in known and path.is_file() and path.stat().st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+        return len(expired)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_settings = get_settings()
+export_jobs = ExportJobManager(
+    Path(_settings.upload_dir) / "exports",
+    workers=_settings.export_workers,
+    ttl_seconds=_settings.export_job_ttl_seconds,
+)
@@ -0,0 +1,83 @@
+"""Подготовка скриншотов перед отправкой в модель.
+
+Скриншоты телефонов — PNG по 2–5 МБ. Перед base64 изображение
+уменьшается до image_max_edge по длинной стороне, перекодируется в
+JPEG или WebP и теряет метаданные (EXIF и т.п.), что уменьшает запрос,
+время отправки и число токенов.
+"""
+
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.config import get_settings
+from app.logging_config import get_logger
+
+settings = get_settings()
+logger = get_logger(__name__)
+
+MEDIA_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+OUTPUT_FORMATS = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+}
+
+
+def _encode(image: Image.Image, image_format: str, quality: int) -> bytes:
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        # У JPEG нет прозрачности: подкладываем белый фон, как у большинства приложений
+        rgba = image.convert("RGBA")
+        image = Image.new("RGB", rgba.size, (255, 255, 255))
+        image.paste(rgba, mask=rgba.getchannel("A"))
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+
+    output = BytesIO()
+    # exif не передаётся, поэтому метаданные в результат не попадают
+    image.save(output, format=image_format, quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def prepare_image(image_path: str) -> tuple[bytes, str]:
+    """Байты изображения для модели и их MIME-тип.
+
+    Если файл не открывается Pillow или предобработка выключена,
+    возвращается исходный файл как есть.
+    """
+    original = Path(image_path).read_bytes()
+    original_type = MEDIA_TYPES.get(Path(image_path).suffix.lower(), "image/png")
+    image_format = settings.image_format.upper()
+    if not settings.image_preprocessing or image_format not in OUTPUT_FORMATS:
+        return original, original_type
+
+    try:
+        with Image.open(BytesIO(original)) as image:
+            # Поворот из EXIF применяется до того, как метаданные будут отброшены
+            image = ImageOps.exif_transpose(image)
+            original_size = image.size
+            image.thumbnail((settings.image_max_edge, settings.image_max_edge), Image.Resampling.LANCZOS)
+            processed = _encode(image, image_format, settings.image_quality)
+    except (UnidentifiedImageError, OSError, ValueError) as e:
+        logger.warning(f"Image preprocessing skipped: {e}", extra={"path": image_path})
+        return original, original_type
+
+    resized = image.size != original_size
+    logger.info(f"Image prepared for upload", extra={
+        "path": image_path,
+        "bytes_before": len(original),
+        "bytes_after": len(processed),
+        "size_before": list(original_size),
+        "size_after": list(image.size),
+    })
+    # Маленький плоский PNG бывает меньше JPEG — тогда отправляем исходник
+    if not resized and len(processed) >= len(original):
+        return original, original_type
+    return processed, OUTPUT_FORMATS[image_format]
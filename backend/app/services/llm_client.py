@@ -0,0 +1,100 @@
+"""Клиент OpenRouter (chat completions) с общим пулом соединений.
+
+Один httpx.AsyncClient создаётся на время жизни приложения (lifespan в
+app.main), поэтому TCP+TLS рукопожатие с openrouter.ai выполняется один
+раз, а последующие запросы идут по keep-alive соединениям (HTTP/2, если
+установлен пакет h2).
+"""
+
+from typing import Any, Optional
+
+import httpx
+
+from app.config import get_settings
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class LLMClient:
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 5,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 60.0,
+        connect_timeout: float = 10.0,
+        http2: bool = True,
+    ):
+        self.url = url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2 and _http2_available()
+        if http2 and not self.http2:
+            logger.warning("Package h2 is not installed, OpenRouter client falls back to HTTP/1.1")
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Общий клиент; создаётся при первом обращении, если lifespan не запускался."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2)
+        return self._client
+
+    async def start(self) -> None:
+        self.client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def chat_completion(
+        self,
+        messages: list[dict[str, Any]],
+        *,
+        api_key: str,
+        model: str,
+        max_tokens: int,
+    ) -> str:
+        """Отправляет сообщения модели и возвращает текст ответа."""
+        response = await self.client.post(
+            self.url,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            },
+            json={
+                "model": model,
+                "messages": messages,
+                "max_tokens": max_tokens,
+            },
+        )
+        response.raise_for_status()
+        result = response.json()
+        return result["choices"][0]["message"]["content"].strip()
+
+
+_settings = get_settings()
+llm_client = LLMClient(
+    _settings.openrouter_url,
+    max_connections=_settings.llm_max_connections,
+    max_keepalive_connections=_settings.llm_max_keepalive_connections,
+    keepalive_expiry=_settings.llm_keepalive_expiry,
+    timeout=_settings.llm_timeout_seconds,
+    connect_timeout=_settings.llm_connect_timeout_seconds,
+    http2=_settings.llm_http2,
+)
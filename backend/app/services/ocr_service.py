@@ -1,16 +1,40 @@
+import asyncio
 import random
 import base64
 import json
-import httpx
 import pdfplumber
 from datetime import date, datetime
-from pathlib import Path
 from app.config import get_settings
 from app.schemas import ParsedTransaction
 from app.services.categorizer import categorize_transaction, MOCK_CATEGORIES
+from app.services.image_preprocess import prepare_image
+from app.services.llm_client import llm_client
+from app.services.offload import run_blocking, run_cpu_bound
+from app.services.pdf_chunks import PdfChunk, merge_chunk_results, split_into_chunks
+from app.services.table_parser import parse_statement_tables
 
 settings = get_settings()
 
+# Меняются при изменении промпта или разбора ответа: старые результаты
+# в кэше распознавания (parse_result_cache) перестают совпадать
+SCREENSHOT_PROMPT_VERSION = "screenshot-2"
+PDF_PROMPT_VERSION = "pdf-3"
+
+
+class PdfChunksFailedError(ValueError):
+    """Часть окон длинной выписки не распознана.
+
+    transactions — операции из распознанных окон, failed_chunks — номера
+    (с 1) окон с ошибкой. Такой результат не кэшируется.
+    """
+
+    def __init__(self, transactions: list[ParsedTransaction], failed_chunks: list[int], total: int):
+        self.transactions = transactions
+        self.failed_chunks = failed_chunks
+        self.total = total
+        numbers = ", ".join(str(number) for number in failed_chunks)
+        super().__init__(f"Не распознаны части выписки {numbers} из {total}, остальные операции распознаны")
+
 MOCK_TRANSACTIONS = [
     {"amount": 1250.00, "description": "Пятёрочка"},
     {"amount": 350.00, "description": "Яндекс.Такси"},
@@ -22,7 +46,27 @@ MOCK_TRANSACTIONS = [
     {"amount": 5500.00, "description": "МВидео"},
 ]
 
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+def encode_image(image_path: str) -> tuple[str, str]:
+    """base64 подготовленного изображения и его MIME-тип."""
+    content, media_type = prepare_image(image_path)
+    return base64.standard_b64encode(content).decode("utf-8"), media_type
+
+
+def extract_pdf_pages(pdf_path: str) -> list[str]:
+    """Текст каждой страницы PDF (выполняется в пуле, см. app.services.offload)."""
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            return [page.extract_text() or "" for page in pdf.pages]
+    except Exception as e:
+        raise ValueError(f"Не удалось прочитать PDF файл: {str(e)}")
+
+
+def parse_cache_namespace(is_pdf: bool) -> tuple[str, str] | None:
+    """(модель, версия промпта) для кэша распознавания; None в mock-режиме."""
+    if not settings.openrouter_api_key:
+        return None
+    return settings.openrouter_model, PDF_PROMPT_VERSION if is_pdf else SCREENSHOT_PROMPT_VERSION
 
 
 async def parse_screenshot(image_path: str) -> list[ParsedTransaction]:
@@ -47,18 +91,7 @@ async def parse_screenshot(image_path: str) -> list[ParsedTransaction]:
             ))
         return transactions
 
-    image_data = Path(image_path).read_bytes()
-    base64_image = base64.standard_b64encode(image_data).decode("utf-8")
-
-    extension = Path(image_path).suffix.lower()
-    media_types = {
-        ".jpg": "image/jpeg",
-        ".jpeg": "image/jpeg",
-        ".png": "image/png",
-        ".gif": "image/gif",
-        ".webp": "image/webp",
-    }
-    media_type = media_types.get(extension, "image/png")
+    base64_image, media_type = await run_blocking(encode_image, image_path)
 
     # Get current date for context
     today = date.today()
@@ -109,39 +142,28 @@ async def parse_screenshot(image_path: str) -> list[ParsedTransaction]:
 
 Верни ТОЛЬКО JSON массив, без дополнительного текста."""
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            OPENROUTER_URL,
-            headers={
-                "Authorization": f"Bearer {settings.openrouter_api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": settings.openrouter_model,
-                "messages": [
+    response_text = await llm_client.chat_completion(
+        [
+            {
+                "role": "user",
+                "content": [
                     {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:{media_type};base64,{base64_image}"
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{media_type};base64,{base64_image}"
+                        }
+                    },
+                    {
+                        "type": "text",
+                        "text": prompt
                     }
-                ],
-                "max_tokens": 1024,
+                ]
             }
-        )
-        response.raise_for_status()
-        result = response.json()
-
-    response_text = result["choices"][0]["message"]["content"].strip()
+        ],
+        api_key=settings.openrouter_api_key,
+        model=settings.openrouter_model,
+        max_tokens=1024,
+    )
     raw_response = response_text
 
     # Log the raw response for debugging
@@ -209,6 +231,11 @@ async def parse_pdf(pdf_path: str) -> list[ParsedTransaction]:
     """Распознаёт PDF выгрузку из банковского приложения с автокатегоризацией.
     Возвращает список транзакций."""
 
+    # Табличные выписки известных банков разбираются локально, без модели
+    local_transactions = await run_cpu_bound(parse_statement_tables, pdf_path)
+    if local_transactions:
+        return local_transactions
+
     if not settings.openrouter_api_key:
         # Return 2-5 mock transactions for PDF
         num_transactions = random.randint(2, 5)
@@ -227,21 +254,41 @@ async def parse_pdf(pdf_path: str) -> list[ParsedTransaction]:
             ))
         return transactions
 
-    # Extract text from PDF
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text_content = []
-            for page in pdf.pages:
-                text = page.extract_text()
-                if text:
-                    text_content.append(text)
-            full_text = "\n\n".join(text_content)
-    except Exception as e:
-        raise ValueError(f"Не удалось прочитать PDF файл: {str(e)}")
+    # Extract text from PDF off the event loop
+    pages = await run_cpu_bound(extract_pdf_pages, pdf_path)
 
-    if not full_text.strip():
+    if not any(page.strip() for page in pages):
         raise ValueError("PDF файл не содержит текста или текст не удалось извлечь")
 
+    # Длинная выписка распознаётся по частям, окна отправляются параллельно
+    chunks = split_into_chunks(pages, settings.pdf_chunk_chars, settings.pdf_chunk_overlap_lines)
+    semaphore = asyncio.Semaphore(max(settings.pdf_chunk_concurrency, 1))
+
+    async def parse_with_limit(number: int, chunk: PdfChunk) -> list[ParsedTransaction]:
+        async with semaphore:
+            return await parse_pdf_chunk(chunk.text, number, len(chunks))
+
+    # Ошибка одного окна не отменяет остальные: собираем все результаты
+    results = await asyncio.gather(*(
+        parse_with_limit(number, chunk) for number, chunk in enumerate(chunks, 1)
+    ), return_exceptions=True)
+
+    errors = [(number, result) for number, result in enumerate(results, 1) if isinstance(result, BaseException)]
+    if len(errors) == len(chunks):
+        raise errors[0][1]
+
+    transactions = merge_chunk_results(
+        chunks, [[] if isinstance(result, BaseException) else result for result in results]
+    )
+    if errors:
+        raise PdfChunksFailedError(transactions, [number for number, _ in errors], len(chunks))
+    return transactions
+
+
+async def parse_pdf_chunk(text: str, number: int = 1, total: int = 1) -> list[ParsedTransaction]:
+    """Распознаёт транзакции в одном окне текста PDF."""
+    part_note = f"Это часть {number} из {total} длинной выписки.\n\n" if total > 1 else ""
+
     # Get current date for context
     today = date.today()
     current_year = today.year
@@ -283,33 +330,22 @@ async def parse_pdf(pdf_path: str) -> list[ParsedTransaction]:
 - Если указана дата в прошлом месяце, вычисли правильную дату
 - НИКОГДА не используй старые года (2024, 2023 и т.д.) если год явно не написан в выгрузке
 
-ТЕКСТ ИЗ PDF:
-{full_text[:4000]}
+{part_note}ТЕКСТ ИЗ PDF:
+{text}
 
 Верни ТОЛЬКО JSON массив, без дополнительного текста."""
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            OPENROUTER_URL,
-            headers={
-                "Authorization": f"Bearer {settings.openrouter_api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": settings.openrouter_model,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                "max_tokens": 2048,
+    response_text = await llm_client.chat_completion(
+        [
+            {
+                "role": "user",
+                "content": prompt
             }
-        )
-        response.raise_for_status()
-        result = response.json()
-
-    response_text = result["choices"][0]["message"]["content"].strip()
+        ],
+        api_key=settings.openrouter_api_key,
+        model=settings.openrouter_model,
+        max_tokens=2048,
+    )
     raw_response = response_text
 
     # Log the raw response for debugging
@@ -363,7 +399,7 @@ async def parse_pdf(pdf_path: str) -> list[ParsedTransaction]:
             category=category,
             transaction_type=transaction_type,
             date=parsed_date,
-            raw_text=f"PDF: {full_text[:500]}..."
+            raw_text=f"PDF: {text[:500]}..."
         ))
 
     return transactions
@@ -0,0 +1,71 @@
+"""Выполнение блокирующих операций вне event loop.
+
+Запись и чтение загруженных файлов, base64 и извлечение текста из PDF
+выполняются в отдельном пуле потоков (blocking_io_workers), чтобы большой
+файл не останавливал остальные запросы воркера. Извлечение текста из PDF
+можно вынести в пул процессов (pdf_extraction_processes > 0), тогда оно
+не конкурирует с event loop и за GIL.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from app.config import get_settings
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    with _lock:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(
+                max_workers=max(settings.blocking_io_workers, 1),
+                thread_name_prefix="blocking-io",
+            )
+        return _thread_pool
+
+
+def _get_cpu_pool() -> Executor:
+    global _process_pool
+    if settings.pdf_extraction_processes <= 0:
+        return _get_thread_pool()
+    with _lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=settings.pdf_extraction_processes)
+        return _process_pool
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """Файловый ввод-вывод и прочая блокирующая работа — в пуле потоков."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_thread_pool(), functools.partial(func, *args, **kwargs))
+
+
+async def run_cpu_bound(func: Callable[..., T], *args) -> T:
+    """Тяжёлые вычисления — в пуле процессов, если он настроен, иначе в пуле потоков.
+
+    Для пула процессов func и аргументы должны сериализоваться pickle
+    (функция уровня модуля, простые аргументы).
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_cpu_pool(), functools.partial(func, *args))
+
+
+def shutdown() -> None:
+    global _thread_pool, _process_pool
+    with _lock:
+        pools = [_thread_pool, _process_pool]
+        _thread_pool = _process_pool = None
+    for pool in pools:
+        if pool is not None:
+            pool.shutdown(wait=True)
@@ -0,0 +1,76 @@
+"""Keyset-пагинация списка транзакций по паре (поле сортировки, id)."""
+
+import base64
+import json
+from datetime import date
+
+from sqlalchemy import and_, or_
+
+from app.models import Transaction
+
+# Поля, по которым поддерживается курсорная пагинация
+CURSOR_SORT_COLUMNS = {
+    "date": Transaction.date,
+    "amount": Transaction.amount,
+    "description": Transaction.description,
+}
+
+
+class InvalidCursorError(ValueError):
+    """Курсор повреждён или не соответствует текущей сортировке."""
+
+
+def get_sort_column(sort_by: str | None):
+    return CURSOR_SORT_COLUMNS.get(sort_by or "date", Transaction.date)
+
+
+def encode_cursor(sort_by: str, sort_order: str, transaction: Transaction) -> str:
+    """Кодирует позицию последней строки страницы в непрозрачную строку."""
+    value = getattr(transaction, sort_by)
+    if isinstance(value, date):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, sort_order, value, transaction.id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> tuple:
+    """Возвращает (значение поля сортировки, id) из курсора."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort_by, cursor_order, value, last_id = json.loads(
+            base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        )
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursorError("Некорректный курсор")
+
+    if cursor_sort_by != sort_by or cursor_order != sort_order or not isinstance(last_id, int):
+        raise InvalidCursorError("Курсор не соответствует параметрам сортировки")
+
+    if sort_by == "date":
+        try:
+            value = date.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise InvalidCursorError("Некорректный курсор")
+    return value, last_id
+
+
+def apply_keyset(query, sort_by: str, sort_order: str, cursor: str | None):
+    """Добавляет к запросу сортировку (поле, id) и условие «после курсора»."""
+    sort_column = get_sort_column(sort_by)
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by, sort_order)
+        if sort_order == "asc":
+            query = query.filter(or_(
+                sort_column > value,
+                and_(sort_column == value, Transaction.id > last_id),
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column < value,
+                and_(sort_column == value, Transaction.id < last_id),
+            ))
+
+    if sort_order == "asc":
+        return query.order_by(sort_column.asc(), Transaction.id.asc())
+    return query.order_by(sort_column.desc(), Transaction.id.desc())
@@ -0,0 +1,121 @@
+"""Кэш результатов распознавания загруженных файлов.
+
+Ключ — SHA-256 содержимого, имя модели и версия промпта, поэтому смена
+модели или промпта автоматически даёт промах. Записи старше
+parse_cache_max_age_days удаляются, а при превышении
+parse_cache_max_entries вытесняются давно не использованные.
+
+Асинхронные обработчики загрузки обращаются к кэшу через
+load_cached_result/save_result в пуле потоков: каждая из них открывает
+собственную короткую сессию, поэтому параллельно распознаваемые файлы
+не делят одну Session.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import ParseResultCache
+from app.schemas import ParsedTransaction
+
+settings = get_settings()
+
+
+def get_cached_result(
+    db: Session, hash_: str, model: str, prompt_version: str
+) -> Optional[list[ParsedTransaction]]:
+    entry = (
+        db.query(ParseResultCache)
+        .filter(
+            ParseResultCache.content_hash == hash_,
+            ParseResultCache.model == model,
+            ParseResultCache.prompt_version == prompt_version,
+        )
+        .first()
+    )
+    if entry is None:
+        return None
+
+    entry.last_used_at = func.now()
+    db.commit()
+    return [ParsedTransaction.model_validate(item) for item in json.loads(entry.result)]
+
+
+def load_cached_result(bind, hash_: str, model: str, prompt_version: str) -> Optional[list[ParsedTransaction]]:
+    with Session(bind=bind) as db:
+        return get_cached_result(db, hash_, model, prompt_version)
+
+
+def save_result(bind, hash_: str, model: str, prompt_version: str, transactions: list[ParsedTransaction]) -> None:
+    with Session(bind=bind) as db:
+        store_result(db, hash_, model, prompt_version, transactions)
+
+
+def store_result(
+    db: Session,
+    hash_: str,
+    model: str,
+    prompt_version: str,
+    transactions: list[ParsedTransaction],
+) -> None:
+    """Сохраняет (или обновляет) результат и применяет вытеснение."""
+    result = json.dumps([t.model_dump(mode="json") for t in transactions], ensure_ascii=False)
+    key = (
+        ParseResultCache.content_hash == hash_,
+        ParseResultCache.model == model,
+        ParseResultCache.prompt_version == prompt_version,
+    )
+
+    updated = db.query(ParseResultCache).filter(*key).update(
+        # Новый результат стареет заново: evict считает возраст по created_at
+        {
+            ParseResultCache.result: result,
+            ParseResultCache.created_at: func.now(),
+            ParseResultCache.last_used_at: func.now(),
+        },
+        synchronize_session=False,
+    )
+    if not updated:
+        db.add(ParseResultCache(content_hash=hash_, model=model, prompt_version=prompt_version, result=result))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Тот же файл успели сохранить параллельно — результат уже в кэше
+        db.rollback()
+
+    evict(db)
+
+
+def evict(
+    db: Session,
+    max_age_days: Optional[int] = None,
+    max_entries: Optional[int] = None,
+) -> int:
+    """Удаляет устаревшие записи и лишние по размеру. Возвращает число удалённых."""
+    max_age_days = settings.parse_cache_max_age_days if max_age_days is None else max_age_days
+    max_entries = settings.parse_cache_max_entries if max_entries is None else max_entries
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+    deleted = db.query(ParseResultCache).filter(ParseResultCache.created_at < cutoff).delete(
+        synchronize_session=False
+    )
+
+    excess = db.query(func.count(ParseResultCache.id)).scalar() - max_entries
+    if excess > 0:
+        oldest = (
+            db.query(ParseResultCache.id)
+            .order_by(ParseResultCache.last_used_at.asc(), ParseResultCache.id.asc())
+            .limit(excess)
+            .scalar_subquery()
+        )
+        deleted += db.query(ParseResultCache).filter(ParseResultCache.id.in_(oldest)).delete(
+            synchronize_session=False
+        )
+
+    db.commit()
+    return deleted
@@ -0,0 +1,119 @@
+"""Разбиение текста PDF-выписки на окна для распознавания по частям.
+
+Окно собирается из целых строк (строка выписки — одна операция или её
+часть), не превышает max_chars и по возможности заканчивается на границе
+страницы. Последние overlap_lines строк окна (но не больше четверти
+max_chars) повторяются в начале следующего, чтобы операция на стыке
+целиком попала хотя бы в одно окно; дубликаты, распознанные в обоих
+окнах, затем убираются при слиянии.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from app.services.duplicates import normalize_description, to_kopecks
+
+
+@dataclass
+class PdfChunk:
+    text: str
+    # Строки, повторённые из конца предыдущего окна
+    overlap: str = ""
+
+
+def _overlap_tail(lines: list[str], overlap_lines: int, max_chars: int) -> list[str]:
+    """Последние overlap_lines строк, суммарно не длиннее max_chars // 4.
+
+    Без ограничения длинные строки занимали бы большую часть окна
+    перекрытием, и каждое следующее окно добавляло бы лишь одну новую строку.
+    """
+    tail: list[str] = []
+    size = 0
+    for line in reversed(lines[-overlap_lines:] if overlap_lines else []):
+        size += len(line) + 1
+        if size > max_chars // 4:
+            break
+        tail.insert(0, line)
+    return tail
+
+
+def split_into_chunks(pages: list[str], max_chars: int = 4000, overlap_lines: int = 3) -> list[PdfChunk]:
+    chunks: list[PdfChunk] = []
+    lines: list[str] = []
+    overlap: list[str] = []
+    size = 0
+
+    def flush():
+        nonlocal lines, overlap, size
+        if len(lines) > len(overlap):
+            chunks.append(PdfChunk(text="\n".join(lines), overlap="\n".join(overlap)))
+            overlap = _overlap_tail(lines, overlap_lines, max_chars)
+            lines = list(overlap)
+            size = sum(len(line) + 1 for line in lines)
+
+    for page in pages:
+        page_lines = [line for line in page.splitlines() if line.strip()]
+        page_size = sum(len(line) + 1 for line in page_lines)
+        # Страница не помещается в текущее окно, а окно уже заполнено
+        # наполовину — начинаем новое окно с границы страницы
+        if size + page_size > max_chars and size > max_chars // 2:
+            flush()
+
+        for line in page_lines:
+            line = line[:max_chars]
+            if size + len(line) + 1 > max_chars:
+                flush()
+            lines.append(line)
+            size += len(line) + 1
+
+    flush()
+    return chunks
+
+
+def _amount_in_text(amount: float, text: str) -> bool:
+    """Встречается ли сумма в тексте (с учётом пробелов в разрядах и запятой)."""
+    normalized = re.sub(r"[\s ]", "", text).replace(",", ".")
+    kopecks = to_kopecks(abs(amount))
+    candidates = {f"{kopecks // 100}.{kopecks % 100:02d}"}
+    if kopecks % 100 == 0:
+        candidates.add(str(kopecks // 100))
+    return any(re.search(rf"(?<![\d.]){re.escape(c)}(?![\d])", normalized) for c in candidates)
+
+
+def _transaction_key(item) -> tuple:
+    return (
+        item.date,
+        to_kopecks(item.amount),
+        item.transaction_type,
+        normalize_description(item.description),
+    )
+
+
+def merge_chunk_results(chunks: list[PdfChunk], results: list[list]) -> list:
+    """Объединяет результаты окон, убирая повторы из перекрытий.
+
+    Операция из окна i + 1 считается повтором, если такая же (дата, сумма,
+    тип, описание) есть в окне i, а её сумма встречается в перекрытии.
+    Одинаковые операции внутри одного окна (две покупки кофе за день)
+    сохраняются.
+    """
+    merged: list = []
+    previous: Counter = Counter()
+    for chunk, items in zip(chunks, results):
+        counts = Counter(_transaction_key(item) for item in items)
+        repeated = Counter()
+        if chunk.overlap:
+            for item in items:
+                key = _transaction_key(item)
+                if key not in repeated and previous[key] and _amount_in_text(item.amount, chunk.overlap):
+                    repeated[key] = min(previous[key], counts[key])
+
+        for item in items:
+            key = _transaction_key(item)
+            if repeated[key] > 0:
+                repeated[key] -= 1
+                continue
+            merged.append(item)
+        previous = counts
+    return merged
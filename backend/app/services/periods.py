@@ -0,0 +1,38 @@
+"""Календарные периоды как полуоткрытые диапазоны дат [начало, конец).
+
+Фильтр вида date >= start AND date < end использует индекс по дате,
+в отличие от extract('year'/'month', date) == ..., который требует
+полного просмотра таблицы.
+"""
+
+from datetime import date
+
+from sqlalchemy import and_
+
+# Границы, при которых начало и конец периода представимы datetime.date
+MIN_YEAR = 1
+MAX_YEAR = 9998
+
+
+def month_range(year: int, month: int) -> tuple[date, date]:
+    """Первый день месяца и первый день следующего месяца."""
+    start = date(year, month, 1)
+    if month == 12:
+        return start, date(year + 1, 1, 1)
+    return start, date(year, month + 1, 1)
+
+
+def year_range(year: int) -> tuple[date, date]:
+    """1 января года и 1 января следующего года."""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def years_range(year_from: int, year_to: int) -> tuple[date, date]:
+    """Годы year_from..year_to включительно."""
+    return date(year_from, 1, 1), date(year_to + 1, 1, 1)
+
+
+def in_period(column, period: tuple[date, date]):
+    """Условие start <= column < end для SQLAlchemy-запроса."""
+    start, end = period
+    return and_(column >= start, column < end)
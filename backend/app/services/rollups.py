@@ -0,0 +1,136 @@
+"""Дневные агрегаты транзакций (таблица transaction_daily_rollups).
+
+Каждое изменение транзакций превращается в набор дельт по ключу
+(дата, счёт, категория, тип), которые применяются к агрегатам в той же
+сессии и фиксируются тем же коммитом, что и сами транзакции. Дельты
+прибавляются в SQL (INSERT ... ON CONFLICT DO UPDATE SET total = total + ...),
+поэтому параллельные запросы не теряют изменения друг друга.
+
+Полный пересчёт для восстановления:
+
+    python -m app.services.rollups
+"""
+
+from collections import defaultdict
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import delete, func, insert, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.logging_config import get_logger
+from app.models import Transaction, TransactionDailyRollup
+
+logger = get_logger(__name__)
+
+RollupKey = tuple[date, int | None, str | None, str]
+
+# Выражения уникального индекса ux_transaction_daily_rollups_key; константы
+# литералами, иначе цель ON CONFLICT не совпадёт с выражениями индекса
+ROLLUP_CONFLICT_TARGET = [
+    TransactionDailyRollup.date,
+    func.coalesce(TransactionDailyRollup.account_id, literal_column("0")),
+    func.coalesce(TransactionDailyRollup.category, literal_column("''")),
+    TransactionDailyRollup.transaction_type,
+]
+
+
+def rollup_key(transaction) -> RollupKey:
+    # Пустая категория и NULL — один ключ уникального индекса (COALESCE(category, ''))
+    return (
+        transaction.date,
+        transaction.account_id,
+        transaction.category or None,
+        transaction.transaction_type or "expense",
+    )
+
+
+def transaction_deltas(transactions: Iterable, sign: int = 1) -> dict[RollupKey, list]:
+    """Дельты [сумма, количество] для добавления (sign=1) или удаления (sign=-1)."""
+    deltas: dict[RollupKey, list] = defaultdict(lambda: [0.0, 0])
+    for transaction in transactions:
+        delta = deltas[rollup_key(transaction)]
+        delta[0] += sign * transaction.amount
+        delta[1] += sign
+    return deltas
+
+
+def apply_rollup_deltas(db: Session, *delta_maps: dict[RollupKey, list]) -> None:
+    """Применяет дельты к агрегатам одним upsert; строки с нулевым количеством удаляются."""
+    deltas: dict[RollupKey, list] = defaultdict(lambda: [0.0, 0])
+    for delta_map in delta_maps:
+        for key, (total, count) in delta_map.items():
+            deltas[key][0] += total
+            deltas[key][1] += count
+    deltas = {key: delta for key, delta in deltas.items() if delta[1] or delta[0]}
+    if not deltas:
+        return
+
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(TransactionDailyRollup).values([
+        {
+            "date": row_date,
+            "account_id": account_id,
+            "category": category,
+            "transaction_type": transaction_type,
+            "total": total,
+            "count": count,
+        }
+        for (row_date, account_id, category, transaction_type), (total, count) in deltas.items()
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=ROLLUP_CONFLICT_TARGET,
+        set_={
+            "total": TransactionDailyRollup.total + statement.excluded.total,
+            "count": TransactionDailyRollup.count + statement.excluded.count,
+        },
+    ))
+    db.execute(delete(TransactionDailyRollup).where(
+        TransactionDailyRollup.date.in_({key[0] for key in deltas}),
+        TransactionDailyRollup.count <= 0,
+    ))
+
+
+def add_to_rollups(db: Session, transactions: Iterable) -> None:
+    apply_rollup_deltas(db, transaction_deltas(transactions))
+
+
+def remove_from_rollups(db: Session, transactions: Iterable) -> None:
+    apply_rollup_deltas(db, transaction_deltas(transactions, sign=-1))
+
+
+def rebuild_rollups(db: Session) -> int:
+    """Пересчитывает все агрегаты из transactions. Возвращает число строк."""
+    transaction_type = func.coalesce(Transaction.transaction_type, "expense")
+    category = func.nullif(Transaction.category, "")
+    db.execute(delete(TransactionDailyRollup))
+    db.execute(insert(TransactionDailyRollup).from_select(
+        ["date", "account_id", "category", "transaction_type", "total", "count"],
+        select(
+            Transaction.date,
+            Transaction.account_id,
+            category,
+            transaction_type,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id),
+        ).group_by(Transaction.date, Transaction.account_id, category, transaction_type),
+    ))
+    db.commit()
+    rows = db.query(func.count(TransactionDailyRollup.id)).scalar()
+    logger.info(f"Rollups rebuilt", extra={"rows": rows})
+    return rows
+
+
+def rebuild_rollups_if_missing(db: Session) -> None:
+    """Заполняет агрегаты, если таблица пуста, а транзакции есть (новая схема)."""
+    has_rollups = db.query(TransactionDailyRollup.id).first() is not None
+    if not has_rollups and db.query(Transaction.id).first() is not None:
+        rebuild_rollups(db)
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    with SessionLocal() as session:
+        print(f"Rebuilt {rebuild_rollups(session)} rollup rows")
@@ -0,0 +1,52 @@
+"""Поиск транзакций по описанию.
+
+На PostgreSQL используется триграммный GIN-индекс (pg_trgm) и ранжирование
+по word_similarity, на остальных СУБД (SQLite в тестах) — обычный LIKE.
+"""
+
+from sqlalchemy import case, or_
+from sqlalchemy.orm import Session
+
+from app.models import Transaction
+
+
+def like_pattern(text: str) -> str:
+    """Экранирует спецсимволы LIKE и оборачивает строку в %...%."""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def description_filter(text: str):
+    """Условие «описание содержит text» без учёта регистра."""
+    return Transaction.description.ilike(like_pattern(text), escape="\\")
+
+
+def is_postgresql(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def search_transactions(db: Session, q: str, limit: int = 20) -> list[Transaction]:
+    """Ищет транзакции по описанию, лучшие совпадения первыми."""
+    q = q.strip()
+    if not q:
+        return []
+
+    query = db.query(Transaction)
+    # Описания, начинающиеся с запроса, показываем выше остальных
+    prefix_rank = case((Transaction.description.ilike(like_pattern(q)[1:], escape="\\"), 0), else_=1)
+
+    if is_postgresql(db):
+        # description %> q (то же, что q <% description) и ILIKE используют
+        # GIN-индекс ix_transactions_description_trgm
+        query = query.filter(or_(
+            description_filter(q),
+            Transaction.description.op("%>")(q),
+        ))
+        # Расстояние 1 - word_similarity(q, description)
+        score = Transaction.description.op("<->>")(q)
+        query = query.order_by(prefix_rank, score.asc(), Transaction.date.desc(), Transaction.id.desc())
+    else:
+        query = query.filter(description_filter(q))
+        query = query.order_by(prefix_rank, Transaction.date.desc(), Transaction.id.desc())
+
+    return query.limit(limit).all()
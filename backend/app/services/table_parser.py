@@ -0,0 +1,263 @@
+"""Локальный разбор табличных PDF-выписок без вызова модели.
+
+Банк определяется по профилю (app/services/bank_profiles.py). Операции
+берутся из таблиц pdfplumber (extract_tables), а если таблицы без линий
+не распознались — из позиций слов (extract_words): строки собираются по
+вертикальной координате, колонки — по положению заголовков. Подходящие
+профили пробуются по очереди до первого, давшего операции. Если профиль
+не найден или операций не нашлось, возвращается None и выписка уходит
+в модель.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
+
+import pdfplumber
+
+from app.schemas import ParsedTransaction
+from app.services.bank_profiles import BankProfile, detect_profiles
+from app.services.categorizer import categorize_transaction
+
+# Допуск по вертикали, в пределах которого слова считаются одной строкой
+LINE_TOLERANCE = 3
+# Допуск по горизонтали при отнесении слова к колонке
+COLUMN_TOLERANCE = 2
+# Слова с промежутком до половины высоты строки — одна фраза
+PHRASE_GAP = 0.5
+
+DATE_PATTERN = re.compile(r"\d{1,2}\.\d{1,2}\.\d{2,4}")
+AMOUNT_PATTERN = re.compile(r"^([+-]?)(\d+(?:\.\d+)?)$")
+
+
+@dataclass
+class StatementRow:
+    date: date
+    description: str
+    amount: float
+    transaction_type: str
+    raw: str
+
+
+def normalize_header(text: str | None) -> str:
+    return re.sub(r"\s+", " ", (text or "").lower().replace("ё", "е")).strip()
+
+
+def parse_date(text: str | None, formats: tuple[str, ...]) -> Optional[date]:
+    match = DATE_PATTERN.search(text or "")
+    if not match:
+        return None
+    for date_format in formats:
+        try:
+            return datetime.strptime(match.group(0), date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_amount(text: str | None) -> Optional[tuple[float, str]]:
+    """Сумма и знак ("+", "-" или "") из строки вида "-1 234,56 ₽"."""
+    cleaned = re.sub(r"[\s  ]|₽|руб\.?|rub", "", (text or "").lower())
+    cleaned = cleaned.replace("−", "-").replace("–", "-").replace(",", ".")
+    match = AMOUNT_PATTERN.match(cleaned)
+    if not match:
+        return None
+    return float(match.group(2)), match.group(1)
+
+
+def _row_from_cells(profile: BankProfile, cells: dict[str, str], raw: str) -> Optional[StatementRow]:
+    row_date = parse_date(cells.get("date"), profile.date_formats)
+    if row_date is None:
+        return None
+
+    if "amount" in cells:
+        parsed = parse_amount(cells["amount"])
+        if parsed is None:
+            return None
+        amount, sign = parsed
+        transaction_type = {"+": "income", "-": "expense"}.get(sign, profile.unsigned_type)
+    else:
+        income = parse_amount(cells.get("income"))
+        expense = parse_amount(cells.get("expense"))
+        if income and income[0]:
+            amount, transaction_type = income[0], "income"
+        elif expense and expense[0]:
+            amount, transaction_type = expense[0], "expense"
+        else:
+            return None
+
+    description = re.sub(r"\s+", " ", cells.get("description") or "").strip()
+    if not description:
+        return None
+    return StatementRow(row_date, description, amount, transaction_type, raw)
+
+
+def _match_header_cells(profile: BankProfile, cells: list[str | None]) -> Optional[dict[str, int]]:
+    """Индексы колонок, если строка таблицы — заголовок профиля."""
+    normalized = [normalize_header(cell) for cell in cells]
+    indexes = {}
+    for role, header in profile.columns.items():
+        header = normalize_header(header)
+        index = next((i for i, cell in enumerate(normalized) if cell.startswith(header) and i not in indexes.values()), None)
+        if index is None:
+            return None
+        indexes[role] = index
+    return indexes
+
+
+def parse_tables(profile: BankProfile, tables: list[list[list[str | None]]]) -> list[StatementRow]:
+    """Операции из таблиц страницы (результат page.extract_tables())."""
+    rows = []
+    for table in tables:
+        indexes = None
+        for cells in table:
+            if indexes is None:
+                indexes = _match_header_cells(profile, cells)
+                continue
+            values = {role: (cells[i] if i < len(cells) else None) or "" for role, i in indexes.items()}
+            raw = " | ".join(cell or "" for cell in cells)
+            row = _row_from_cells(profile, {role: value.replace("\n", " ") for role, value in values.items()}, raw)
+            if row:
+                rows.append(row)
+            elif rows and not values["date"].strip() and values["description"].strip():
+                # Перенос длинного описания в следующую строку таблицы
+                rows[-1].description += " " + values["description"].replace("\n", " ").strip()
+    return rows
+
+
+def _group_lines(words: list[dict]) -> list[list[dict]]:
+    lines: list[list[dict]] = []
+    for word in sorted(words, key=lambda w: (w["top"], w["x0"])):
+        if lines and abs(word["top"] - lines[-1][0]["top"]) <= LINE_TOLERANCE:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    return [sorted(line, key=lambda w: w["x0"]) for line in lines]
+
+
+def _phrases(line: list[dict]) -> list[dict]:
+    """Склеивает слова, разделённые одним пробелом ("-1 250,00", "Пятёрочка Москва")."""
+    phrases: list[dict] = []
+    for word in line:
+        gap_limit = (word["bottom"] - word["top"]) * PHRASE_GAP
+        if phrases and word["x0"] - phrases[-1]["x1"] <= gap_limit:
+            phrases[-1] = {**phrases[-1], "text": f'{phrases[-1]["text"]} {word["text"]}', "x1": word["x1"]}
+        else:
+            phrases.append(dict(word))
+    return phrases
+
+
+def _find_header(profile: BankProfile, line: list[dict]) -> Optional[dict[str, float]]:
+    """x-координаты начала колонок, если строка слов — заголовок профиля."""
+    texts = [normalize_header(word["text"]) for word in line]
+    starts = {}
+    for role, header in profile.columns.items():
+        header_words = normalize_header(header).split(" ")
+        for i in range(len(texts) - len(header_words) + 1):
+            if texts[i:i + len(header_words)] == header_words and line[i]["x0"] not in starts.values():
+                starts[role] = line[i]["x0"]
+                break
+        else:
+            return None
+    return starts
+
+
+def parse_words(profile: BankProfile, words: list[dict], header: Optional[dict[str, float]] = None) -> tuple[list[StatementRow], Optional[dict[str, float]]]:
+    """Операции по позициям слов (результат page.extract_words()).
+
+    header — колонки, найденные на предыдущей странице: заголовок таблицы
+    часто печатается только на первой. Возвращает строки и колонки.
+    """
+    rows: list[StatementRow] = []
+    previous_bottom = None
+    for line in _group_lines(words):
+        if header is None:
+            header = _find_header(profile, line)
+            continue
+        found = _find_header(profile, line)
+        if found:
+            header = found
+            continue
+
+        boundaries = sorted(header.items(), key=lambda item: item[1])
+        cells: dict[str, list[str]] = {role: [] for role in header}
+        for phrase in _phrases(line):
+            # По центру фразы: суммы выровнены вправо и могут начинаться
+            # левее заголовка своей колонки
+            center = (phrase["x0"] + phrase["x1"]) / 2
+            role = boundaries[0][0]
+            for candidate, x0 in boundaries:
+                if center + COLUMN_TOLERANCE >= x0:
+                    role = candidate
+            cells[role].append(phrase["text"])
+
+        values = {role: " ".join(parts) for role, parts in cells.items()}
+        raw = " ".join(word["text"] for word in line)
+        row = _row_from_cells(profile, values, raw)
+        line_height = line[0]["bottom"] - line[0]["top"]
+        if row:
+            rows.append(row)
+        elif (
+            rows
+            and values["description"]
+            and all(not text for role, text in values.items() if role != "description")
+            and previous_bottom is not None
+            and line[0]["top"] - previous_bottom <= line_height
+        ):
+            # Продолжение описания предыдущей операции
+            rows[-1].description += " " + values["description"]
+        else:
+            continue
+        previous_bottom = line[0]["bottom"]
+    return rows, header
+
+
+def to_parsed_transactions(profile: BankProfile, rows: list[StatementRow]) -> list[ParsedTransaction]:
+    transactions = []
+    for row in rows:
+        category, _ = categorize_transaction(row.description)
+        transactions.append(ParsedTransaction(
+            amount=row.amount,
+            description=row.description,
+            category=category,
+            transaction_type=row.transaction_type,
+            date=row.date,
+            raw_text=f"PDF ({profile.name}): {row.raw}",
+        ))
+    return transactions
+
+
+def parse_statement_tables(pdf_path: str) -> Optional[list[ParsedTransaction]]:
+    """Транзакции табличной выписки известного банка или None.
+
+    Функция уровня модуля, чтобы её можно было выполнить в пуле процессов.
+    """
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            if not pdf.pages:
+                return None
+            profiles = detect_profiles(pdf.pages[0].extract_text() or "")
+            if not profiles:
+                return None
+
+            # Таблицы и слова страниц извлекаются один раз на все профили
+            tables = [page.extract_tables() for page in pdf.pages]
+            words: dict[int, list[dict]] = {}
+            for profile in profiles:
+                rows: list[StatementRow] = []
+                header = None
+                for index, page in enumerate(pdf.pages):
+                    page_rows = parse_tables(profile, tables[index])
+                    if not page_rows:
+                        if index not in words:
+                            words[index] = page.extract_words()
+                        page_rows, header = parse_words(profile, words[index], header)
+                    rows.extend(page_rows)
+                if rows:
+                    return to_parsed_transactions(profile, rows)
+    except Exception:
+        # Файл не читается pdfplumber'ом — решать будет общий путь через модель
+        return None
+
+    return None
@@ -0,0 +1,69 @@
+"""Сохранение загруженных файлов на диск.
+
+Файл копируется из UploadFile кусками по upload_chunk_bytes, SHA-256
+считается по ходу записи, поэтому в памяти никогда не держится больше
+одного куска, а размер проверяется до того, как файл записан целиком.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import BinaryIO
+
+from fastapi import UploadFile
+
+from app.config import get_settings
+from app.services.offload import run_blocking
+
+settings = get_settings()
+
+
+class UploadTooLargeError(ValueError):
+    """Файл или пакет файлов больше допустимого размера."""
+
+
+def format_limit(max_bytes: int) -> str:
+    return f"{max_bytes / (1024 * 1024):g} МБ"
+
+
+def check_file_size(file: UploadFile, max_bytes: int | None = None) -> None:
+    """Отклоняет файл по известному заранее размеру, не читая его."""
+    max_bytes = settings.upload_max_file_bytes if max_bytes is None else max_bytes
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(f"Файл больше {format_limit(max_bytes)}")
+
+
+def check_batch_size(files: list[UploadFile], max_bytes: int | None = None) -> None:
+    max_bytes = settings.upload_max_batch_bytes if max_bytes is None else max_bytes
+    if sum(file.size or 0 for file in files) > max_bytes:
+        raise UploadTooLargeError(f"Суммарный размер файлов больше {format_limit(max_bytes)}")
+
+
+def _write_chunk(target: BinaryIO, hasher, chunk: bytes) -> None:
+    hasher.update(chunk)
+    target.write(chunk)
+
+
+async def save_upload(file: UploadFile, path: Path, max_bytes: int | None = None) -> str:
+    """Записывает файл в path и возвращает SHA-256 содержимого.
+
+    При превышении max_bytes запись прерывается, недописанный файл
+    удаляется и выбрасывается UploadTooLargeError.
+    """
+    max_bytes = settings.upload_max_file_bytes if max_bytes is None else max_bytes
+    check_file_size(file, max_bytes)
+
+    hasher = hashlib.sha256()
+    size = 0
+    target = await run_blocking(open, path, "wb")
+    try:
+        while chunk := await file.read(settings.upload_chunk_bytes):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(f"Файл больше {format_limit(max_bytes)}")
+            await run_blocking(_write_chunk, target, hasher, chunk)
+    except BaseException:
+        await run_blocking(target.close)
+        path.unlink(missing_ok=True)
+        raise
+    await run_blocking(target.close)
+    return hasher.hexdigest()
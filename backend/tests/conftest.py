@@ -1,13 +1,14 @@
 import pytest
 from unittest.mock import patch
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
 from app.database import Base, get_db
 from app.config import Settings
+from app.services.cache import response_cache
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 
@@ -39,6 +40,7 @@ def get_test_settings():
 @pytest.fixture(scope="function")
 def client():
     Base.metadata.create_all(bind=engine)
+    response_cache.backend.clear()
     app.dependency_overrides[get_db] = override_get_db
     with patch("app.services.ocr_service.settings", get_test_settings()):
         with TestClient(app) as c:
@@ -47,6 +49,16 @@ def client():
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def db_session(client):
+    """Сессия к той же тестовой базе, что и у client (для подготовки данных)."""
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 @pytest.fixture
 def sample_transaction():
     return {
@@ -55,3 +67,16 @@ def sample_transaction():
         "category": "Еда",
         "date": "2024-01-15"
     }
+
+
+@pytest.fixture
+def query_counter():
+    """Собирает SQL-запросы, выполненные через тестовый engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
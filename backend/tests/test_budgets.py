@@ -1,4 +1,5 @@
 import pytest
+from datetime import date, timedelta
 
 
 @pytest.fixture
@@ -85,3 +86,39 @@ def test_delete_budget(client, sample_budget):
 def test_delete_budget_not_found(client):
     response = client.delete("/api/budgets/999")
     assert response.status_code == 404
+
+
+def test_get_budgets_status_single_query(client, query_counter):
+    today = date.today()
+    categories = ["Еда", "Транспорт", "Кафе и рестораны", "Покупки", "Здоровье"]
+    for category in categories:
+        client.post("/api/budgets/", json={"category": category, "monthly_limit": 1000.0})
+    client.post("/api/transactions/", json={
+        "amount": 300, "description": "Лента", "category": "Еда", "date": today.isoformat(),
+    })
+    client.post("/api/transactions/", json={
+        "amount": 900, "description": "Такси", "category": "Транспорт", "date": today.isoformat(),
+    })
+    # Доходы и другие месяцы в бюджет не входят
+    client.post("/api/transactions/", json={
+        "amount": 5000, "description": "Возврат", "category": "Еда",
+        "transaction_type": "income", "date": today.isoformat(),
+    })
+    client.post("/api/transactions/", json={
+        "amount": 700, "description": "Лента", "category": "Еда",
+        "date": (today.replace(day=1) - timedelta(days=1)).isoformat(),
+    })
+
+    query_counter.clear()
+    response = client.get("/api/budgets/status")
+    assert len(query_counter) == 1
+
+    spent = {b["category"]: b["spent"] for b in response.json()}
+    assert spent == {"Еда": 300, "Транспорт": 900, "Кафе и рестораны": 0, "Покупки": 0, "Здоровье": 0}
+    transport = next(b for b in response.json() if b["category"] == "Транспорт")
+    assert transport["is_over_threshold"] is True
+
+
+def test_get_budgets_status_invalid_month(client):
+    assert client.get("/api/budgets/status?year=2024&month=13").status_code == 422
+    assert client.get("/api/savings/monthly-status?year=2024&month=13").status_code == 422
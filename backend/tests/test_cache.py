@@ -0,0 +1,178 @@
+import time
+from datetime import date
+
+import pytest
+
+from app.config import Settings
+from app.services.cache import (
+    MemoryCacheBackend,
+    RedisCacheBackend,
+    ResponseCache,
+    build_backend,
+    etag_matches,
+    response_cache,
+)
+
+
+class FakeRedis:
+    """Минимальная замена redis.Redis: get/set(ex)/incr/delete."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key, value, ex=None):
+        expires_at = time.monotonic() + ex if ex else None
+        self.data[key] = (value.encode("utf-8"), expires_at)
+
+    def incr(self, key):
+        value = int(self.get(key) or 0) + 1
+        self.data[key] = (str(value).encode("utf-8"), None)
+        return value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request):
+    if request.param == "redis":
+        return ResponseCache(RedisCacheBackend(FakeRedis()), ttl_seconds=30)
+    return ResponseCache(MemoryCacheBackend(max_entries=10), ttl_seconds=30)
+
+
+def test_cache_hit_and_params_in_key(cache):
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return {"value": value, "day": date(2024, 1, 1)}
+
+    assert cache.get_or_compute("report", {"year": 2024}, lambda: compute(1)) == {"value": 1, "day": "2024-01-01"}
+    assert cache.get_or_compute("report", {"year": 2024}, lambda: compute(2)) == {"value": 1, "day": "2024-01-01"}
+    assert cache.get_or_compute("report", {"year": 2023}, lambda: compute(3))["value"] == 3
+    assert calls == [1, 3]
+
+
+def test_bump_data_version_invalidates(cache):
+    cache.get_or_compute("summary", {}, lambda: 1)
+    cache.bump_data_version()
+    assert cache.get_or_compute("summary", {}, lambda: 2) == 2
+
+
+def test_memory_backend_ttl_and_lru(monkeypatch):
+    backend = MemoryCacheBackend(max_entries=2)
+    now = [1000.0]
+    monkeypatch.setattr("app.services.cache.time.monotonic", lambda: now[0])
+
+    backend.set("a", "1", ex=10)
+    backend.set("b", "2", ex=10)
+    assert backend.get("a") == "1"
+    backend.set("c", "3", ex=10)
+    # "b" использовался давнее всех
+    assert backend.get("b") is None
+    assert backend.get("a") == "1"
+
+    now[0] += 11
+    assert backend.get("a") is None
+    assert backend.get("c") is None
+
+
+def test_endpoint_is_served_from_cache(client, db_session, query_counter):
+    client.post("/api/transactions/", json={
+        "amount": 100, "description": "Лента", "category": "Еда", "date": date.today().isoformat(),
+    })
+    first = client.get("/api/dashboard/summary").json()
+
+    query_counter.clear()
+    assert client.get("/api/dashboard/summary").json() == first
+    assert query_counter == []
+
+
+@pytest.mark.parametrize("url", [
+    "/api/dashboard/summary",
+    "/api/dashboard/widgets",
+    "/api/reports/monthly",
+    "/api/budgets/status",
+    "/api/accounts/total-balance",
+])
+def test_writes_invalidate_cached_endpoints(client, url):
+    account = client.post("/api/accounts/", json={"name": "Карта", "account_type": "card", "balance": 0}).json()
+    client.post("/api/budgets/", json={"category": "Еда", "monthly_limit": 1000})
+    before = client.get(url).json()
+
+    client.post(f"/api/transactions/?account_id={account['id']}", json={
+        "amount": 250, "description": "Лента", "category": "Еда", "date": date.today().isoformat(),
+    })
+
+    assert client.get(url).json() != before
+
+
+def test_settings_write_invalidates_widgets(client):
+    client.get("/api/settings/")
+    client.get("/api/dashboard/widgets")
+    version = response_cache.data_version()
+
+    client.put("/api/settings/", json={"monthly_income": 100000})
+
+    assert response_cache.data_version() > version
+    assert client.get("/api/dashboard/widgets").json()["savings_status"]["income"] == 100000
+
+
+def test_read_only_post_keeps_cache(client):
+    client.post("/api/transactions/", json={"amount": 100, "description": "Лента", "date": "2024-01-10"})
+    version = response_cache.data_version()
+
+    client.post("/api/transactions/check-duplicates", json=[
+        {"amount": 100, "description": "Лента", "date": "2024-01-10"},
+    ])
+
+    assert response_cache.data_version() == version
+
+
+def test_redis_backend_requires_package(monkeypatch):
+    import sys
+
+    monkeypatch.setitem(sys.modules, "redis", None)
+    with pytest.raises(RuntimeError, match="redis"):
+        build_backend(Settings(cache_backend="redis"))
+
+
+@pytest.mark.parametrize("url", [
+    "/api/transactions/",
+    "/api/accounts/",
+    "/api/budgets/",
+    "/api/budgets/status",
+    "/api/reports/monthly",
+])
+def test_etag_not_modified_until_write(client, query_counter, url):
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    query_counter.clear()
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+    assert query_counter == []
+
+    client.post("/api/accounts/", json={"name": "Карта", "account_type": "card"})
+
+    modified = client.get(url, headers={"If-None-Match": etag})
+    assert modified.status_code == 200
+    assert modified.headers["ETag"] != etag
+
+
+def test_etag_weak_comparison_and_lists():
+    assert etag_matches('"a-1", W/"b-2"', 'W/"b-2"')
+    assert etag_matches('"b-2"', 'W/"b-2"')
+    assert etag_matches("*", 'W/"b-2"')
+    assert not etag_matches(None, 'W/"b-2"')
+    assert not etag_matches('W/"b-3"', 'W/"b-2"')
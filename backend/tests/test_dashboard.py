@@ -142,3 +142,32 @@ def test_get_dashboard_widgets_goals_exclude_completed(client):
 
     assert len(data["goals"]) == 1
     assert data["goals"][0]["name"] == "Активная цель"
+
+
+def test_get_dashboard_summary_periods_single_query(client, query_counter):
+    today = date.today()
+    month_start = today.replace(day=1)
+    last_month_day = month_start - timedelta(days=1)
+    transactions = [
+        {"amount": 100.0, "description": "Сегодня", "category": "Еда", "date": today.isoformat()},
+        {"amount": 40.0, "description": "Без категории", "date": today.isoformat()},
+        {"amount": 200.0, "description": "Прошлый месяц", "category": "Транспорт", "date": last_month_day.isoformat()},
+        {"amount": 5000.0, "description": "Зарплата", "category": "Зарплата",
+         "transaction_type": "income", "date": today.isoformat()},
+        {"amount": 300.0, "description": "Давно", "category": "Еда",
+         "date": (month_start - timedelta(days=70)).isoformat()},
+    ]
+    for t in transactions:
+        client.post("/api/transactions/", json=t)
+
+    query_counter.clear()
+    response = client.get("/api/dashboard/summary")
+    assert len(query_counter) == 1
+
+    data = response.json()
+    assert data["today"] == 140.0
+    assert data["month"] == 140.0
+    assert data["last_month"] == 200.0
+    assert data["week"] == 140.0 + (200.0 if last_month_day >= today - timedelta(days=7) else 0)
+    # Категории без трат в этом месяце и без категории в топ не попадают
+    assert data["top_categories"] == [{"category": "Еда", "amount": 100.0}]
@@ -0,0 +1,76 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.models import Transaction
+from app.services.duplicates import merge_date_windows
+
+
+@pytest.mark.parametrize("existing_date, incoming_date", [
+    ("2024-04-30", "2024-05-01"),  # окно пересекает начало месяца
+    ("2024-05-01", "2024-04-30"),  # окно пересекает конец 30-дневного месяца
+    ("2024-03-01", "2024-02-29"),  # конец февраля високосного года
+    ("2023-12-31", "2024-01-01"),  # граница года
+])
+def test_check_duplicates_across_month_boundary(client, existing_date, incoming_date):
+    client.post("/api/transactions/", json={"amount": 500, "description": "Лента", "date": existing_date})
+
+    response = client.post("/api/transactions/check-duplicates", json=[
+        {"amount": 500, "description": "Лента", "date": incoming_date},
+    ])
+    assert response.status_code == 200
+    assert response.json()["duplicates_found"] == 1
+
+
+def test_check_duplicates_end_of_30_day_month(client):
+    # Раньше replace(day=31) для 30 апреля падал и ронял всю партию
+    response = client.post("/api/transactions/check-duplicates", json=[
+        {"amount": 500, "description": "Лента", "date": "2024-04-30"},
+        {"amount": 700, "description": "Такси", "date": "2024-02-29"},
+    ])
+    assert response.status_code == 200
+    assert response.json()["duplicates_found"] == 0
+
+
+def test_merge_date_windows():
+    assert merge_date_windows([date(2024, 1, 10), date(2024, 1, 11), date(2024, 1, 20)]) == [
+        (date(2024, 1, 9), date(2024, 1, 12)),
+        (date(2024, 1, 19), date(2024, 1, 21)),
+    ]
+    assert merge_date_windows([date(2024, 1, 31), date(2024, 2, 3)]) == [
+        (date(2024, 1, 30), date(2024, 2, 4)),
+    ]
+
+
+def test_check_duplicates_benchmark(client, db_session, query_counter):
+    """1000 строк выписки против 100 тыс. транзакций — фиксированное число запросов."""
+    rng = random.Random(42)
+    start = date(2020, 1, 1)
+    rows = [
+        {
+            "amount": rng.randint(100, 500_000) / 100,
+            "description": f"Магазин {rng.randint(1, 5000)}",
+            "transaction_type": "expense",
+            "date": start + timedelta(days=rng.randint(0, 5 * 365)),
+        }
+        for _ in range(100_000)
+    ]
+    db_session.execute(insert(Transaction), rows)
+    db_session.commit()
+
+    # Выписка за квартал: 1000 операций, все уже есть в базе
+    quarter = [row for row in rows if date(2023, 1, 1) <= row["date"] < date(2023, 4, 1)]
+    statement = [
+        {"amount": row["amount"], "description": row["description"], "date": row["date"].isoformat()}
+        for row in rng.sample(quarter, 1000)
+    ]
+
+    query_counter.clear()
+    response = client.post("/api/transactions/check-duplicates", json=statement)
+
+    assert response.status_code == 200
+    assert response.json()["duplicates_found"] == 1000
+    # Число запросов не зависит ни от размера выписки, ни от размера таблицы
+    assert len(query_counter) <= 2
@@ -0,0 +1,175 @@
+import csv
+import time
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+
+import pytest
+from openpyxl import load_workbook
+
+from app.models import Transaction
+from app.services.export_jobs import export_jobs
+
+
+def create(client, amount, description, category, date_):
+    client.post("/api/transactions/", json={
+        "amount": amount, "description": description, "category": category, "date": date_,
+    })
+
+
+def test_export_excel(client):
+    create(client, 100.5, "Лента", "Еда", "2024-01-10")
+    create(client, 50, "Такси", "Транспорт", "2024-01-12")
+    create(client, 999, "Старое", "Еда", "2023-12-31")
+
+    response = client.get("/api/export/excel?date_from=2024-01-01")
+    assert response.status_code == 200
+    assert "transactions_from_2024-01-01.xlsx" in response.headers["content-disposition"]
+
+    ws = load_workbook(BytesIO(response.content)).active
+    rows = list(ws.iter_rows(values_only=True))
+    assert rows[0] == ("Дата", "Описание", "Категория", "Сумма (₽)")
+    assert rows[1:3] == [
+        ("12.01.2024", "Такси", "Транспорт", 50),
+        ("10.01.2024", "Лента", "Еда", 100.5),
+    ]
+    assert rows[3] == (None, None, "Итого:", 150.5)
+
+    assert ws["A1"].style == "export_header"
+    assert ws["D2"].number_format == "#,##0.00"
+    assert ws.column_dimensions["B"].width == 30
+
+
+def test_export_excel_empty_and_category_filter(client):
+    create(client, 100, "Лента", "Еда", "2024-01-10")
+
+    ws = load_workbook(BytesIO(client.get("/api/export/excel?category=Нет").content)).active
+    assert list(ws.iter_rows(values_only=True)) == [
+        ("Дата", "Описание", "Категория", "Сумма (₽)"),
+        (None, None, "Итого:", 0),
+    ]
+
+
+def test_export_csv_filters(client):
+    account = client.post("/api/accounts/", json={"name": "Карта", "account_type": "card"}).json()
+    client.post(f"/api/transactions/?account_id={account['id']}", json={
+        "amount": 100, "description": "Лента, магазин", "category": "Еда", "date": "2024-01-10",
+    })
+    client.post(f"/api/transactions/?account_id={account['id']}", json={
+        "amount": 5000, "description": "Зарплата", "category": "Доход", "date": "2024-01-11",
+        "transaction_type": "income",
+    })
+    create(client, 50, "Такси", "Транспорт", "2024-01-12")
+
+    response = client.get(f"/api/export/csv?account_id={account['id']}&transaction_type=expense")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.reader(StringIO(response.text)))
+    assert rows[0] == ["id", "date", "amount", "description", "category", "transaction_type", "account_id"]
+    assert [row[1:] for row in rows[1:]] == [
+        ["2024-01-10", "100.0", "Лента, магазин", "Еда", "expense", str(account["id"])],
+    ]
+
+    assert client.get("/api/export/csv?transaction_type=other").status_code == 422
+
+
+def test_export_csv_streams_in_batches(client, db_session, monkeypatch):
+    monkeypatch.setattr("app.services.export.EXPORT_BATCH_SIZE", 10)
+    db_session.add_all(
+        Transaction(amount=i, description=f"Покупка {i}", category="Еда", date=date(2024, 1, 1) + timedelta(days=i))
+        for i in range(25)
+    )
+    db_session.commit()
+
+    with client.stream("GET", "/api/export/csv") as response:
+        chunks = list(response.iter_bytes())
+    rows = list(csv.reader(StringIO(b"".join(chunks).decode("utf-8"))))
+    assert len(rows) == 26
+    assert rows[1][3] == "Покупка 24"
+
+
+def test_export_parquet(client):
+    pq = pytest.importorskip("pyarrow.parquet")
+    create(client, 100.5, "Лента", "Еда", "2024-01-10")
+    create(client, 50, "Такси", "Транспорт", "2024-01-12")
+
+    response = client.get("/api/export/parquet?category=Еда")
+    assert response.status_code == 200
+
+    table = pq.read_table(BytesIO(response.content))
+    assert table.column_names == ["id", "date", "amount", "description", "category", "transaction_type", "account_id"]
+    assert table.to_pydict()["description"] == ["Лента"]
+    assert table.to_pydict()["date"] == [date(2024, 1, 10)]
+
+    empty = pq.read_table(BytesIO(client.get("/api/export/parquet?category=Нет").content))
+    assert empty.num_rows == 0
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_jobs, "export_dir", tmp_path)
+    return tmp_path
+
+
+def wait_for_job(client, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/export/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"export job {job_id} did not finish")
+
+
+def test_export_job_lifecycle(client, export_dir):
+    create(client, 100, "Лента", "Еда", "2024-01-10")
+    create(client, 50, "Такси", "Транспорт", "2024-01-12")
+
+    response = client.post("/api/export/jobs", json={"format": "csv", "category": "Еда"})
+    assert response.status_code == 202
+    job = wait_for_job(client, response.json()["id"])
+
+    assert job["status"] == "done"
+    assert job["rows_total"] == job["rows_done"] == 1
+    assert job["progress"] == 1
+    assert job["download_url"] == f"/api/export/jobs/{job['id']}/download"
+    assert [p.name for p in export_dir.iterdir()] == [f"{job['id']}.csv"]
+
+    download = client.get(job["download_url"])
+    assert download.status_code == 200
+    rows = list(csv.reader(StringIO(download.text)))
+    assert [row[3] for row in rows[1:]] == ["Лента"]
+
+
+def test_export_job_without_filters_counts_all_rows(client, export_dir):
+    create(client, 100, "Лента", "Еда", "2024-01-10")
+    create(client, 50, "Такси", "Транспорт", "2024-01-12")
+    create(client, 30, "Кофе", "Кафе и рестораны", "2024-01-13")
+
+    job = wait_for_job(client, client.post("/api/export/jobs", json={"format": "csv"}).json()["id"])
+
+    assert job["rows_total"] == job["rows_done"] == 3
+    assert job["progress"] == 1
+
+
+def test_export_job_excel_and_errors(client, export_dir):
+    create(client, 100, "Лента", "Еда", "2024-01-10")
+
+    job = wait_for_job(client, client.post("/api/export/jobs", json={"date_from": "2024-01-01"}).json()["id"])
+    download = client.get(job["download_url"])
+    assert "transactions_from_2024-01-01.xlsx" in download.headers["content-disposition"]
+    assert load_workbook(BytesIO(download.content)).active["B2"].value == "Лента"
+
+    assert client.get("/api/export/jobs/unknown").status_code == 404
+    assert client.post("/api/export/jobs", json={"format": "pdf"}).status_code == 422
+
+
+def test_export_job_ttl_cleanup(client, export_dir):
+    job = wait_for_job(client, client.post("/api/export/jobs", json={"format": "csv"}).json()["id"])
+    path = export_dir / f"{job['id']}.csv"
+    assert path.exists()
+
+    export_jobs.get(job["id"]).finished_at -= timedelta(seconds=export_jobs.ttl_seconds + 1)
+
+    assert client.get(f"/api/export/jobs/{job['id']}").status_code == 404
+    assert not path.exists()
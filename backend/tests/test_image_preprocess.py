@@ -0,0 +1,78 @@
+import logging
+import random
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from app.services import image_preprocess
+from app.services.image_preprocess import prepare_image
+
+
+def noisy_image(width, height, mode="RGB"):
+    rng = random.Random(0)
+    image = Image.new(mode, (width, height))
+    image.putdata([
+        tuple(rng.randrange(256) for _ in mode) for _ in range(width * height)
+    ])
+    return image
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setattr(image_preprocess.settings, "image_preprocessing", True)
+    monkeypatch.setattr(image_preprocess.settings, "image_max_edge", 400)
+    monkeypatch.setattr(image_preprocess.settings, "image_format", "JPEG")
+    monkeypatch.setattr(image_preprocess.settings, "image_quality", 85)
+    return image_preprocess.settings
+
+
+def test_large_screenshot_is_downscaled_and_stripped(tmp_path, settings, caplog):
+    path = tmp_path / "screen.png"
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"
+    noisy_image(600, 1200).save(path, exif=exif)
+
+    with caplog.at_level(logging.INFO, logger="app.services.image_preprocess"):
+        content, media_type = prepare_image(str(path))
+
+    assert media_type == "image/jpeg"
+    assert len(content) < path.stat().st_size
+    with Image.open(BytesIO(content)) as result:
+        assert result.format == "JPEG"
+        assert result.size == (200, 400)
+        assert not result.getexif()
+
+    record = next(r for r in caplog.records if r.message == "Image prepared for upload")
+    assert record.bytes_before == path.stat().st_size
+    assert record.bytes_after == len(content)
+
+
+def test_transparent_image_to_webp(tmp_path, settings):
+    settings.image_format = "webp"
+    path = tmp_path / "screen.png"
+    noisy_image(800, 500, "RGBA").save(path)
+
+    content, media_type = prepare_image(str(path))
+
+    assert media_type == "image/webp"
+    with Image.open(BytesIO(content)) as result:
+        assert result.size == (400, 250)
+
+
+def test_small_flat_image_kept_when_recompression_does_not_help(tmp_path, settings):
+    path = tmp_path / "small.png"
+    Image.new("RGB", (100, 100), (255, 255, 255)).save(path)
+
+    assert prepare_image(str(path)) == (path.read_bytes(), "image/png")
+
+
+def test_unreadable_or_disabled_returns_original(tmp_path, settings):
+    path = tmp_path / "broken.jpg"
+    path.write_bytes(b"not an image")
+    assert prepare_image(str(path)) == (b"not an image", "image/jpeg")
+
+    settings.image_preprocessing = False
+    path = tmp_path / "screen.png"
+    noisy_image(600, 600).save(path)
+    assert prepare_image(str(path)) == (path.read_bytes(), "image/png")
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from app.config import Settings
+from app.services import ocr_service
+from app.services.llm_client import LLMClient, llm_client
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        payload = json.dumps({
+            "choices": [{"message": {"content": self.server.answer}}],
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.connections = 0
+    server.requests = []
+    server.answer = '[{"amount": 120, "description": "Лента", "date": "2024-01-10"}]'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_requests_reuse_one_connection(stub_server):
+    client = LLMClient(f"http://127.0.0.1:{stub_server.server_address[1]}/chat", http2=False)
+
+    async def run():
+        try:
+            return [
+                await client.chat_completion(
+                    [{"role": "user", "content": f"запрос {i}"}], api_key="key", model="test", max_tokens=10,
+                )
+                for i in range(5)
+            ]
+        finally:
+            await client.aclose()
+
+    answers = asyncio.run(run())
+
+    assert answers == [stub_server.answer] * 5
+    assert len(stub_server.requests) == 5
+    assert stub_server.requests[0]["model"] == "test"
+    assert stub_server.connections == 1
+
+
+def test_parsers_share_client(stub_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_client, "url", f"http://127.0.0.1:{stub_server.server_address[1]}/chat")
+    image = tmp_path / "screen.png"
+    image.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * 100)
+    settings = Settings(openrouter_api_key="key", openrouter_model="test")
+
+    async def run():
+        try:
+            return [await ocr_service.parse_screenshot(str(image)) for _ in range(3)]
+        finally:
+            await llm_client.aclose()
+
+    with patch("app.services.ocr_service.settings", settings):
+        results = asyncio.run(run())
+
+    assert [r[0].description for r in results] == ["Лента"] * 3
+    assert stub_server.connections == 1
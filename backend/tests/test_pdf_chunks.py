@@ -0,0 +1,159 @@
+import asyncio
+import json
+import re
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from app.config import Settings
+from app.schemas import ParsedTransaction
+from app.services import ocr_service
+from app.services.pdf_chunks import PdfChunk, merge_chunk_results, split_into_chunks
+
+
+def statement_pages(pages=30, rows_per_page=40):
+    return [
+        "\n".join(
+            f"{(page * rows_per_page + row) % 28 + 1:02d}.01.2024 Покупка {page * rows_per_page + row} "
+            f"-{page * rows_per_page + row + 1},00"
+            for row in range(rows_per_page)
+        )
+        for page in range(pages)
+    ]
+
+
+def test_chunks_keep_whole_rows_and_overlap():
+    pages = statement_pages(pages=5)
+    chunks = split_into_chunks(pages, max_chars=1500, overlap_lines=2)
+
+    all_lines = [line for page in pages for line in page.splitlines()]
+    assert len(chunks) > 1
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert len(chunk.text) <= 1500
+        assert set(chunk.text.splitlines()) <= set(all_lines)
+        assert chunk.overlap == "\n".join(previous.text.splitlines()[-2:])
+        assert chunk.text.startswith(chunk.overlap)
+
+    # Каждая строка выписки попала хотя бы в одно окно
+    covered = {line for chunk in chunks for line in chunk.text.splitlines()}
+    assert covered == set(all_lines)
+
+
+def test_chunks_prefer_page_boundaries():
+    pages = ["\n".join(f"страница {p} строка {r}" for r in range(10)) for p in range(4)]
+    page_size = len(pages[0]) + 1
+
+    chunks = split_into_chunks(pages, max_chars=int(page_size * 2.5), overlap_lines=0)
+
+    assert [chunk.text.splitlines()[0] for chunk in chunks] == ["страница 0 строка 0", "страница 2 строка 0"]
+
+
+def parsed(amount, description, day=1):
+    return ParsedTransaction(amount=amount, description=description, date=date(2024, 1, day), raw_text="")
+
+
+def test_long_lines_keep_chunks_within_budget():
+    lines = [f"{i:02d}.01.2024 " + "x" * 1489 for i in range(20)]
+    chunks = split_into_chunks(["\n".join(lines)], max_chars=4000, overlap_lines=3)
+
+    assert all(len(chunk.text) <= 4000 for chunk in chunks)
+    assert all(len(chunk.overlap) <= 4000 // 4 for chunk in chunks)
+    # Каждое окно добавляет несколько новых строк, а не одну
+    assert len(chunks) <= 10
+    covered = {line for chunk in chunks for line in chunk.text.splitlines()}
+    assert covered == set(lines)
+
+
+def test_merge_drops_repeats_from_overlap_only():
+    chunks = [
+        PdfChunk(text="01.01 Кофе 150,00\n01.01 Кофе 150,00\n02.01 Лента 1 250,00"),
+        PdfChunk(text="02.01 Лента 1 250,00\n03.01 Такси 300,00", overlap="02.01 Лента 1 250,00"),
+    ]
+    results = [
+        [parsed(150, "Кофе"), parsed(150, "Кофе"), parsed(1250, "Лента", 2)],
+        [parsed(1250, "Лента", 2), parsed(300, "Такси", 3)],
+    ]
+
+    merged = merge_chunk_results(chunks, results)
+
+    assert [(t.description, t.amount) for t in merged] == [
+        ("Кофе", 150), ("Кофе", 150), ("Лента", 1250), ("Такси", 300),
+    ]
+
+
+def test_long_statement_is_parsed_completely_in_parallel(monkeypatch):
+    pages = statement_pages()
+    calls = []
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_chat_completion(messages, **kwargs):
+        nonlocal in_flight, max_in_flight
+        prompt = messages[0]["content"]
+        text = prompt.split("ТЕКСТ ИЗ PDF:\n", 1)[1].split("\n\nВерни ТОЛЬКО", 1)[0]
+        calls.append(text)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        items = []
+        for line in text.splitlines():
+            day, description, amount = re.match(r"(\d\d)\.01\.2024 (.+) -(\d+),00", line).groups()
+            items.append({
+                "amount": int(amount), "description": description,
+                "transaction_type": "expense", "date": f"2024-01-{day}",
+            })
+        return json.dumps(items, ensure_ascii=False)
+
+    monkeypatch.setattr(ocr_service, "extract_pdf_pages", lambda path: pages)
+    monkeypatch.setattr(ocr_service.llm_client, "chat_completion", fake_chat_completion)
+    settings = Settings(openrouter_api_key="key", pdf_chunk_chars=4000, pdf_chunk_concurrency=64)
+
+    with patch("app.services.ocr_service.settings", settings):
+        transactions = asyncio.run(ocr_service.parse_pdf("statement.pdf"))
+
+    assert len(calls) > 10
+    assert [t.description for t in transactions] == [f"Покупка {i}" for i in range(30 * 40)]
+    # Все окна отправлены одновременно
+    assert max_in_flight == len(calls)
+
+
+def test_failed_chunk_keeps_other_results(monkeypatch):
+    pages = statement_pages(pages=3, rows_per_page=40)
+    chunks = split_into_chunks(pages, 2000, 3)
+    failing = {chunks[1].text}
+
+    async def fake_chat_completion(messages, **kwargs):
+        prompt = messages[0]["content"]
+        text = prompt.split("ТЕКСТ ИЗ PDF:\n", 1)[1].split("\n\nВерни ТОЛЬКО", 1)[0]
+        if text in failing:
+            raise RuntimeError("timeout")
+        items = []
+        for line in text.splitlines():
+            day, description, amount = re.match(r"(\d\d)\.01\.2024 (.+) -(\d+),00", line).groups()
+            items.append({
+                "amount": int(amount), "description": description,
+                "transaction_type": "expense", "date": f"2024-01-{day}",
+            })
+        return json.dumps(items, ensure_ascii=False)
+
+    monkeypatch.setattr(ocr_service, "extract_pdf_pages", lambda path: pages)
+    monkeypatch.setattr(ocr_service.llm_client, "chat_completion", fake_chat_completion)
+    settings = Settings(openrouter_api_key="key", pdf_chunk_chars=2000, pdf_chunk_overlap_lines=3)
+
+    with patch("app.services.ocr_service.settings", settings):
+        with pytest.raises(ocr_service.PdfChunksFailedError) as error:
+            asyncio.run(ocr_service.parse_pdf("statement.pdf"))
+
+    assert error.value.failed_chunks == [2]
+    assert error.value.total == len(chunks)
+    parsed = {t.description for t in error.value.transactions}
+    expected = {line.split(" ", 1)[1].rsplit(" ", 1)[0] for chunk in (chunks[0], chunks[2]) for line in chunk.text.splitlines()}
+    assert parsed == expected
+
+    # Если не распознано ни одно окно — исходная ошибка
+    failing.update(chunk.text for chunk in chunks)
+    with patch("app.services.ocr_service.settings", settings):
+        with pytest.raises(RuntimeError, match="timeout"):
+            asyncio.run(ocr_service.parse_pdf("statement.pdf"))
@@ -0,0 +1,107 @@
+"""Регрессионная проверка планов запросов к transactions и дневным агрегатам.
+
+Каждый запрос к этим таблицам, выполненный эндпоинтом, прогоняется через
+EXPLAIN QUERY PLAN: таблица должна читаться поиском по индексу, а не
+полным просмотром. Если изменение запроса или индексов возвращает
+seq scan, тест падает. Размер таблицы задаётся QUERY_PLAN_ROWS (например, 1000000
+для замера на миллионе строк).
+"""
+
+import os
+import random
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, insert
+
+from app.models import Transaction
+from app.services.periods import month_range, year_range
+from app.services.rollups import rebuild_rollups
+from tests.conftest import engine
+
+TABLES = ("transactions", "transaction_daily_rollups")
+SEED_ROWS = int(os.getenv("QUERY_PLAN_ROWS", "20000"))
+
+ENDPOINTS = [
+    "/api/reports/monthly?year=2024",
+    "/api/budgets/status?year=2024&month=3",
+    "/api/savings/monthly-status?year=2024&month=3",
+    "/api/dashboard/summary",
+    "/api/dashboard/widgets",
+    "/api/transactions/?account_id=2",
+    "/api/transactions/?account_id=2&date_from=2024-01-01&date_to=2024-03-31",
+]
+
+
+@pytest.fixture
+def seeded_client(client, db_session):
+    rng = random.Random(7)
+    categories = ["Еда", "Транспорт", "Кафе и рестораны", "Покупки", None]
+    start = date(2016, 1, 1)
+    batch = []
+    for i in range(SEED_ROWS):
+        batch.append({
+            "amount": rng.randint(100, 100_000) / 100,
+            "description": f"Операция {i}",
+            "category": rng.choice(categories),
+            "transaction_type": "income" if i % 20 == 0 else "expense",
+            "date": start + timedelta(days=rng.randint(0, 365 * 10)),
+            "account_id": rng.choice([None, 1, 2, 3]),
+        })
+        if len(batch) == 50_000:
+            db_session.execute(insert(Transaction), batch)
+            batch = []
+    if batch:
+        db_session.execute(insert(Transaction), batch)
+    db_session.commit()
+    rebuild_rollups(db_session)
+
+    client.post("/api/budgets/", json={"category": "Еда", "monthly_limit": 30000})
+    client.put("/api/settings/", json={"monthly_income": 100000, "monthly_savings_goal": 20000})
+    return client
+
+
+def capture_queries(client, url):
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 200
+    return executed
+
+
+def explain(statement, parameters):
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_queries_use_transaction_indexes(seeded_client, url):
+    executed = capture_queries(seeded_client, url)
+
+    transaction_queries = [(s, p) for s, p in executed if any(
+        f"{keyword} {table}" in s for keyword in ("FROM", "JOIN") for table in TABLES
+    )]
+    assert transaction_queries
+
+    for statement, parameters in transaction_queries:
+        plan = explain(statement, parameters)
+        transaction_steps = [step for step in plan if any(f" {table} " in f"{step} " for table in TABLES)]
+        assert transaction_steps, plan
+        for step in transaction_steps:
+            # SEARCH ... USING INDEX — диапазонное чтение; SCAN — полный просмотр
+            assert step.startswith("SEARCH") and "INDEX" in step, f"{url}: {step}\n{statement}"
+
+
+def test_month_range_is_half_open():
+    assert month_range(2024, 2) == (date(2024, 2, 1), date(2024, 3, 1))
+    assert month_range(2024, 12) == (date(2024, 12, 1), date(2025, 1, 1))
+    assert year_range(2024) == (date(2024, 1, 1), date(2025, 1, 1))
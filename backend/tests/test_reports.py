@@ -45,3 +45,46 @@ def test_monthly_report_filter_by_year(client):
     response_2024 = client.get("/api/reports/monthly?year=2024")
     may_2024 = next(r for r in response_2024.json() if "Май" in r["month"])
     assert may_2024["total"] == 2000
+
+
+def test_monthly_report_year_range(client):
+    client.post("/api/transactions/", json={
+        "amount": 1000, "description": "Test", "category": "Еда", "date": "2023-12-31"
+    })
+    client.post("/api/transactions/", json={
+        "amount": 2000, "description": "Test", "category": "Еда", "date": "2024-01-01"
+    })
+    client.post("/api/transactions/", json={
+        "amount": 50000, "description": "Зарплата", "category": "Зарплата",
+        "transaction_type": "income", "date": "2024-01-05"
+    })
+    client.post("/api/transactions/", json={
+        "amount": 9999, "description": "Test", "date": "2025-01-01"
+    })
+
+    response = client.get("/api/reports/monthly?year_from=2023&year_to=2024")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 24
+    assert data[0]["month"] == "Январь 2023"
+    assert data[-1]["month"] == "Декабрь 2024"
+
+    december_2023 = data[11]
+    assert december_2023["month"] == "Декабрь 2023"
+    assert december_2023["total"] == 1000
+    january_2024 = data[12]
+    assert january_2024["total"] == 2000
+    assert january_2024["by_category"] == {"Еда": 2000}
+    assert january_2024["income"] == 50000
+    assert january_2024["income_count"] == 1
+    assert sum(r["total"] for r in data) == 3000
+
+
+def test_monthly_report_invalid_year_range(client):
+    response = client.get("/api/reports/monthly?year_from=2025&year_to=2024")
+    assert response.status_code == 400
+
+
+def test_monthly_report_out_of_range_year(client):
+    for params in ("year=0", "year=9999", "year_from=9999", "year_to=0"):
+        assert client.get(f"/api/reports/monthly?{params}").status_code == 422
@@ -0,0 +1,138 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app.models import Transaction, TransactionDailyRollup
+from app.services.rollups import add_to_rollups, apply_rollup_deltas, rebuild_rollups
+
+
+def rollup_snapshot(db):
+    db.expire_all()
+    rows = db.query(
+        TransactionDailyRollup.date,
+        TransactionDailyRollup.account_id,
+        TransactionDailyRollup.category,
+        TransactionDailyRollup.transaction_type,
+        func.round(func.sum(TransactionDailyRollup.total), 2),
+        func.sum(TransactionDailyRollup.count),
+    ).group_by(
+        TransactionDailyRollup.date,
+        TransactionDailyRollup.account_id,
+        TransactionDailyRollup.category,
+        TransactionDailyRollup.transaction_type,
+    ).all()
+    return sorted((tuple(row) for row in rows), key=str)
+
+
+def expected_snapshot(db):
+    rows = db.query(
+        Transaction.date,
+        Transaction.account_id,
+        Transaction.category,
+        Transaction.transaction_type,
+        func.round(func.sum(Transaction.amount), 2),
+        func.count(Transaction.id),
+    ).group_by(
+        Transaction.date,
+        Transaction.account_id,
+        Transaction.category,
+        Transaction.transaction_type,
+    ).all()
+    return sorted((tuple(row) for row in rows), key=str)
+
+
+def test_rollups_follow_transaction_changes(client, db_session):
+    account = client.post("/api/accounts/", json={"name": "Карта", "account_type": "card"}).json()
+
+    first = client.post("/api/transactions/", json={
+        "amount": 100, "description": "Лента", "category": "Еда", "date": "2024-01-10",
+    }).json()
+    client.post(f"/api/transactions/?account_id={account['id']}", json={
+        "amount": 50, "description": "Такси", "category": "Транспорт", "date": "2024-01-10",
+    })
+    client.post(f"/api/transactions/bulk?account_id={account['id']}", json=[
+        {"amount": 10, "description": "Кофе", "category": "Кафе и рестораны", "date": "2024-01-11"},
+        {"amount": 20, "description": "Кофе", "category": "Кафе и рестораны", "date": "2024-01-11"},
+        {"amount": 5000, "description": "Зарплата", "transaction_type": "income", "date": "2024-01-12"},
+    ])
+    assert rollup_snapshot(db_session) == expected_snapshot(db_session)
+
+    # Изменение суммы, категории и даты переносит сумму между ключами
+    client.put(f"/api/transactions/{first['id']}", json={
+        "amount": 150, "category": "Покупки", "date": "2024-02-01",
+    })
+    assert rollup_snapshot(db_session) == expected_snapshot(db_session)
+
+    client.delete(f"/api/transactions/{first['id']}")
+    assert rollup_snapshot(db_session) == expected_snapshot(db_session)
+
+    client.post("/api/transactions/bulk-delete", json={"date_from": "2024-01-11", "date_to": "2024-01-11"})
+    assert rollup_snapshot(db_session) == expected_snapshot(db_session)
+
+    payment = client.post("/api/recurring/", json={
+        "amount": 300, "description": "Интернет", "category": "ЖКХ",
+        "frequency": "monthly", "next_date": "2024-01-01",
+    }).json()
+    client.post(f"/api/recurring/{payment['id']}/execute")
+    assert rollup_snapshot(db_session) == expected_snapshot(db_session)
+
+    # Пустые ключи удаляются, а не остаются с нулевым счётчиком
+    assert db_session.query(TransactionDailyRollup).filter(TransactionDailyRollup.count <= 0).count() == 0
+
+
+def test_rebuild_rollups(client, db_session):
+    client.post("/api/transactions/", json={"amount": 100, "description": "Лента", "date": "2024-01-10"})
+    client.post("/api/transactions/", json={"amount": 200, "description": "Лента", "date": "2024-01-10"})
+
+    # Повреждённые агрегаты восстанавливаются полным пересчётом
+    db_session.query(TransactionDailyRollup).update({TransactionDailyRollup.total: 0})
+    db_session.commit()
+    assert rollup_snapshot(db_session) != expected_snapshot(db_session)
+
+    assert rebuild_rollups(db_session) == 1
+    assert rollup_snapshot(db_session) == expected_snapshot(db_session)
+
+
+def test_rollup_deltas_are_upserted_in_sql(db_session):
+    key = (date(2024, 1, 10), None, None, "expense")
+    # Каждая дельта прибавляется к строке в базе, а не к прочитанному ранее значению
+    apply_rollup_deltas(db_session, {key: [100.0, 1]})
+    apply_rollup_deltas(db_session, {key: [50.0, 1]})
+    db_session.commit()
+
+    row = db_session.query(TransactionDailyRollup).one()
+    assert (row.total, row.count) == (150.0, 2)
+
+    apply_rollup_deltas(db_session, {key: [-150.0, -2]})
+    db_session.commit()
+    assert db_session.query(TransactionDailyRollup).count() == 0
+
+
+def test_rollup_key_is_unique_with_nulls(db_session):
+    for _ in range(2):
+        db_session.add(TransactionDailyRollup(
+            date=date(2024, 1, 10), account_id=None, category=None, transaction_type="expense", total=1, count=1,
+        ))
+    with pytest.raises(IntegrityError):
+        db_session.commit()
+    db_session.rollback()
+
+
+def test_empty_category_and_null_share_rollup_row(client, db_session):
+    day = date(2024, 1, 10)
+    add_to_rollups(db_session, [
+        SimpleNamespace(date=day, account_id=None, category="", transaction_type="expense", amount=100.0),
+        SimpleNamespace(date=day, account_id=None, category=None, transaction_type="expense", amount=50.0),
+    ])
+    db_session.commit()
+    row = db_session.query(TransactionDailyRollup).one()
+    assert (row.category, row.total, row.count) == (None, 150.0, 2)
+
+    client.post("/api/transactions/", json={"amount": 10, "description": "Лента", "category": "", "date": "2024-01-11"})
+    client.post("/api/transactions/", json={"amount": 20, "description": "Такси", "date": "2024-01-11"})
+    rebuild_rollups(db_session)
+    rows = db_session.query(TransactionDailyRollup).all()
+    assert [(r.category, r.total, r.count) for r in rows] == [(None, 30.0, 2)]
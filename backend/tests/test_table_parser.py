@@ -0,0 +1,202 @@
+import asyncio
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from app.config import Settings
+from app.services import ocr_service
+from app.services.bank_profiles import (
+    BANK_PROFILES,
+    BankProfile,
+    detect_profile,
+    detect_profiles,
+    register_profile,
+    unregister_profile,
+)
+from app.services.table_parser import parse_amount, parse_statement_tables, parse_tables
+
+
+def make_pdf(texts, lines=()):
+    """Одностраничный PDF: texts — (x, y, текст) шрифтом Helvetica, lines — отрезки (x1, y1, x2, y2)."""
+    stream = "".join(f"BT /F1 10 Tf {x} {y} Td ({text}) Tj ET\n" for x, y, text in texts)
+    stream += "".join(f"{x1} {y1} m {x2} {y2} l S\n" for x1, y1, x2, y2 in lines)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 600 800] "
+        "/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}endstream",
+    ]
+    pdf = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return pdf.encode("latin-1")
+
+
+@pytest.fixture
+def test_bank():
+    profile = BankProfile(
+        name="testbank",
+        markers=("test bank",),
+        date_column="Date",
+        description_column="Description",
+        amount_column="Amount",
+    )
+    register_profile(profile)
+    yield profile
+    unregister_profile("testbank")
+
+
+def test_parse_amount_formats():
+    assert parse_amount("-1 234,56 ₽") == (1234.56, "-")
+    assert parse_amount("+5 000,00 RUB") == (5000.0, "+")
+    assert parse_amount("−350,00") == (350.0, "-")
+    assert parse_amount("150.5") == (150.5, "")
+    assert parse_amount("Итого") is None
+
+
+def test_detect_builtin_profiles():
+    assert detect_profile("АО «ТБанк» ... Т-Банк выписка").name == "tbank"
+    assert detect_profile("ПАО СБЕРБАНК\nВыписка по счёту").name == "sber"
+    assert detect_profile("Какой-то другой банк") is None
+
+
+def test_parse_tables_with_russian_headers():
+    tbank = next(p for p in BANK_PROFILES if p.name == "tbank")
+    tables = [[
+        ["Дата\nоперации", "Дата\nсписания", "Сумма операции", "Описание"],
+        ["01.02.2024\n12:30", "02.02.2024", "-1 250,00 ₽", "Пятёрочка"],
+        [None, None, None, "Москва"],
+        ["03.02.2024", "03.02.2024", "+50 000,00 ₽", "Зарплата"],
+        ["", "", "Итого", ""],
+    ]]
+
+    rows = parse_tables(tbank, tables)
+
+    assert [(r.date, r.description, r.amount, r.transaction_type) for r in rows] == [
+        (date(2024, 2, 1), "Пятёрочка Москва", 1250.0, "expense"),
+        (date(2024, 2, 3), "Зарплата", 50000.0, "income"),
+    ]
+
+
+def test_separate_income_and_expense_columns():
+    alfa = next(p for p in BANK_PROFILES if p.name == "alfa")
+    tables = [[
+        ["Дата", "Описание", "Приход", "Расход"],
+        ["05.03.2024", "Перевод от Ивана", "1 000,00", ""],
+        ["06.03.2024", "Лента", "", "420,50"],
+    ]]
+
+    rows = parse_tables(alfa, tables)
+
+    assert [(r.amount, r.transaction_type) for r in rows] == [(1000.0, "income"), (420.5, "expense")]
+
+
+def test_word_positions_statement(tmp_path, test_bank):
+    path = tmp_path / "statement.pdf"
+    path.write_bytes(make_pdf([
+        (50, 760, "Test Bank statement"),
+        (50, 700, "Date"), (150, 700, "Description"), (450, 700, "Amount"),
+        (50, 680, "01.02.2024"), (150, 680, "Lenta supermarket"), (440, 680, "-1 250,00"),
+        (150, 669, "Moscow"),
+        (50, 650, "03.02.2024"), (150, 650, "Salary"), (440, 650, "+50 000,00"),
+        (50, 600, "Total"), (440, 600, "48 750,00"),
+    ]))
+
+    transactions = parse_statement_tables(str(path))
+
+    assert [(t.date, t.description, t.amount, t.transaction_type) for t in transactions] == [
+        (date(2024, 2, 1), "Lenta supermarket Moscow", 1250.0, "expense"),
+        (date(2024, 2, 3), "Salary", 50000.0, "income"),
+    ]
+    assert transactions[0].category == "Еда"
+    assert transactions[0].raw_text.startswith("PDF (testbank):")
+
+
+def test_ruled_table_statement(tmp_path, test_bank):
+    xs, ys = [40, 140, 420, 540], [710, 690, 670, 650]
+    grid = [(x, ys[0], x, ys[-1]) for x in xs] + [(xs[0], y, xs[-1], y) for y in ys]
+    path = tmp_path / "statement.pdf"
+    path.write_bytes(make_pdf([
+        (50, 760, "Test Bank statement"),
+        (50, 696, "Date"), (150, 696, "Description"), (430, 696, "Amount"),
+        (50, 676, "01.02.2024"), (150, 676, "Ozon"), (430, 676, "-890,00"),
+        (50, 656, "02.02.2024"), (150, 656, "Taxi"), (430, 656, "-350,00"),
+    ], grid))
+
+    transactions = parse_statement_tables(str(path))
+
+    assert [(t.description, t.amount) for t in transactions] == [("Ozon", 890.0), ("Taxi", 350.0)]
+
+
+def test_all_matching_profiles_are_tried(tmp_path, test_bank):
+    # Профиль с тем же маркером, но другими колонками, зарегистрирован раньше
+    decoy = BankProfile(
+        name="decoy",
+        markers=("statement",),
+        date_column="Posted",
+        description_column="Details",
+        amount_column="Sum",
+    )
+    unregister_profile(test_bank.name)
+    register_profile(decoy)
+    register_profile(test_bank)
+    try:
+        path = tmp_path / "statement.pdf"
+        path.write_bytes(make_pdf([
+            (50, 760, "Test Bank statement"),
+            (50, 700, "Date"), (150, 700, "Description"), (450, 700, "Amount"),
+            (50, 680, "01.02.2024"), (150, 680, "Taxi"), (440, 680, "-350,00"),
+        ]))
+
+        assert [p.name for p in detect_profiles("Test Bank statement")] == ["decoy", "testbank"]
+        transactions = parse_statement_tables(str(path))
+    finally:
+        unregister_profile(decoy.name)
+
+    assert [(t.description, t.amount) for t in transactions] == [("Taxi", 350.0)]
+    assert transactions[0].raw_text.startswith("PDF (testbank):")
+
+
+def test_unknown_bank_falls_back_to_model(tmp_path, monkeypatch):
+    path = tmp_path / "statement.pdf"
+    path.write_bytes(make_pdf([(50, 760, "Unknown bank"), (50, 700, "01.02.2024 Lenta -100,00")]))
+    assert parse_statement_tables(str(path)) is None
+    assert parse_statement_tables(str(tmp_path / "missing.pdf")) is None
+
+    calls = []
+
+    async def fake_chat_completion(messages, **kwargs):
+        calls.append(messages)
+        return '[{"amount": 100, "description": "Lenta", "date": "2024-02-01"}]'
+
+    monkeypatch.setattr(ocr_service.llm_client, "chat_completion", fake_chat_completion)
+    with patch("app.services.ocr_service.settings", Settings(openrouter_api_key="key")):
+        transactions = asyncio.run(ocr_service.parse_pdf(str(path)))
+    assert len(calls) == 1
+    assert transactions[0].description == "Lenta"
+
+
+def test_known_bank_is_parsed_without_model(tmp_path, monkeypatch, test_bank):
+    path = tmp_path / "statement.pdf"
+    path.write_bytes(make_pdf([
+        (50, 760, "Test Bank statement"),
+        (50, 700, "Date"), (150, 700, "Description"), (450, 700, "Amount"),
+        (50, 680, "01.02.2024"), (150, 680, "Ozon"), (440, 680, "-890,00"),
+    ]))
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("model must not be called")
+
+    monkeypatch.setattr(ocr_service.llm_client, "chat_completion", fail)
+    with patch("app.services.ocr_service.settings", Settings(openrouter_api_key="key")):
+        transactions = asyncio.run(ocr_service.parse_pdf(str(path)))
+    assert [(t.description, t.amount) for t in transactions] == [("Ozon", 890.0)]
@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_create_transaction(client, sample_transaction):
     response = client.post("/api/transactions/", json=sample_transaction)
     assert response.status_code == 200
@@ -91,3 +94,202 @@ def test_filter_by_category(client, sample_transaction):
     response = client.get("/api/transactions/?category=Транспорт")
     assert response.status_code == 200
     assert len(response.json()) == 0
+
+
+def _walk_pages(client, params):
+    seen = []
+    cursor = None
+    while True:
+        query = dict(params)
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/api/transactions/", params=query)
+        assert response.status_code == 200
+        seen.extend(t["id"] for t in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return seen
+
+
+@pytest.mark.parametrize("sort_by", ["date", "amount", "description"])
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_cursor_pagination(client, sort_by, sort_order):
+    # Повторяющиеся значения проверяют разрешение «ничьих» по id
+    for i in range(7):
+        client.post("/api/transactions/", json={
+            "amount": 100 * (i % 3),
+            "description": f"Магазин {i % 2}",
+            "date": f"2024-01-{10 + i % 3:02d}",
+        })
+
+    expected = [t["id"] for t in client.get(
+        "/api/transactions/", params={"sort_by": sort_by, "sort_order": sort_order}
+    ).json()]
+    pages = _walk_pages(client, {"sort_by": sort_by, "sort_order": sort_order, "limit": 3})
+
+    assert pages == expected
+    assert len(set(pages)) == 7
+
+
+def test_cursor_pagination_last_page_has_no_cursor(client, sample_transaction):
+    client.post("/api/transactions/", json=sample_transaction)
+    response = client.get("/api/transactions/?limit=1")
+    assert response.status_code == 200
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_cursor_pagination_invalid_cursor(client):
+    response = client.get("/api/transactions/?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_search_transactions(client):
+    for description, day in [("Кофемания", "10"), ("Кофе с собой", "12"), ("Лента", "11"), ("Чашка Кофе", "13")]:
+        client.post("/api/transactions/", json={
+            "amount": 100, "description": description, "date": f"2024-01-{day}",
+        })
+
+    response = client.get("/api/transactions/search?q=Кофе")
+    assert response.status_code == 200
+    descriptions = [t["description"] for t in response.json()]
+    # Совпадения по началу описания идут первыми, внутри группы — новые выше
+    assert descriptions == ["Кофе с собой", "Кофемания", "Чашка Кофе"]
+
+
+def test_search_escapes_like_wildcards(client, sample_transaction):
+    client.post("/api/transactions/", json=sample_transaction)
+
+    response = client.get("/api/transactions/", params={"search": "%"})
+    assert response.status_code == 200
+    assert response.json() == []
+
+    response = client.get("/api/transactions/search", params={"q": "_"})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_create_transactions_bulk(client):
+    account = client.post("/api/accounts/", json={
+        "name": "Карта", "account_type": "card", "balance": 1000,
+    }).json()
+    transactions = [
+        {"amount": 300, "description": "Лента", "category": "Еда", "date": "2024-01-10"},
+        {"amount": 200, "description": "Такси", "date": "2024-01-11"},
+        {"amount": 5000, "description": "Зарплата", "transaction_type": "income", "date": "2024-01-12"},
+    ]
+
+    response = client.post(f"/api/transactions/bulk?account_id={account['id']}", json=transactions)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created_count"] == 3
+    assert [t["description"] for t in data["transactions"]] == ["Лента", "Такси", "Зарплата"]
+    assert all(t["id"] and t["account_id"] == account["id"] for t in data["transactions"])
+
+    assert len(client.get("/api/transactions/").json()) == 3
+    balance = client.get(f"/api/accounts/{account['id']}").json()["balance"]
+    assert balance == 1000 - 300 - 200 + 5000
+
+
+def test_create_transactions_bulk_empty(client):
+    response = client.post("/api/transactions/bulk", json=[])
+    assert response.status_code == 200
+    assert response.json() == {"created_count": 0, "skipped_count": 0, "transactions": []}
+
+
+def test_check_duplicates(client):
+    client.post("/api/transactions/", json={"amount": 350, "description": "Яндекс.Такси поездка", "date": "2024-01-15"})
+    client.post("/api/transactions/", json={"amount": 1000, "description": "Лента", "date": "2024-01-15"})
+
+    response = client.post("/api/transactions/check-duplicates", json=[
+        {"amount": 350.01, "description": "яндекс.такси", "date": "2024-01-16"},  # дубликат
+        {"amount": 350, "description": "Яндекс.Такси", "date": "2024-01-18"},  # другая дата
+        {"amount": 1000, "description": "Лента", "date": "2024-01-15", "transaction_type": "income"},
+        {"amount": 999, "description": "Лента", "date": "2024-01-15"},  # другая сумма
+    ])
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_checked"] == 4
+    assert data["duplicates_found"] == 1
+    assert data["duplicates"][0]["index"] == 0
+    assert data["duplicates"][0]["similar_transactions"][0]["description"] == "Яндекс.Такси поездка"
+
+
+def test_check_duplicates_single_query(client, query_counter):
+    batch = [
+        {"amount": 100 + i, "description": f"Магазин {i}", "date": f"2024-01-{1 + i % 28:02d}"}
+        for i in range(50)
+    ]
+    client.post("/api/transactions/bulk", json=batch)
+
+    query_counter.clear()
+    response = client.post("/api/transactions/check-duplicates", json=batch)
+    assert response.json()["duplicates_found"] == 50
+    # Точные совпадения по отпечатку + нечёткая проверка остальных
+    assert len(query_counter) <= 2
+
+
+def test_check_duplicates_exact_match(client):
+    transaction = {"amount": 350, "description": "Яндекс  Такси", "date": "2024-01-15"}
+    client.post("/api/transactions/", json=transaction)
+
+    response = client.post("/api/transactions/check-duplicates", json=[
+        {"amount": 350, "description": "яндекс такси", "date": "2024-01-15"},
+    ])
+    duplicates = response.json()["duplicates"]
+    assert len(duplicates) == 1
+    assert duplicates[0]["exact_match"] is True
+
+
+def test_create_transaction_on_conflict_skip(client, sample_transaction):
+    first = client.post("/api/transactions/", json=sample_transaction).json()
+
+    response = client.post("/api/transactions/?on_conflict=skip", json=sample_transaction)
+    assert response.status_code == 200
+    assert response.json()["id"] == first["id"]
+    assert len(client.get("/api/transactions/").json()) == 1
+
+    # Без on_conflict одинаковые транзакции по-прежнему разрешены
+    client.post("/api/transactions/", json=sample_transaction)
+    assert len(client.get("/api/transactions/").json()) == 2
+
+
+def test_create_transactions_bulk_on_conflict_skip(client):
+    account = client.post("/api/accounts/", json={"name": "Карта", "account_type": "card", "balance": 0}).json()
+    statement = [
+        {"amount": 300, "description": "Лента", "date": "2024-01-10"},
+        {"amount": 200, "description": "Такси", "date": "2024-01-11"},
+    ]
+    url = f"/api/transactions/bulk?account_id={account['id']}&on_conflict=skip"
+    client.post(url, json=statement[:1])
+
+    response = client.post(url, json=statement)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created_count"] == 1
+    assert data["skipped_count"] == 1
+    assert data["transactions"][0]["description"] == "Такси"
+    assert client.get(f"/api/accounts/{account['id']}").json()["balance"] == -500
+
+
+def test_create_transactions_bulk_on_conflict_skip_within_request(client):
+    statement = [
+        {"amount": 300, "description": "Лента", "date": "2024-01-10"},
+        {"amount": 300, "description": "Лента", "date": "2024-01-10"},
+        {"amount": 200, "description": "Такси", "date": "2024-01-11"},
+    ]
+    response = client.post("/api/transactions/bulk?on_conflict=skip", json=statement)
+    data = response.json()
+    # Повторы внутри выписки — разные покупки, пропускаются только уже сохранённые
+    assert data["created_count"] == 3
+    assert data["skipped_count"] == 0
+    assert len(client.get("/api/transactions/").json()) == 3
+
+
+def test_update_transaction_refreshes_fingerprint(client, sample_transaction):
+    transaction_id = client.post("/api/transactions/", json=sample_transaction).json()["id"]
+    client.put(f"/api/transactions/{transaction_id}", json={"amount": 10})
+
+    response = client.post("/api/transactions/check-duplicates", json=[
+        dict(sample_transaction, amount=10),
+    ])
+    assert response.json()["duplicates"][0]["exact_match"] is True
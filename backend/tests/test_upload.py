@@ -1,4 +1,16 @@
+import asyncio
 import io
+import threading
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.config import Settings
+from app.models import ParseResultCache
+from app.schemas import ParsedTransaction
+from app.services.parse_cache import evict, get_cached_result, store_result
 
 
 def test_upload_screenshot(client):
@@ -30,3 +42,295 @@ def test_upload_non_image(client):
         files={"file": ("test.txt", fake_file, "text/plain")}
     )
     assert response.status_code == 400
+
+
+def test_upload_batch_runs_files_concurrently(client, tmp_path, monkeypatch):
+    from app.routers import upload
+
+    monkeypatch.setattr(upload.settings, "upload_dir", str(tmp_path))
+    monkeypatch.setattr(upload.settings, "upload_concurrency", 3)
+    running = 0
+    max_running = 0
+
+    async def fake_parse_screenshot(path):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.1)
+        running -= 1
+        if "broken" in open(path, "rb").read().decode():
+            raise ValueError("плохой файл")
+        return [ParsedTransaction(amount=1, description=open(path, "rb").read().decode(), date=date(2024, 1, 1), raw_text="")]
+
+    monkeypatch.setattr(upload, "parse_screenshot", fake_parse_screenshot)
+
+    names = ["a", "b", "broken", "d", "e", "f"]
+    response = client.post(
+        "/api/upload/batch",
+        files=[("files", (f"{name}.png", io.BytesIO(name.encode()), "image/png")) for name in names],
+    )
+
+    results = response.json()["results"]
+    assert [r["filename"] for r in results] == [f"{name}.png" for name in names]
+    assert [r["success"] for r in results] == [True, True, False, True, True, True]
+    assert results[2]["error"] == "Ошибка распознавания: плохой файл"
+    assert results[5]["data"][0]["description"] == "f"
+    # Файлы распознаются параллельно, но не больше upload_concurrency за раз
+    assert max_running == 3
+
+
+@pytest.fixture
+def counting_parser(tmp_path, monkeypatch):
+    from app.routers import upload
+
+    monkeypatch.setattr(upload.settings, "upload_dir", str(tmp_path))
+    calls = []
+
+    async def fake_parse_screenshot(path):
+        calls.append(path)
+        return [ParsedTransaction(amount=len(calls), description="Лента", date=date(2024, 1, 1), raw_text="")]
+
+    monkeypatch.setattr(upload, "parse_screenshot", fake_parse_screenshot)
+    return calls
+
+
+def upload_png(client, content, params=""):
+    return client.post(f"/api/upload{params}", files={"file": ("screen.png", io.BytesIO(content), "image/png")})
+
+
+def test_upload_reuses_cached_parse_result(client, counting_parser):
+    with patch("app.services.ocr_service.settings", Settings(openrouter_api_key="key", openrouter_model="m1")):
+        first = upload_png(client, b"same screenshot").json()
+        second = upload_png(client, b"same screenshot").json()
+        assert second == first
+        assert len(counting_parser) == 1
+
+        # Флаг no_cache распознаёт заново и обновляет кэш
+        refreshed = upload_png(client, b"same screenshot", "?no_cache=true").json()
+        assert refreshed[0]["amount"] == 2
+        assert upload_png(client, b"same screenshot").json() == refreshed
+
+        upload_png(client, b"other screenshot")
+        assert len(counting_parser) == 3
+
+    # Другая модель — другой ключ кэша
+    with patch("app.services.ocr_service.settings", Settings(openrouter_api_key="key", openrouter_model="m2")):
+        upload_png(client, b"same screenshot")
+    assert len(counting_parser) == 4
+
+
+def test_upload_streams_file_in_chunks(client, db_session, counting_parser, tmp_path, monkeypatch):
+    import hashlib
+    from starlette.datastructures import UploadFile
+    from app.routers import upload
+
+    monkeypatch.setattr(upload.settings, "upload_chunk_bytes", 4)
+    reads = []
+    original_read = UploadFile.read
+
+    async def counting_read(self, size=-1):
+        reads.append(size)
+        return await original_read(self, size)
+
+    monkeypatch.setattr(UploadFile, "read", counting_read)
+    content = b"screenshot bytes"
+
+    with patch("app.services.ocr_service.settings", Settings(openrouter_api_key="key", openrouter_model="m1")):
+        assert upload_png(client, content).status_code == 200
+        assert reads and set(reads) == {4}
+        [saved] = tmp_path.iterdir()
+        assert saved.read_bytes() == content
+
+        # Хэш, посчитанный по кускам, совпадает с хэшем всего файла
+        entry = db_session.query(ParseResultCache).one()
+        assert entry.content_hash == hashlib.sha256(content).hexdigest()
+
+        # Повторная загрузка берётся из кэша, лишняя копия файла удаляется
+        assert upload_png(client, content).status_code == 200
+        assert len(counting_parser) == 1
+        assert list(tmp_path.iterdir()) == [saved]
+
+
+def test_upload_rejects_oversized_file(client, counting_parser, tmp_path, monkeypatch):
+    from app.routers import upload
+
+    monkeypatch.setattr(upload.settings, "upload_max_file_bytes", 10)
+    response = upload_png(client, b"x" * 11)
+    assert response.status_code == 413
+    assert "МБ" in response.json()["detail"]
+    assert counting_parser == []
+    assert list(tmp_path.iterdir()) == []
+
+    assert upload_png(client, b"x" * 10).status_code == 200
+
+
+def test_upload_stops_writing_when_size_unknown(tmp_path):
+    from starlette.datastructures import UploadFile
+    from app.services.uploads import UploadTooLargeError, save_upload
+
+    # Размер не передан клиентом — лимит проверяется по мере записи
+    file = UploadFile(io.BytesIO(b"x" * 100), filename="big.png")
+    target = tmp_path / "big.png"
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(save_upload(file, target, max_bytes=50))
+    assert not target.exists()
+
+
+def test_upload_batch_limits(client, counting_parser, tmp_path, monkeypatch):
+    from app.routers import upload
+
+    monkeypatch.setattr(upload.settings, "upload_max_file_bytes", 10)
+    monkeypatch.setattr(upload.settings, "upload_max_batch_bytes", 25)
+
+    def post(*sizes):
+        files = [("files", (f"{i}.png", io.BytesIO(b"x" * size), "image/png")) for i, size in enumerate(sizes)]
+        return client.post("/api/upload/batch", files=files)
+
+    # Слишком большой файл отклоняется, остальные распознаются
+    results = post(5, 11).json()["results"]
+    assert [r["success"] for r in results] == [True, False]
+    assert "МБ" in results[1]["error"]
+
+    # Превышение лимита пакета отклоняет весь запрос
+    assert post(10, 10, 10).status_code == 413
+    assert len(counting_parser) == 1
+
+
+def test_upload_rejected_by_content_length(client, counting_parser, monkeypatch):
+    from app.middleware import MULTIPART_OVERHEAD_BYTES
+    from app.routers import upload
+
+    monkeypatch.setattr(upload.settings, "upload_max_file_bytes", 10)
+    response = upload_png(client, b"x" * (MULTIPART_OVERHEAD_BYTES + 100))
+    assert response.status_code == 413
+    assert counting_parser == []
+
+
+def test_parse_cache_runs_outside_event_loop(client, counting_parser, monkeypatch):
+    from app.routers import upload
+
+    threads = []
+    for name in ("load_cached_result", "save_result"):
+        original = getattr(upload, name)
+
+        def recording(*args, _original=original):
+            threads.append(threading.current_thread().name)
+            return _original(*args)
+
+        monkeypatch.setattr(upload, name, recording)
+
+    with patch("app.services.ocr_service.settings", Settings(openrouter_api_key="key", openrouter_model="m1")):
+        upload_png(client, b"screenshot")
+
+    assert len(threads) == 2
+    assert all(name.startswith("blocking-io") for name in threads)
+
+
+def test_parse_cache_eviction(client, db_session):
+    transactions = [ParsedTransaction(amount=1, description="Лента", date=date(2024, 1, 1), raw_text="")]
+    for i in range(5):
+        store_result(db_session, f"hash{i}", "m", "v1", transactions)
+
+    old = db_session.query(ParseResultCache).filter_by(content_hash="hash0").one()
+    old.created_at = datetime.now(timezone.utc) - timedelta(days=40)
+    db_session.commit()
+    # hash1 использовался недавно, поэтому переживёт вытеснение по размеру
+    db_session.query(ParseResultCache).filter_by(content_hash="hash1").update(
+        {"last_used_at": datetime.now(timezone.utc) + timedelta(minutes=1)}
+    )
+    db_session.commit()
+
+    assert evict(db_session, max_age_days=30, max_entries=2) == 3
+    assert {e.content_hash for e in db_session.query(ParseResultCache)} == {"hash1", "hash4"}
+    assert get_cached_result(db_session, "hash1", "m", "v1") == transactions
+    assert get_cached_result(db_session, "hash1", "m", "v2") is None
+
+
+def test_refreshed_parse_result_is_not_evicted_as_old(client, db_session):
+    transactions = [ParsedTransaction(amount=1, description="Лента", date=date(2024, 1, 1), raw_text="")]
+    store_result(db_session, "hash0", "m", "v1", transactions)
+    db_session.query(ParseResultCache).update({"created_at": datetime.now(timezone.utc) - timedelta(days=40)})
+    db_session.commit()
+
+    # Повторное распознавание (no_cache) перезаписывает результат
+    store_result(db_session, "hash0", "m", "v1", transactions)
+
+    assert evict(db_session, max_age_days=30) == 0
+    assert get_cached_result(db_session, "hash0", "m", "v1") == transactions
+
+
+def test_pdf_extraction_does_not_block_other_requests(client, tmp_path, monkeypatch):
+    from app.main import app
+    from app.routers import upload
+    from app.services import ocr_service
+
+    monkeypatch.setattr(upload.settings, "upload_dir", str(tmp_path))
+
+    extracting = threading.Event()
+    release = threading.Event()
+    extracted = threading.Event()
+
+    def slow_extract_pdf_pages(path):
+        # Имитация разбора большого PDF: держит поток, пока его не отпустят
+        extracting.set()
+        release.wait(timeout=2)
+        extracted.set()
+        return ["Лента 100"]
+
+    async def fake_chat_completion(messages, **kwargs):
+        return "[]"
+
+    monkeypatch.setattr(ocr_service, "extract_pdf_pages", slow_extract_pdf_pages)
+    monkeypatch.setattr(ocr_service.llm_client, "chat_completion", fake_chat_completion)
+
+    async def get_during_extraction(http):
+        await asyncio.to_thread(extracting.wait, 2)
+        response = await http.get("/")
+        # Ответ получен, пока разбор PDF ещё не закончился
+        completed_during_extraction = not extracted.is_set()
+        release.set()
+        return response, completed_during_extraction
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(
+                http.post("/api/upload", files={"file": ("big.pdf", io.BytesIO(b"%PDF-1.4"), "application/pdf")}),
+                get_during_extraction(http),
+            )
+
+    with patch("app.services.ocr_service.settings", Settings(openrouter_api_key="key", openrouter_model="m")):
+        upload_response, (response, completed_during_extraction) = asyncio.run(run())
+
+    assert upload_response.status_code == 200
+    assert response.status_code == 200
+    assert completed_during_extraction
+
+
+def test_partially_parsed_pdf_reports_failed_chunks(client, db_session, tmp_path, monkeypatch):
+    from app.routers import upload
+    from app.services.ocr_service import PdfChunksFailedError
+
+    monkeypatch.setattr(upload.settings, "upload_dir", str(tmp_path))
+    parsed = [ParsedTransaction(amount=100, description="Лента", date=date(2024, 1, 1), raw_text="")]
+
+    async def partial_parse_pdf(path):
+        raise PdfChunksFailedError(parsed, [2, 4], 5)
+
+    monkeypatch.setattr(upload, "parse_pdf", partial_parse_pdf)
+    pdf = ("statement.pdf", io.BytesIO(b"%PDF-1.4"), "application/pdf")
+
+    with patch("app.services.ocr_service.settings", Settings(openrouter_api_key="key", openrouter_model="m")):
+        response = client.post("/api/upload", files={"file": pdf})
+        assert response.status_code == 200
+        assert [t["description"] for t in response.json()] == ["Лента"]
+        assert response.headers["X-Parse-Failed-Chunks"] == "2,4"
+        assert response.headers["X-Parse-Total-Chunks"] == "5"
+
+        pdf[1].seek(0)
+        [result] = client.post("/api/upload/batch", files=[("files", pdf)]).json()["results"]
+        assert result["success"] is True
+        assert "2, 4 из 5" in result["error"]
+
+    # Неполный результат не кэшируется
+    assert db_session.query(ParseResultCache).count() == 0
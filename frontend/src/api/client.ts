@@ -39,7 +39,14 @@ async function request<T>(url: string, options?: RequestInit): Promise<T> {
   return response.json();
 }
 
-export async function uploadScreenshot(file: File): Promise<ParsedTransaction[]> {
+export interface UploadResult {
+  transactions: ParsedTransaction[];
+  // Numbers of long-PDF parts that could not be parsed (empty if everything was parsed)
+  failedChunks: number[];
+  totalChunks: number | null;
+}
+
+export async function uploadScreenshot(file: File): Promise<UploadResult> {
   const formData = new FormData();
   formData.append('file', file);
 
@@ -53,7 +60,13 @@ export async function uploadScreenshot(file: File): Promise<ParsedTransaction[]>
     throw new Error(error.detail || 'Ошибка загрузки файла');
   }
 
-  return response.json();
+  const failedChunks = response.headers.get('X-Parse-Failed-Chunks');
+  const totalChunks = response.headers.get('X-Parse-Total-Chunks');
+  return {
+    transactions: await response.json(),
+    failedChunks: failedChunks ? failedChunks.split(',').map(Number) : [],
+    totalChunks: totalChunks ? Number(totalChunks) : null,
+  };
 }
 
 export interface BatchUploadResult {
@@ -102,7 +115,18 @@ export async function createTransaction(data: TransactionCreate, accountId?: num
   });
 }
 
-export async function checkDuplicateTransactions(transactions: TransactionCreate[]): Promise<{
+export async function createTransactionsBulk(data: TransactionCreate[], accountId?: number): Promise<{
+  created_count: number;
+  transactions: Transaction[];
+}> {
+  const url = accountId ? `/transactions/bulk?account_id=${accountId}` : '/transactions/bulk';
+  return request(url, {
+    method: 'POST',
+    body: JSON.stringify(data),
+  });
+}
+
+export async function checkDuplicateTransactions(transactions: TransactionCreate[], accountId?: number): Promise<{
   total_checked: number;
   duplicates_found: number;
   duplicates: Array<{
@@ -118,7 +142,10 @@ export async function checkDuplicateTransactions(transactions: TransactionCreate
     }>;
   }>;
 }> {
-  return request('/transactions/check-duplicates', {
+  const url = accountId
+    ? `/transactions/check-duplicates?account_id=${accountId}`
+    : '/transactions/check-duplicates';
+  return request(url, {
     method: 'POST',
     body: JSON.stringify(transactions),
   });
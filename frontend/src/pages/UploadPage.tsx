@@ -1,7 +1,7 @@
 import { useState, useRef } from 'react';
 import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
 import { useNavigate } from 'react-router-dom';
-import { uploadScreenshot, uploadScreenshotBatch, createTransaction, getCategories, getTransactions, getAccounts, getSavingsGoals, addToSavingsGoal, subtractFromSavingsGoal, checkDuplicateTransactions } from '../api/client';
+import { uploadScreenshot, uploadScreenshotBatch, createTransaction, createTransactionsBulk, getCategories, getTransactions, getAccounts, getSavingsGoals, addToSavingsGoal, subtractFromSavingsGoal, checkDuplicateTransactions } from '../api/client';
 import type { ParsedTransaction, TransactionCreate } from '../types';
 import UploadForm, { type UploadFormRef } from '../components/UploadForm';
 import ManualEntryForm from '../components/ManualEntryForm';
@@ -12,13 +12,14 @@ import AccountSelectionModal from '../components/AccountSelectionModal';
 import HintCard from '../components/HintCard';
 
 type TabType = 'screenshot' | 'manual';
+type BatchResult = { data: ParsedTransaction; saved: boolean; isDuplicate?: boolean; duplicateInfo?: any };
 
 export default function UploadPage() {
   const queryClient = useQueryClient();
   const navigate = useNavigate();
   const uploadFormRef = useRef<UploadFormRef>(null);
   const [activeTab, setActiveTab] = useState<TabType>('screenshot');
-  const [batchResults, setBatchResults] = useState<Array<{ data: ParsedTransaction; saved: boolean; isDuplicate?: boolean; duplicateInfo?: any }>>([]);
+  const [batchResults, setBatchResults] = useState<BatchResult[]>([]);
   const [editingIndex, setEditingIndex] = useState<number | null>(null);
   const [successMessage, setSuccessMessage] = useState<string | null>(null);
   const [showDistribution, setShowDistribution] = useState(false);
@@ -52,105 +53,78 @@ export default function UploadPage() {
 
   const recentDescriptions = [...new Set(transactions.map(t => t.description))].slice(0, 50);
 
+  // Duplicates are checked against the chosen account: the exact-fingerprint
+  // match includes account_id, so the check runs after the account is selected
+  const markDuplicates = async (results: BatchResult[], accountId?: number) => {
+    setCheckingDuplicates(true);
+    try {
+      const duplicateCheck = await checkDuplicateTransactions(
+        results.map(r => ({
+          amount: r.data.amount,
+          description: r.data.description,
+          category: r.data.category || undefined,
+          transaction_type: r.data.transaction_type,
+          date: r.data.date,
+        })),
+        accountId
+      );
+
+      // Mark duplicates
+      const resultsWithDuplicates = results.map((result, idx) => {
+        const duplicate = duplicateCheck.duplicates.find(d => d.index === idx);
+        if (duplicate) {
+          return {
+            ...result,
+            isDuplicate: true,
+            duplicateInfo: duplicate,
+          };
+        }
+        return { ...result, isDuplicate: false, duplicateInfo: undefined };
+      });
+
+      setBatchResults(resultsWithDuplicates);
+    } catch (error) {
+      console.error('Failed to check duplicates:', error);
+      setBatchResults(results);
+    } finally {
+      setCheckingDuplicates(false);
+    }
+  };
+
+  const showParsedResults = (results: BatchResult[]) => {
+    setBatchResults(results);
+    // Show account selection modal after parsing; duplicates are checked once it is chosen
+    if (accounts.length > 0) {
+      setShowAccountSelection(true);
+    } else {
+      markDuplicates(results);
+    }
+  };
+
   const uploadMutation = useMutation({
     mutationFn: uploadScreenshot,
-    onSuccess: async (transactions) => {
+    onSuccess: ({ transactions, failedChunks, totalChunks }) => {
+      if (failedChunks.length > 0) {
+        alert(`Не удалось распознать части выписки ${failedChunks.join(', ')} из ${totalChunks}. Проверьте, все ли операции на месте.`);
+      }
       // Convert array of transactions to batch results format
-      const results = transactions.map(transaction => ({
+      showParsedResults(transactions.map(transaction => ({
         data: transaction,
         saved: false,
-      }));
-
-      // Check for duplicates
-      setCheckingDuplicates(true);
-      try {
-        const duplicateCheck = await checkDuplicateTransactions(
-          transactions.map(t => ({
-            amount: t.amount,
-            description: t.description,
-            category: t.category || undefined,
-            transaction_type: t.transaction_type,
-            date: t.date,
-          }))
-        );
-
-        // Mark duplicates
-        const resultsWithDuplicates = results.map((result, idx) => {
-          const duplicate = duplicateCheck.duplicates.find(d => d.index === idx);
-          if (duplicate) {
-            return {
-              ...result,
-              isDuplicate: true,
-              duplicateInfo: duplicate,
-            };
-          }
-          return result;
-        });
-
-        setBatchResults(resultsWithDuplicates);
-      } catch (error) {
-        console.error('Failed to check duplicates:', error);
-        setBatchResults(results);
-      } finally {
-        setCheckingDuplicates(false);
-      }
-
-      // Show account selection modal after parsing
-      if (accounts.length > 0) {
-        setShowAccountSelection(true);
-      }
+      })));
     },
   });
 
   const batchUploadMutation = useMutation({
     mutationFn: uploadScreenshotBatch,
-    onSuccess: async (data) => {
+    onSuccess: (data) => {
       // Flatten all transactions from all files
-      const successResults = data.results
+      showParsedResults(data.results
         .filter(r => r.success && r.data && r.data.length > 0)
         .flatMap(r => r.data!.map(transaction => ({
           data: transaction,
           saved: false,
-        })));
-
-      // Check for duplicates
-      setCheckingDuplicates(true);
-      try {
-        const allTransactions = successResults.map(r => ({
-          amount: r.data.amount,
-          description: r.data.description,
-          category: r.data.category || undefined,
-          transaction_type: r.data.transaction_type,
-          date: r.data.date,
-        }));
-
-        const duplicateCheck = await checkDuplicateTransactions(allTransactions);
-
-        // Mark duplicates
-        const resultsWithDuplicates = successResults.map((result, idx) => {
-          const duplicate = duplicateCheck.duplicates.find(d => d.index === idx);
-          if (duplicate) {
-            return {
-              ...result,
-              isDuplicate: true,
-              duplicateInfo: duplicate,
-            };
-          }
-          return result;
-        });
-
-        setBatchResults(resultsWithDuplicates);
-      } catch (error) {
-        console.error('Failed to check duplicates:', error);
-        setBatchResults(successResults);
-      } finally {
-        setCheckingDuplicates(false);
-      }
-
-      // Show account selection modal after parsing
-      if (accounts.length > 0) {
-        setShowAccountSelection(true);
-      }
+        }))));
     },
   });
 
@@ -243,16 +217,14 @@ export default function UploadPage() {
 
     const unsavedTransactions = batchResults.filter(r => !r.saved);
 
-    for (const result of unsavedTransactions) {
-      await createTransaction({
-        amount: result.data.amount,
-        description: result.data.description,
-        category: result.data.category || undefined,
-        transaction_type: result.data.transaction_type,
-        date: result.data.date,
-        raw_text: result.data.raw_text,
-      }, selectedAccountId);
-    }
+    await createTransactionsBulk(unsavedTransactions.map(result => ({
+      amount: result.data.amount,
+      description: result.data.description,
+      category: result.data.category || undefined,
+      transaction_type: result.data.transaction_type,
+      date: result.data.date,
+      raw_text: result.data.raw_text,
+    })), selectedAccountId);
 
     queryClient.invalidateQueries({ queryKey: ['transactions'] });
     queryClient.invalidateQueries({ queryKey: ['accounts'] });
@@ -351,6 +323,7 @@ export default function UploadPage() {
   const handleAccountSelect = (accountId: number) => {
     setSelectedAccountId(accountId);
     setShowAccountSelection(false);
+    markDuplicates(batchResults, accountId);
   };
 
   const handleAccountSelectionCancel = () => {